@@ -0,0 +1,136 @@
+"""
+Throughput of one server worker under concurrent load: gunicorn's sync
+worker (WSGI) against the uvicorn worker (ASGI).
+
+    python -m benchmarks.bench_asgi --concurrency 50 --seconds 10 --latency-ms 5
+
+The server uses a fresh SQLite file with the lesson page cache on. Its
+default and search caches wait ``--latency-ms`` on every call, standing in
+for a cache server across the network. The requests are lesson pages and
+lesson searches, all warmed before measuring, so each one mostly waits on
+cache I/O. A sync worker serves these one at a time; an async worker
+overlaps the waits. Needs gunicorn, uvicorn and uvicorn-worker.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.utils import WORDS, prepare_file_database, summarize
+
+
+SERVERS = {
+    "wsgi": ["lesson_space.wsgi:application"],
+    "asgi": ["--worker-class", "uvicorn_worker.UvicornWorker", "lesson_space.asgi:application"],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def fetch(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(data.split(b" ", 2)[1])
+
+
+async def wait_for_server(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await fetch(port, "/lessons/")
+            return
+        except (OSError, IndexError, ValueError):
+            await asyncio.sleep(0.2)
+    raise RuntimeError("The server didn't start.")
+
+
+async def load(port, targets, concurrency, seconds):
+    cycle = itertools.cycle(targets)
+    durations, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await fetch(port, next(cycle))
+            except OSError:
+                status = None
+            if status == 200:
+                durations.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return durations, errors
+
+
+async def run_server(kind, targets, args, env):
+    port = free_port()
+    command = [
+        sys.executable, "-m", "gunicorn", "--workers", "1", "--bind", f"127.0.0.1:{port}",
+        "--log-level", "warning", *SERVERS[kind],
+    ]
+    server = subprocess.Popen(command, env=env)
+    try:
+        await wait_for_server(port)
+        for target in targets:
+            await fetch(port, target)
+        durations, errors = await load(port, targets, args.concurrency, args.seconds)
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "requests_per_second": len(durations) / args.seconds,
+        "latency": summarize(durations) if durations else None,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--lessons", type=int, default=100)
+    parser.add_argument("--servers", default=",".join(SERVERS), help="Comma-separated: wsgi,asgi")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "benchmarks.settings",
+            "SQLITE_PATH": os.path.join(tmp, "db.sqlite3"),
+            "SQLITE_CONCURRENT_MODE": "1",
+            "LESSON_PAGE_CACHE": "1",
+            "BENCH_CACHE_LATENCY_MS": str(args.latency_ms),
+        }
+        os.environ.update(env)
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            urls = pool.apply(prepare_file_database, (args.lessons,))
+        targets = urls[:20] + [f"/search/lessons/?query={word}" for word in WORDS[:10]]
+
+        results = {"concurrency": args.concurrency, "latency_ms": args.latency_ms}
+        for kind in args.servers.split(","):
+            results[kind] = asyncio.run(run_server(kind, targets, args, env))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
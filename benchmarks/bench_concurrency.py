@@ -0,0 +1,105 @@
+"""
+Concurrent readers and publishers on one SQLite file, with and without
+SQLITE_CONCURRENT_MODE (see lesson_space/database.py).
+
+    python -m benchmarks.bench_concurrency --workers 8 --writers 2 --seconds 10
+
+Each mode gets a fresh database file seeded with ``--lessons`` lessons. Then
+``--workers`` processes run for ``--seconds``: ``--writers`` of them publish
+revisions back to back, the rest request lesson pages. Reports throughput,
+read latency and the number of "database is locked" errors.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.utils import prepare_file_database, setup_django, summarize
+
+
+MODES = {"default": "0", "concurrent": "1"}
+
+
+def work(index, writer, seconds, seed):
+    setup_django()
+
+    from django.db import OperationalError, connections
+    from django.test import Client
+
+    from home.models import LessonPage
+
+    rng = random.Random(seed + index)
+    lessons = list(LessonPage.objects.live().only("pk", "url_path"))
+    client = Client()
+    durations, errors, other_errors = [], 0, 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        lesson = rng.choice(lessons)
+        start = time.perf_counter()
+        try:
+            if writer:
+                page = LessonPage.objects.get(pk=lesson.pk)
+                page.subtitle = f"Revision {rng.randint(0, 10 ** 6)}"
+                page.save_revision().publish()
+            else:
+                response = client.get(lesson.url)
+                if response.status_code != 200:
+                    other_errors += 1
+                    continue
+        except OperationalError as error:
+            if "locked" not in str(error):
+                raise
+            errors += 1
+            continue
+        durations.append(time.perf_counter() - start)
+    connections.close_all()
+    return {"writer": writer, "durations": durations, "lock_errors": errors, "other_errors": other_errors}
+
+
+def run_mode(mode, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SQLITE_PATH"] = os.path.join(tmp, "db.sqlite3")
+        os.environ["SQLITE_CONCURRENT_MODE"] = MODES[mode]
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(1) as pool:
+            pool.apply(prepare_file_database, (args.lessons,))
+        with context.Pool(args.workers) as pool:
+            results = pool.starmap(
+                work,
+                [(i, i < args.writers, args.seconds, args.seed) for i in range(args.workers)],
+            )
+
+    reads = [d for r in results if not r["writer"] for d in r["durations"]]
+    writes = [d for r in results if r["writer"] for d in r["durations"]]
+    return {
+        "reads_per_second": len(reads) / args.seconds,
+        "writes_per_second": len(writes) / args.seconds,
+        "read": summarize(reads) if reads else None,
+        "write": summarize(writes) if writes else None,
+        "lock_errors": sum(r["lock_errors"] for r in results),
+        "other_errors": sum(r["other_errors"] for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2, help="Workers that publish.")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--lessons", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated: default,concurrent")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    results = {"workers": args.workers, "writers": args.writers, "seconds": args.seconds}
+    for mode in args.modes.split(","):
+        results[mode] = run_mode(mode, args)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
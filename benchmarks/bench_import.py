@@ -0,0 +1,69 @@
+"""
+Lessons/sec created one at a time (add_child + publish) vs import_lessons.
+
+    python -m benchmarks.bench_import --lessons 2000
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.utils import benchmark_database, sample_body, seed_site, setup_django
+
+
+def write_ndjson(path, lessons, blocks):
+    with open(path, "w", encoding="utf-8") as out:
+        for index in range(lessons):
+            out.write(json.dumps({
+                "title": f"Imported {index}",
+                "subtitle": "Benchmark lesson",
+                "domain": ("physics", "chemistry", "biology", "math")[index % 4],
+                "tags": [f"unit-{index % 20}", "imported"],
+                "body": [list(block) for block in sample_body(index, blocks)],
+            }) + "\n")
+
+
+def run(lessons, one_by_one, blocks, batch_size):
+    from django.core.management import call_command
+
+    results = {}
+    with benchmark_database():
+        start = time.perf_counter()
+        seed_site(one_by_one, blocks)
+        elapsed = time.perf_counter() - start
+        results["one_by_one"] = {"lessons": one_by_one, "per_second": one_by_one / elapsed}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lessons.ndjson")
+            write_ndjson(path, lessons, blocks)
+            start = time.perf_counter()
+            call_command(
+                "import_lessons", path, batch_size=batch_size, stdout=io.StringIO()
+            )
+            elapsed = time.perf_counter() - start
+        results["import_lessons"] = {"lessons": lessons, "per_second": lessons / elapsed}
+
+    results["speedup"] = (
+        results["import_lessons"]["per_second"] / results["one_by_one"]["per_second"]
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lessons", type=int, default=2000)
+    parser.add_argument(
+        "--one-by-one", type=int, default=100, help="Lessons to create the slow way."
+    )
+    parser.add_argument("--blocks", type=int, default=12, help="Blocks per lesson body.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    print(json.dumps(run(args.lessons, args.one_by_one, args.blocks, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
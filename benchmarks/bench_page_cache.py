@@ -0,0 +1,48 @@
+"""
+Requests/sec for anonymous lesson views with the full-page cache off and on.
+
+    python -m benchmarks.bench_page_cache --lessons 50 --requests 1000
+"""
+import argparse
+import itertools
+import json
+
+from benchmarks.utils import benchmark_database, seed_site, setup_django, summarize, timed
+
+
+def run(lessons, requests, blocks):
+    from django.core.cache import caches
+    from django.test import Client, override_settings
+
+    results = {}
+    with benchmark_database():
+        urls = seed_site(lessons, blocks)
+        for enabled in (False, True):
+            with override_settings(LESSON_PAGE_CACHE={"ENABLED": enabled}):
+                for alias in ("default", "blocks"):
+                    caches[alias].clear()
+                client = Client()
+                # Warm both caches so we compare steady states.
+                for url in urls:
+                    assert client.get(url).status_code == 200
+                cycle = itertools.cycle(urls)
+                durations = timed(lambda: client.get(next(cycle)), requests)
+            results["cached" if enabled else "uncached"] = summarize(durations)
+
+    results["speedup"] = results["cached"]["per_second"] / results["uncached"]["per_second"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lessons", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--blocks", type=int, default=24, help="Blocks per lesson body.")
+    args = parser.parse_args()
+
+    setup_django()
+    print(json.dumps(run(args.lessons, args.requests, args.blocks), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Cold start, first-request latency and memory per worker for gunicorn.conf.py,
+with and without preloading and warmup.
+
+    python -m benchmarks.bench_startup --workers 4
+    python -m benchmarks.bench_startup --workers 4 --settings-module benchmarks.serving_settings
+
+For each mode, gunicorn starts ``--workers`` sync workers against a fresh
+SQLite file. The benchmark reports:
+
+* ``startup_seconds``: from launch to the first 200 response;
+* ``first_request``: one concurrent request per worker right after they have
+  all booted, which is the latency the first visitors see;
+* ``warm_request``: the same requests once every worker has served some;
+* ``worker_memory_mb``: RSS, PSS (shared pages split between the processes
+  that share them) and USS (pages only this worker has) per worker, after
+  the requests. Preloading should leave RSS about the same and cut PSS and
+  USS.
+
+Linux only (reads /proc). Needs gunicorn.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_asgi import fetch, free_port
+from benchmarks.utils import prepare_file_database, summarize
+
+
+MODES = {
+    "plain": {"GUNICORN_PRELOAD": "0", "GUNICORN_WARMUP": "0"},
+    "warmup": {"GUNICORN_PRELOAD": "0", "GUNICORN_WARMUP": "1"},
+    "preload": {"GUNICORN_PRELOAD": "1", "GUNICORN_WARMUP": "1"},
+}
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name may contain spaces; fields after it don't.
+                ppid = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            found.append(int(entry))
+    return found
+
+
+def memory(pid):
+    """RSS, PSS and USS of a process in MB, from smaps_rollup."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "uss": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+async def timed_fetch(port, path):
+    start = time.perf_counter()
+    status = await fetch(port, path)
+    if status != 200:
+        raise RuntimeError(f"{path} returned {status}.")
+    return time.perf_counter() - start
+
+
+async def wait_until_serving(port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if await fetch(port, "/") == 200:
+                return
+        except (OSError, IndexError, ValueError):
+            pass
+        await asyncio.sleep(0.05)
+    raise RuntimeError("The server didn't start.")
+
+
+async def wait_for_workers(pid, count, timeout=120):
+    deadline = time.monotonic() + timeout
+    while len(children(pid)) < count:
+        if time.monotonic() > deadline:
+            raise RuntimeError("The workers didn't start.")
+        await asyncio.sleep(0.05)
+    # A forked worker still has to finish booting.
+    await asyncio.sleep(1)
+
+
+async def run_mode(mode, urls, args, env):
+    port = free_port()
+    env = {
+        **env,
+        **MODES[mode],
+        "DJANGO_SETTINGS_MODULE": args.settings_module,
+        "PORT": str(port),
+        "WEB_CONCURRENCY": str(args.workers),
+    }
+    command = [
+        sys.executable, "-m", "gunicorn", "--config", CONFIG, "--log-level", "warning",
+        "lesson_space.wsgi:application",
+    ]
+    start = time.perf_counter()
+    server = subprocess.Popen(command, env=env)
+    try:
+        await wait_until_serving(port)
+        startup = time.perf_counter() - start
+        await wait_for_workers(server.pid, args.workers)
+
+        targets = [urls[i % len(urls)] for i in range(args.workers)]
+        first = await asyncio.gather(*(timed_fetch(port, url) for url in targets))
+        for _ in range(args.rounds):
+            await asyncio.gather(*(timed_fetch(port, url) for url in targets))
+        warm = await asyncio.gather(*(timed_fetch(port, url) for url in targets))
+
+        workers = [memory(pid) for pid in children(server.pid)]
+        master = memory(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "startup_seconds": startup,
+        "first_request": summarize(first),
+        "warm_request": summarize(warm),
+        "worker_memory_mb": {
+            key: statistics.fmean(worker[key] for worker in workers) for key in ("rss", "pss", "uss")
+        },
+        "master_memory_mb": master,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--lessons", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=10, help="Requests per worker before the warm sample.")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated: plain,warmup,preload")
+    parser.add_argument(
+        "--settings-module",
+        default="benchmarks.settings",
+        help="Settings the server runs with; the database is always set up with benchmarks.settings.",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "benchmarks.settings",
+            "SQLITE_PATH": os.path.join(tmp, "db.sqlite3"),
+            "SQLITE_CONCURRENT_MODE": "1",
+            "GUNICORN_ACCESS_LOG": "",
+        }
+        os.environ.update(env)
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            urls = pool.apply(prepare_file_database, (args.lessons,))
+
+        results = {"workers": args.workers, "settings": args.settings_module}
+        for mode in args.modes.split(","):
+            results[mode] = asyncio.run(run_mode(mode, urls, args, env))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
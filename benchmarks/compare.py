@@ -0,0 +1,63 @@
+"""
+Compare two benchmark suite results and flag regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.2
+
+Compares the p50 latency and mean query count of every measurement present
+in both files (matched by lesson count). Exits with status 1 if anything got
+slower by more than ``--threshold`` (a fraction) or runs more queries.
+"""
+import argparse
+import json
+import sys
+
+
+def measurements(tree, path=()):
+    """Yield (path, measurement) for every leaf dict with a p50_ms."""
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            if "p50_ms" in value:
+                yield path + (key,), value
+            else:
+                yield from measurements(value, path + (key,))
+
+
+def compare(baseline, candidate, threshold):
+    regressions = []
+    rows = []
+    old_runs = {run["lessons"]: run for run in baseline["runs"]}
+    for run in candidate["runs"]:
+        old = old_runs.get(run["lessons"])
+        if old is None:
+            continue
+        old_measurements = dict(measurements(old))
+        for path, new in measurements(run):
+            before = old_measurements.get(path)
+            if before is None:
+                continue
+            name = f"{run['lessons']}:{'.'.join(path)}"
+            change = (new["p50_ms"] - before["p50_ms"]) / before["p50_ms"] if before["p50_ms"] else 0.0
+            rows.append((name, before["p50_ms"], new["p50_ms"], change))
+            if change > threshold or new["queries_mean"] > before["queries_mean"]:
+                regressions.append(name)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with open(args.baseline) as old, open(args.candidate) as new:
+        rows, regressions = compare(json.load(old), json.load(new), args.threshold)
+
+    for name, before, after, change in rows:
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<45} {before:9.2f}ms -> {after:9.2f}ms {change:+7.1%}{flag}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+A LocMemCache that waits ``OPTIONS["LATENCY"]`` seconds on every call, to
+stand in for a cache server across the network in load tests. The sync
+methods block (``time.sleep``), the async ones yield (``asyncio.sleep``),
+as the sync and async clients of a real networked cache do.
+"""
+import asyncio
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+
+
+class LatencyLocMemCache(LocMemCache):
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.latency = params.get("OPTIONS", {}).get("LATENCY", 0.005)
+
+    def get(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().get(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().set(*args, **kwargs)
+
+    def add(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().add(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().delete(*args, **kwargs)
+
+    async def aget(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return super().get(*args, **kwargs)
+
+    async def aset(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return super().set(*args, **kwargs)
+
+    async def aadd(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return super().add(*args, **kwargs)
+
+    async def adelete(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return super().delete(*args, **kwargs)
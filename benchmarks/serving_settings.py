@@ -0,0 +1,11 @@
+"""
+benchmarks.settings reduced to the serving profile (lesson_space/settings/serving.py):
+no admin apps, the public URLconf only.
+"""
+from benchmarks.settings import *
+from lesson_space.settings import serving
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in serving.ADMIN_APPS]
+MIDDLEWARE = serving.MIDDLEWARE
+ROOT_URLCONF = serving.ROOT_URLCONF
+TEMPLATES = serving.TEMPLATES
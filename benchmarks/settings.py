@@ -0,0 +1,33 @@
+"""
+Settings for the benchmark scripts: production-like (DEBUG off), but with
+plain static storage so templates render without a collectstatic manifest.
+"""
+import os
+
+from lesson_space.settings.dev import *
+
+DEBUG = False
+
+STORAGES = {
+    **STORAGES,
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+PORPOISE_LATEX_RENDERER = {
+    "BACKEND": "porpoise_blocks.latex.LocalLatexRenderer",
+}
+
+# Simulated network latency (milliseconds) for the default and search caches,
+# used by benchmarks/bench_asgi.py to model a remote cache server.
+if os.environ.get("BENCH_CACHE_LATENCY_MS"):
+    for alias in ("default", "search"):
+        CACHES[alias] = {
+            **CACHES[alias],
+            "BACKEND": "benchmarks.latency_cache.LatencyLocMemCache",
+            "OPTIONS": {
+                **CACHES[alias].get("OPTIONS", {}),
+                "LATENCY": float(os.environ["BENCH_CACHE_LATENCY_MS"]) / 1000,
+            },
+        }
@@ -0,0 +1,166 @@
+"""
+Benchmark suite: lesson render, search, admin listing and publish cost on
+seeded synthetic sites, written as JSON for comparing commits.
+
+    python -m benchmarks.suite --sizes 1000,10000 --output bench-results.json
+    python -m benchmarks.compare old.json new.json
+
+Each size gets a fresh database seeded from ``--seed`` through the bulk
+import path, so runs are reproducible. Every measurement reports
+latency percentiles and the mean number of queries per operation.
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks.utils import WORDS, benchmark_database, measure, seed_synthetic_site, setup_django
+
+
+def clear_caches():
+    from django.core.cache import caches
+
+    for alias in ("default", "blocks", "search"):
+        caches[alias].clear()
+
+
+def warmed(fn, items):
+    """``measure(fn, items)`` after one untimed pass to fill the caches."""
+    for item in items:
+        fn(item)
+    return measure(fn, items)
+
+
+def bench_render(urls):
+    from django.test import Client
+
+    client = Client()
+
+    def get(url):
+        assert client.get(url).status_code == 200
+
+    return {
+        "cold": measure(get, urls, setup=clear_caches),
+        "warm": warmed(get, urls),
+    }
+
+
+def bench_search(queries):
+    from django.test import Client
+
+    from search import lessons
+
+    client = Client()
+    return {
+        "facet_search_cold": measure(lessons.facet_search, queries, setup=clear_caches),
+        "facet_search_warm": warmed(lessons.facet_search, queries),
+        "view_cold": measure(
+            lambda query: client.get("/search/", {"query": query}), queries, setup=clear_caches
+        ),
+    }
+
+
+def bench_admin_list(queries, samples):
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    user = get_user_model().objects.create_superuser("bench", "bench@example.com", "bench")
+    client = Client()
+    client.force_login(user)
+
+    def get(params):
+        assert client.get("/admin/home/lessonpage/", params).status_code == 200
+
+    return {
+        "first_page": measure(get, [{}] * samples),
+        "deep_page": measure(get, [{"p": 50}] * samples),
+        "search": measure(get, [{"q": query} for query in queries]),
+    }
+
+
+def bench_publish(lesson_ids):
+    from home.models import LessonPage
+
+    def publish(pk):
+        lesson = LessonPage.objects.get(pk=pk)
+        lesson.subtitle = f"{lesson.subtitle} (edited)"
+        lesson.save_revision().publish()
+
+    return measure(publish, lesson_ids)
+
+
+def run_size(lessons, blocks, samples, seed):
+    from home.models import LessonPage
+
+    with benchmark_database():
+        start = time.perf_counter()
+        seed_synthetic_site(lessons, blocks, seed=seed)
+        seed_seconds = time.perf_counter() - start
+
+        rng = random.Random(seed)
+        ids = list(LessonPage.objects.values_list("pk", flat=True))
+        sample_ids = rng.sample(ids, min(samples, len(ids)))
+        urls = [page.url for page in LessonPage.objects.filter(pk__in=sample_ids)]
+        queries = [" ".join(rng.sample(WORDS, rng.randint(1, 2))) for _ in range(samples)]
+
+        return {
+            "lessons": lessons,
+            "blocks": blocks,
+            "seed_seconds": seed_seconds,
+            "render": bench_render(urls),
+            "search": bench_search(queries),
+            "admin_list": bench_admin_list(queries, samples),
+            "publish": bench_publish(sample_ids),
+        }
+
+
+def metadata():
+    import django
+    import wagtail
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "wagtail": wagtail.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes", default="1000", help="Comma-separated lesson counts, e.g. 1000,10000,100000."
+    )
+    parser.add_argument("--blocks", type=int, default=24, help="Blocks per lesson body.")
+    parser.add_argument("--samples", type=int, default=50, help="Operations per measurement.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON here instead of stdout.")
+    args = parser.parse_args()
+
+    setup_django()
+    results = {"meta": metadata(), "runs": []}
+    for size in [int(size) for size in args.sizes.split(",")]:
+        print(f"Running {size} lessons...", file=sys.stderr)
+        results["runs"].append(run_size(size, args.blocks, args.samples, args.seed))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            out.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Shared helpers for the benchmark scripts in this package.
+
+Each benchmark runs against a throwaway test database (created and destroyed
+like the test runner does), so it never touches db.sqlite3.
+"""
+import os
+import random
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def prepare_file_database(lessons, blocks=12):
+    """
+    Migrate and seed the database named by the environment (``SQLITE_PATH``)
+    for benchmarks that run several processes or a real server against a
+    file. Call it in a process of its own; returns the lesson URLs.
+    """
+    setup_django()
+
+    from django.core.management import call_command
+
+    from home.models import LessonPage
+
+    call_command("migrate", verbosity=0)
+    seed_synthetic_site(lessons, blocks=blocks)
+    return [page.url for page in LessonPage.objects.live()]
+
+
+def sample_body(index, blocks=12):
+    """A lesson body cycling through the essential block types."""
+    body = []
+    for n in range(blocks):
+        kind = n % 6
+        if kind == 0:
+            body.append(("heading", f"Section {n} of lesson {index}"))
+        elif kind == 1:
+            body.append(("paragraph", f"<p>Paragraph {n} with <b>bold</b> text for lesson {index}.</p>"))
+        elif kind == 2:
+            body.append(("callout", {"title": "Note", "body": f"<p>Callout {n}.</p>", "style": "info"}))
+        elif kind == 3:
+            body.append(("quote", {"quote": f"<p>Quote {n}.</p>", "attribution": "Someone", "style": "default"}))
+        elif kind == 4:
+            body.append(("code", {"language": "python", "code": f"def f{n}(x):\n    return x * {index}\n", "style": "lined"}))
+        else:
+            body.append(("latex", f"$$x_{{{n}}} = {index}$$"))
+    return body
+
+
+def seed_site(lessons, blocks=12):
+    """Create a home page with ``lessons`` published LessonPages; returns their URLs."""
+    from wagtail.models import Page, Site
+
+    from home.models import HomePage, LessonPage
+
+    root = Page.objects.get(depth=1)
+    homepage = HomePage(title="Benchmark Home", slug="benchmark-home")
+    root.add_child(instance=homepage)
+    homepage.save_revision().publish()
+    Site.objects.update(root_page=homepage)
+
+    urls = []
+    for index in range(lessons):
+        lesson = LessonPage(
+            title=f"Lesson {index}",
+            slug=f"lesson-{index}",
+            subtitle="Benchmark lesson",
+            domain=("physics", "chemistry", "biology", "math")[index % 4],
+        )
+        lesson.body = sample_body(index, blocks)
+        homepage.add_child(instance=lesson)
+        lesson.save_revision().publish()
+        urls.append(lesson.url)
+    return urls
+
+
+WORDS = (
+    "energy motion force wave light atom cell gene enzyme reaction acid base "
+    "vector matrix integral limit series proof graph function orbit field "
+    "charge current circuit lens prism momentum entropy pressure volume"
+).split()
+
+# Share of each block type in a synthetic body, roughly as in real lessons.
+BLOCK_MIX = {
+    "paragraph": 40,
+    "heading": 15,
+    "code": 15,
+    "latex": 12,
+    "callout": 10,
+    "quote": 8,
+}
+
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def synthetic_block(rng, kind):
+    if kind == "heading":
+        return {"type": "heading", "value": _words(rng, 3).title()}
+    if kind == "paragraph":
+        return {"type": "paragraph", "value": f"<p>{_words(rng, 40)} <b>{_words(rng, 2)}</b>.</p>"}
+    if kind == "callout":
+        return {"type": "callout", "value": {
+            "title": _words(rng, 2).title(), "body": f"<p>{_words(rng, 15)}</p>", "style": "info",
+        }}
+    if kind == "quote":
+        return {"type": "quote", "value": {
+            "quote": f"<p>{_words(rng, 12)}</p>", "attribution": "Someone", "style": "default",
+        }}
+    if kind == "code":
+        lines = "\n".join(f"{rng.choice(WORDS)} = {rng.randint(0, 99)}" for _ in range(rng.randint(3, 12)))
+        return {"type": "code", "value": {
+            "language": rng.choice(["python", "bash", "javascript"]), "code": lines,
+            "caption": "", "style": rng.choice(["default", "lined"]),
+        }}
+    return {"type": "latex", "value": f"$$x_{{{rng.randint(0, 9)}}} = \\frac{{{rng.randint(1, 9)}}}{{{rng.randint(2, 9)}}}$$"}
+
+
+def synthetic_lesson(rng, index, blocks):
+    kinds = rng.choices(list(BLOCK_MIX), weights=list(BLOCK_MIX.values()), k=blocks)
+    return {
+        "title": f"{_words(rng, 3).title()} {index}",
+        "subtitle": _words(rng, 6),
+        "domain": rng.choice(["physics", "chemistry", "biology", "math"]),
+        "tags": rng.sample(WORDS, 3),
+        "body": [synthetic_block(rng, kind) for kind in kinds],
+    }
+
+
+def seed_synthetic_site(lessons, blocks=12, seed=0, batch_size=1000):
+    """
+    Create a home page with ``lessons`` published lessons generated from
+    ``seed`` (so every run gets the same site), using the bulk import path.
+    Returns the home page.
+    """
+    from wagtail.models import Page, Site
+
+    from home.lesson_import import TagResolver, TreeSlots, import_batch
+    from home.models import HomePage
+
+    root = Page.objects.get(depth=1)
+    homepage = HomePage(title="Benchmark Home", slug="benchmark-home")
+    root.add_child(instance=homepage)
+    homepage.save_revision().publish()
+    Site.objects.update(root_page=homepage)
+
+    rng = random.Random(seed)
+    slots, tags = TreeSlots(homepage), TagResolver()
+    for start in range(0, lessons, batch_size):
+        rows = [
+            synthetic_lesson(rng, index, blocks)
+            for index in range(start, min(start + batch_size, lessons))
+        ]
+        import_batch(homepage, rows, slots, tags)
+    return homepage
+
+
+def measure(fn, items, setup=None):
+    """
+    Call ``fn(item)`` for each item, after ``setup()`` (untimed) if given.
+    Returns ``summarize()`` plus the mean number of queries per call.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    durations, queries = [], []
+    for item in items:
+        if setup is not None:
+            setup()
+        # The log is capped; a full log would make every count 0.
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            fn(item)
+            durations.append(time.perf_counter() - start)
+        queries.append(len(captured))
+    return {**summarize(durations), "queries_mean": statistics.fmean(queries)}
+
+
+def timed(fn, repeat):
+    """Call ``fn`` ``repeat`` times; returns per-call durations in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(durations):
+    ordered = sorted(durations)
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "per_second": len(ordered) / sum(ordered) if sum(ordered) else 0.0,
+    }
@@ -0,0 +1,15 @@
+import pytest
+
+
+@pytest.fixture
+def plain_storages(settings):
+    """
+    Serve static files without a collectstatic manifest.
+
+    base.html uses {% static %}, which the ManifestStaticFilesStorage in
+    settings.base can only resolve after collectstatic.
+    """
+    settings.STORAGES = {
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
@@ -0,0 +1,91 @@
+"""
+gunicorn settings, read from the working directory when gunicorn starts:
+
+    gunicorn lesson_space.wsgi:application
+    gunicorn --worker-class uvicorn_worker.UvicornWorker lesson_space.asgi:application
+
+Every setting can be changed from the environment (see docs/SERVING.md).
+
+* ``WEB_CONCURRENCY`` workers, by default 2 per CPU available to the process,
+  plus one (one per CPU for async workers, which overlap their own waits).
+* The application is imported and warmed (lesson_space/warmup.py) once in
+  the master, then the workers are forked. They share those memory pages
+  copy-on-write instead of importing Django and Wagtail each, and the
+  first request a worker serves doesn't pay for the warmup.
+* Each worker is replaced after ``GUNICORN_MAX_REQUESTS`` requests, plus up
+  to ``GUNICORN_MAX_REQUESTS_JITTER`` so they don't all restart at once.
+  This bounds the memory a worker can accumulate (caches, fragmentation).
+"""
+import gc
+import os
+
+
+def _int(name, default):
+    value = os.environ.get(name, "")
+    return int(value) if value else default
+
+
+def _flag(name, default):
+    value = os.environ.get(name, "")
+    return value == "1" if value else default
+
+
+def available_cpus():
+    # Respects CPU affinity (taskset, some container runtimes), unlike cpu_count().
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+_async_worker = worker_class != "sync"
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = _int(
+    "WEB_CONCURRENCY", available_cpus() if _async_worker else available_cpus() * 2 + 1
+)
+timeout = _int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _int("GUNICORN_KEEPALIVE", 5)
+
+preload_app = _flag("GUNICORN_PRELOAD", True)
+max_requests = _int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = _int("GUNICORN_MAX_REQUESTS_JITTER", 100)
+
+# An empty GUNICORN_ACCESS_LOG turns the access log off.
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+
+_warmup = _flag("GUNICORN_WARMUP", True)
+
+
+def _run_warmup(log):
+    from django.db import connections
+
+    from lesson_space import warmup
+
+    timings = warmup.run()
+    # Warmup doesn't query, but never hand an open connection to a fork.
+    connections.close_all()
+    log.info(
+        "Warmup: %s",
+        ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()),
+    )
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before workers fork.
+    if not server.cfg.preload_app:
+        return
+    if _warmup:
+        _run_warmup(server.log)
+    # Move everything allocated so far out of the collector's reach. A
+    # collection in a worker would otherwise write to (and so copy) every
+    # page holding one of these objects.
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Without preload each worker imports the app itself, so it warms itself.
+    if not worker.cfg.preload_app and _warmup:
+        _run_warmup(worker.log)
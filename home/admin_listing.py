@@ -0,0 +1,167 @@
+"""
+Index view pieces for the Lessons ModelAdmin (home/lesson_admin.py).
+
+The stock ModelAdmin listing gets slower with every lesson added:
+
+* search runs ``icontains`` on every field, so nothing can use an index,
+  and the ``tags__name`` join duplicates rows and forces a DISTINCT;
+* each listing issues three full COUNTs (all rows, search results and the
+  paginator);
+* the per-row buttons look up the parent page, the workflow state and the
+  scheduled revision of every lesson, one query each.
+
+``LessonSearchHandler`` matches the search term as a prefix of the title,
+subtitle or domain, or as a whole tag name. Unlike the stock search, a term
+in the middle of a word doesn't match. It does this with one UNION subquery
+and no join, and the prefix lookups use the indexes from migration 0013.
+The listing counts only up to ``LESSON_ADMIN_EXACT_COUNT_LIMIT`` rows and
+uses the query planner's estimate past that. ``LessonPageAdmin.get_queryset``
+starts from an ``EstimatedCountQuerySet``, so the counts IndexView takes are
+estimates too. It also defers the body, prefetches the tags and annotates
+the workflow and schedule state. ``LessonIndexView`` loads the parents of
+the listed lessons in one query. The result is a fixed number of queries
+per page, whatever the number of lessons.
+"""
+import json
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from taggit.models import Tag
+from wagtail.admin.paginator import WagtailPaginator
+from wagtail.models import Page
+from wagtail.query import PageQuerySet
+from wagtail_modeladmin.helpers.search import BaseSearchHandler
+from wagtail_modeladmin.views import IndexView
+
+from .models import LessonPageTag
+
+
+def exact_count_limit():
+    return getattr(settings, "LESSON_ADMIN_EXACT_COUNT_LIMIT", 10000)
+
+
+def planner_estimate(queryset):
+    """
+    The number of rows the database expects ``queryset`` to return, or None
+    if the backend has no cheap way to tell.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimated_count(queryset, limit=None):
+    """
+    Return ``(count, is_estimate)`` for ``queryset``.
+
+    Up to ``limit`` rows are counted exactly. A count that stops at the limit
+    costs the same however large the table is. Past the limit, the planner's
+    estimate is used where the backend provides one. SQLite has none, so
+    there the full count is run.
+    """
+    limit = exact_count_limit() if limit is None else limit
+    # QuerySet.count counts exactly, on an EstimatedCountQuerySet too.
+    capped = QuerySet.count(queryset.order_by().values("pk")[: limit + 1])
+    if capped <= limit:
+        return capped, False
+    estimate = planner_estimate(queryset)
+    if estimate is None:
+        return QuerySet.count(queryset), False
+    return max(estimate, capped), True
+
+
+class EstimatedCountQuerySet(PageQuerySet):
+    """A page queryset whose ``count()`` is ``estimated_count``'s."""
+
+    def count(self):
+        return estimated_count(self)[0]
+
+
+class LessonSearchHandler(BaseSearchHandler):
+    """
+    The whole search term is matched as a case-insensitive prefix of each of
+    ``search_fields``, or as a whole tag name. Each match is its own indexed
+    subquery. They are combined with UNION into one ``pk IN (...)``, rather
+    than OR-ed across the joined tables, which would scan every row.
+    """
+
+    def search_queryset(self, queryset, search_term, **kwargs):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset
+
+        model = queryset.model
+        matches = [
+            model._default_manager.filter(**{f"{field}__istartswith": search_term})
+            .order_by()
+            .values("pk")
+            for field in self.search_fields
+        ]
+        matches.append(
+            LessonPageTag.objects.filter(
+                tag__in=Tag.objects.filter(name__iexact=search_term)
+            )
+            .order_by()
+            .values("content_object_id")
+        )
+        return queryset.filter(pk__in=matches[0].union(*matches[1:]))
+
+
+class EstimatedCountPaginator(WagtailPaginator):
+    """
+    A paginator whose ``count`` comes from ``estimated_count``. When it is an
+    estimate, ``count_is_estimate`` is set and the label says "about".
+    """
+
+    @cached_property
+    def _estimated_count(self):
+        return estimated_count(self.object_list)
+
+    @cached_property
+    def count(self):
+        return self._estimated_count[0]
+
+    @property
+    def count_is_estimate(self):
+        return self._estimated_count[1]
+
+    @cached_property
+    def items_count_label(self):
+        label = super().items_count_label
+        return f"about {label}" if self.count_is_estimate else label
+
+
+class LessonIndexView(IndexView):
+    paginator_class = EstimatedCountPaginator
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page_obj = context["page_obj"]
+        page_obj.object_list = list(page_obj.object_list)
+        attach_parents(page_obj.object_list)
+        context["object_list"] = page_obj.object_list
+        return context
+
+
+def attach_parents(pages):
+    """
+    Load the parents of ``pages`` in one query and cache them on the pages,
+    so that ``get_parent()`` (used by the copy button's permission check)
+    doesn't query once per row.
+    """
+    steplen = Page.steplen
+    parent_paths = {page.path[:-steplen] for page in pages if page.depth > 1}
+    parents = {parent.path: parent for parent in Page.objects.filter(path__in=parent_paths)}
+    for page in pages:
+        parent = parents.get(page.path[:-steplen])
+        if parent is not None:
+            page._cached_parent_obj = parent
@@ -0,0 +1,201 @@
+"""
+Read-only JSON API for live lessons.
+
+    GET /api/lessons/?domain=physics&tag=optics&fields=id,title,excerpt&cursor=...
+    GET /api/lessons/<id>/?fields=title,body
+
+Both endpoints read the lesson index (``LessonIndexEntry``), never the page
+tree. ``fields`` selects the fields returned, and only their columns are
+loaded. Listings can't ask for ``body``. Its JSON is stored at publish in
+``LessonApiBody`` (see porpoise_blocks/api.py) and is written into the
+detail response as stored, without being decoded.
+
+Listings are ordered by title and paginated with a signed keyset cursor, so
+page 500 costs the same as page 1 and no COUNT is issued. Detail responses
+carry an ETag derived from the stored data. A matching If-None-Match gets a
+304 without the body being read.
+"""
+import hashlib
+import json
+
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+from taggit.models import Tag
+
+from . import lesson_index
+from .models import LessonApiBody, LessonIndexEntry
+
+
+# API field -> LessonIndexEntry columns it needs.
+FIELDS = {
+    "id": ["page"],
+    "title": ["title"],
+    "subtitle": ["subtitle"],
+    "domain": ["domain"],
+    "tags": ["tag_ids"],
+    "url": ["url_path"],
+    "last_published_at": ["last_published_at"],
+    "toc": ["toc"],
+    "excerpt": ["excerpt"],
+    "word_count": ["word_count"],
+    "reading_time": ["reading_time"],
+    "body": [],
+}
+
+LIST_FIELDS = ("id", "title", "subtitle", "domain", "tags", "url")
+DETAIL_FIELDS = tuple(FIELDS)
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+CURSOR_SALT = "home.api.cursor"
+
+
+class BadRequest(Exception):
+    pass
+
+
+def error(message, status=400):
+    return JsonResponse({"error": message}, status=status)
+
+
+def requested_fields(request, default):
+    value = request.GET.get("fields")
+    if not value:
+        return list(default)
+    fields = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}.")
+    return fields
+
+
+def columns(fields):
+    # The ordering columns are always needed for cursors.
+    needed = {"page", "title"}
+    for name in fields:
+        needed.update(FIELDS[name])
+    return sorted(needed)
+
+
+def tags_by_id(entries):
+    tag_ids = {tag_id for entry in entries for tag_id in entry.tag_ids}
+    if not tag_ids:
+        return {}
+    return {
+        tag["id"]: tag for tag in Tag.objects.filter(pk__in=tag_ids).values("id", "name", "slug")
+    }
+
+
+def entry_data(entry, fields, tags, request):
+    """The requested fields of ``entry``, except ``body``."""
+    data = {}
+    for name in fields:
+        if name == "id":
+            data["id"] = entry.page_id
+        elif name == "tags":
+            data["tags"] = [tags[tag_id] for tag_id in entry.tag_ids if tag_id in tags]
+        elif name == "url":
+            data["url"] = lesson_index.entry_url(entry, request)
+        elif name != "body":
+            data[name] = getattr(entry, name)
+    return data
+
+
+def encode_cursor(entry):
+    return signing.dumps([entry.title, entry.page_id], salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor):
+    try:
+        title, page_id = signing.loads(cursor, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise BadRequest("Invalid cursor.")
+    return title, page_id
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get("limit", PAGE_SIZE))
+    except ValueError:
+        raise BadRequest("limit must be a number.")
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+@require_safe
+def lesson_list(request):
+    try:
+        fields = requested_fields(request, LIST_FIELDS)
+        if "body" in fields:
+            raise BadRequest("body is only available from the detail endpoint.")
+        limit = page_size(request)
+        cursor = request.GET.get("cursor")
+        after = decode_cursor(cursor) if cursor else None
+    except BadRequest as exc:
+        return error(str(exc))
+
+    domain = request.GET.get("domain") or None
+    tag_id = None
+    if request.GET.get("tag"):
+        tag_id = Tag.objects.filter(slug=request.GET["tag"]).values_list("pk", flat=True).first()
+        if tag_id is None:
+            return JsonResponse({"results": [], "next": None})
+
+    entries = lesson_index.filter_entries(domain, tag_id).only(*columns(fields))
+    if after is not None:
+        title, page_id = after
+        entries = entries.filter(Q(title__gt=title) | Q(title=title, pk__gt=page_id))
+    entries = list(entries[:limit + 1])
+
+    next_url = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        query = request.GET.copy()
+        query["cursor"] = encode_cursor(entries[-1])
+        next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+    tags = tags_by_id(entries) if "tags" in fields else {}
+    return JsonResponse({
+        "results": [entry_data(entry, fields, tags, request) for entry in entries],
+        "next": next_url,
+    })
+
+
+@require_safe
+def lesson_detail(request, page_id):
+    try:
+        fields = requested_fields(request, DETAIL_FIELDS)
+    except BadRequest as exc:
+        return error(str(exc))
+
+    entries = LessonIndexEntry.objects.filter(page_id=page_id).only(*columns(fields))
+    if "body" in fields:
+        # Only the digest: the body itself is read once the ETag didn't match.
+        entries = entries.annotate(body_digest=F("api_body__digest"))
+    entry = entries.first()
+    if entry is None:
+        return error("Not found.", status=404)
+    data = entry_data(entry, fields, tags_by_id([entry]) if "tags" in fields else {}, request)
+    metadata = json.dumps(data, cls=DjangoJSONEncoder)
+
+    digest = getattr(entry, "body_digest", None)
+    etag = '"%s"' % hashlib.sha256(f"{metadata}|{digest}".encode("utf-8")).hexdigest()
+
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified["ETag"] = etag
+        return not_modified
+
+    content = metadata
+    if "body" in fields:
+        blocks = LessonApiBody.objects.filter(pk=page_id).values_list("blocks", flat=True).first()
+        # The stored body is already JSON: splice it in rather than decoding it.
+        separator = ", " if data else ""
+        content = f'{metadata[:-1]}{separator}"body": {blocks or "[]"}}}'
+    response = HttpResponse(content, content_type="application/json")
+    response["ETag"] = etag
+    return response
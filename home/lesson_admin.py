@@ -0,0 +1,46 @@
+"""
+The Lessons listing in the Wagtail admin, registered from home/wagtail_hooks.py.
+"""
+from django.contrib import admin
+from wagtail_modeladmin.options import (
+    ModelAdmin, modeladmin_register
+)
+
+from .admin_listing import EstimatedCountQuerySet, LessonIndexView, LessonSearchHandler
+from .models import LessonPage
+
+
+class LessonPageAdmin(ModelAdmin):
+    model = LessonPage
+    menu_label = "Lessons"
+    menu_icon = "doc-full"  # You can pick from https://docs.wagtail.org/en/stable/topics/icons.html
+    menu_order = 200
+    add_to_settings_menu = False
+    exclude_from_explorer = False
+    list_display = ("title", "subtitle", "domain", "tag_names")
+    # Prefix-matched, plus exact tag names; see home/admin_listing.py.
+    search_fields = ("title", "subtitle", "domain")
+    search_handler_class = LessonSearchHandler
+    index_view_class = LessonIndexView
+
+    def get_queryset(self, request):
+        # ModelAdmin.get_queryset, from an EstimatedCountQuerySet ordered like
+        # the default manager's: IndexView counts the listing with count().
+        queryset = EstimatedCountQuerySet(self.model).order_by("path").exclude(depth=1)
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return (
+            queryset
+            .defer_streamfields()
+            .prefetch_related("tagged_items__tag")
+            .prefetch_workflow_states()
+            .annotate_approved_schedule()
+        )
+
+    @admin.display(description="Tags")
+    def tag_names(self, obj):
+        return ", ".join(sorted(item.tag.name for item in obj.tagged_items.all()))
+
+
+modeladmin_register(LessonPageAdmin)
@@ -0,0 +1,135 @@
+"""
+Streaming export of LessonPages for ``manage.py export_lessons``.
+
+Lessons are read in primary-key chunks (a server-side cursor where the
+database supports one) with their tags prefetched per chunk, and each chunk
+is written out before the next is read, so memory use doesn't grow with the
+number of lessons. The writers produce NDJSON, or Parquet when pyarrow is
+installed.
+
+Rendering bodies to HTML is the expensive part; ``render_rows`` can spread it
+over a process pool.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from porpoise_blocks.latex import load_latex_renderings
+from porpoise_blocks.render_cache import render_stream
+
+from .models import LessonPage
+
+
+FIELDS = (
+    "id", "title", "slug", "subtitle", "domain", "url_path", "live",
+    "first_published_at", "last_published_at", "live_revision", "body",
+)
+
+
+def lesson_chunks(since=None, chunk_size=500):
+    """Yield lists of export rows (dicts), ``chunk_size`` lessons at a time."""
+    pages = (
+        LessonPage.objects.only(*FIELDS)
+        .prefetch_related("tagged_items__tag")
+        .order_by("pk")
+    )
+    if since is not None:
+        pages = pages.filter(last_published_at__gte=since)
+
+    chunk = []
+    for page in pages.iterator(chunk_size=chunk_size):
+        chunk.append(lesson_row(page))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def lesson_row(page):
+    return {
+        "id": page.pk,
+        "title": page.title,
+        "slug": page.slug,
+        "subtitle": page.subtitle,
+        "domain": page.domain,
+        "url_path": page.url_path,
+        "live": page.live,
+        "first_published_at": page.first_published_at,
+        "last_published_at": page.last_published_at,
+        "live_revision_id": page.live_revision_id,
+        "tags": sorted(item.tag.name for item in page.tagged_items.all()),
+        "body": list(page.body.raw_data),
+    }
+
+
+def render_row_html(row):
+    """
+    Body HTML for an export row, as served (with typeset LaTeX). Takes and
+    returns plain data so it can run in a worker process.
+    """
+    body = LessonPage._meta.get_field("body").to_python(row["body"])
+    return str(render_stream(body, prerendered=load_latex_renderings(row["live_revision_id"])))
+
+
+def render_rows(rows, pool=None):
+    """Add an "html" key to each row, using ``pool.map`` when given."""
+    mapper = pool.map if pool is not None else map
+    for row, html in zip(rows, mapper(render_row_html, rows)):
+        row["html"] = html
+    return rows
+
+
+class NdjsonWriter:
+    def __init__(self, stream, close_stream=False):
+        self.stream = stream
+        self.close_stream = close_stream
+
+    def write(self, rows):
+        for row in rows:
+            self.stream.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+
+    def close(self):
+        if self.close_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+class ParquetWriter:
+    """One row group per chunk; body is stored as a JSON string column."""
+
+    def __init__(self, path, with_html):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        columns = [
+            ("id", pa.int64()),
+            ("title", pa.string()),
+            ("slug", pa.string()),
+            ("subtitle", pa.string()),
+            ("domain", pa.string()),
+            ("url_path", pa.string()),
+            ("live", pa.bool_()),
+            ("first_published_at", pa.timestamp("us", tz="UTC")),
+            ("last_published_at", pa.timestamp("us", tz="UTC")),
+            ("live_revision_id", pa.int64()),
+            ("tags", pa.list_(pa.string())),
+            ("body", pa.string()),
+        ]
+        if with_html:
+            columns.append(("html", pa.string()))
+        self.schema = pa.schema(columns)
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        data = {name: [] for name in self.schema.names}
+        for row in rows:
+            for name in self.schema.names:
+                value = row[name]
+                data[name].append(json.dumps(value) if name == "body" else value)
+        self.writer.write_table(self.pa.table(data, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
@@ -0,0 +1,204 @@
+"""
+Bulk creation of published LessonPages from plain dicts (the NDJSON read by
+``manage.py import_lessons``).
+
+``parent.add_child(instance=...)`` followed by ``save_revision().publish()``
+issues a few dozen queries per lesson: treebeard path lookups, the page and
+revision rows, the publish bookkeeping and every publish signal handler.
+``import_batch`` instead writes a whole batch with a fixed number of
+statements, plus one insert per lesson into LessonPage's own table. Tree
+paths are precomputed from the parent's last child, and pages, revisions,
+tags and lesson index rows are written with bulk inserts.
+
+Publish signals are not sent. The work their handlers do is either done here
+in bulk (lesson index, search index) or left for later: run
+``manage.py prerender_latex`` after a large import. Code blocks are
+highlighted when rendered, and stored once the lesson is published again.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.text import slugify
+from taggit.models import Tag
+from treebeard.exceptions import PathOverflow
+from wagtail.models import Page, Revision
+from wagtail.search.backends import get_search_backends
+
+from . import lesson_index
+from .models import LessonPage, LessonPageTag
+
+
+class LessonImportError(ValueError):
+    pass
+
+
+def clean_body(raw_body):
+    """
+    Raw StreamField JSON for ``raw_body``: a list of {"type", "value"} dicts
+    or [type, value] pairs, using the block types of ``LessonPage.body``.
+    The body is validated as the page editor would.
+    """
+    stream_block = LessonPage._meta.get_field("body").stream_block
+    block_types = stream_block.child_blocks
+    items = []
+    for item in raw_body or []:
+        if isinstance(item, dict):
+            block_type, value = item.get("type"), item.get("value")
+        elif isinstance(item, (list, tuple)) and len(item) == 2:
+            block_type, value = item
+        else:
+            raise LessonImportError(f"Invalid body block: {item!r}")
+        if block_type not in block_types:
+            raise LessonImportError(f"Unknown block type: {block_type!r}")
+        items.append({"type": block_type, "value": value})
+    try:
+        stream_block.clean(stream_block.to_python(items))
+    except ValidationError as error:
+        raise LessonImportError(f"Invalid body: {'; '.join(error.messages)}") from error
+    return items
+
+
+class TreeSlots:
+    """
+    Hands out treebeard paths and unique slugs for new children of ``parent``
+    without a query per child. ``refresh`` re-reads the children, for use once
+    the parent is locked.
+    """
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.depth = parent.depth + 1
+        self.numconv = Page.numconv_obj()
+        self.refresh()
+
+    def refresh(self):
+        # Queried rather than get_last_child(), which trusts the parent's
+        # numchild as loaded.
+        children = Page.objects.child_of(self.parent).values_list("path", "slug")
+        paths = [path for path, _ in children]
+        self.last_step = self.numconv.str2int(max(paths)[-Page.steplen:]) if paths else 0
+        self.slugs = {slug for _, slug in children}
+
+    def next_path(self):
+        self.last_step += 1
+        step = self.numconv.int2str(self.last_step)
+        if len(step) > Page.steplen:
+            raise PathOverflow(f"Too many children under {self.parent.url_path}")
+        return self.parent.path + step.rjust(Page.steplen, Page.alphabet[0])
+
+    def claim_slug(self, wanted):
+        slug = base = wanted or "lesson"
+        suffix = 1
+        while slug in self.slugs:
+            suffix += 1
+            slug = f"{base}-{suffix}"
+        self.slugs.add(slug)
+        return slug
+
+
+class TagResolver:
+    """Tag names -> ids, creating missing tags; remembered across batches."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def resolve(self, names):
+        missing = {name for name in names if name not in self.ids}
+        if missing:
+            self.ids.update(
+                Tag.objects.filter(name__in=missing).values_list("name", "pk")
+            )
+            for name in missing - self.ids.keys():
+                # One at a time: taggit makes clashing slugs unique on save.
+                self.ids[name] = Tag.objects.create(name=name).pk
+        return [self.ids[name] for name in names]
+
+
+def build_lesson(data, slots):
+    title = (data.get("title") or "").strip()
+    if not title:
+        raise LessonImportError("Lesson has no title")
+    if not data.get("domain"):
+        raise LessonImportError(f"Lesson {title!r} has no domain")
+    slug = slots.claim_slug(slugify(data.get("slug") or title))
+    return LessonPage(
+        title=title,
+        draft_title=title,
+        slug=slug,
+        subtitle=data.get("subtitle") or "",
+        domain=data["domain"],
+        body=clean_body(data.get("body")),
+        path=slots.next_path(),
+        depth=slots.depth,
+        numchild=0,
+        url_path=f"{slots.parent.url_path}{slug}/",
+        locale_id=slots.parent.locale_id,
+        live=True,
+        has_unpublished_changes=False,
+    )
+
+
+def _insert_pages(lessons):
+    # bulk_create refuses multi-table children, so bulk insert the Page rows,
+    # then insert each LessonPage row alone, as loaddata does (a raw save
+    # skips the parent table).
+    Page.objects.bulk_create(lessons)
+    for lesson in lessons:
+        lesson.page_ptr_id = lesson.id
+        lesson.save_base(raw=True, force_insert=True)
+
+
+@transaction.atomic
+def import_batch(parent, rows, slots, tags, index_search=True):
+    """
+    Create and publish one LessonPage per dict in ``rows`` under ``parent``.
+    Returns the new pages.
+    """
+    # Lock the parent, then read its children: pages added since the last
+    # batch, by an editor or another import, keep their paths and slugs.
+    Page.objects.select_for_update().filter(pk=parent.pk).first()
+    slots.refresh()
+
+    now = timezone.now()
+    lessons = [build_lesson(row, slots) for row in rows]
+    for lesson in lessons:
+        lesson.first_published_at = lesson.last_published_at = now
+        lesson.latest_revision_created_at = now
+    _insert_pages(lessons)
+    Page.objects.filter(pk=parent.pk).update(numchild=F("numchild") + len(lessons))
+
+    tag_rows = []
+    for lesson, row in zip(lessons, rows):
+        lesson.tagged_items = [
+            LessonPageTag(content_object=lesson, tag_id=tag_id)
+            for tag_id in tags.resolve(list(dict.fromkeys(row.get("tags") or [])))
+        ]
+        tag_rows.extend(lesson.tagged_items.all())
+    LessonPageTag.objects.bulk_create(tag_rows)
+
+    content_type = ContentType.objects.get_for_model(LessonPage)
+    base_content_type = ContentType.objects.get_for_model(Page)
+    revisions = Revision.objects.bulk_create(
+        [
+            Revision(
+                content_type=content_type,
+                base_content_type=base_content_type,
+                object_id=str(lesson.pk),
+                created_at=now,
+                object_str=lesson.title,
+                content=lesson.serializable_data(),
+            )
+            for lesson in lessons
+        ]
+    )
+    for lesson, revision in zip(lessons, revisions):
+        lesson.latest_revision = lesson.live_revision = revision
+    Page.objects.bulk_update(lessons, ["latest_revision", "live_revision"])
+
+    lesson_index.index_lessons(lessons)
+    if index_search:
+        for backend in get_search_backends():
+            backend.add_bulk(LessonPage, lessons)
+    return lessons
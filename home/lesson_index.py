@@ -0,0 +1,233 @@
+"""
+Maintenance and queries for the denormalized lesson index
+(``LessonIndexEntry`` / ``LessonIndexTag``).
+
+Rows are written incrementally from home/signals.py: on publish, unpublish,
+delete, move and tag changes. Publishing also stores the body as the
+lessons API serves it (``LessonApiBody``, see home/api.py), and it is stored
+again once the LaTeX of the live revision is typeset.
+``manage.py rebuild_lesson_index`` repopulates the whole table. Listing and
+facet views use only the query helpers at the bottom of this module, never
+the page tree.
+"""
+import hashlib
+import json
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count
+from wagtail.models import Page, Site
+
+from porpoise_blocks.api import serialize_stream
+from porpoise_blocks.latex import load_latex_renderings_many
+from porpoise_blocks.summary import summarize_stream
+
+from .models import LessonApiBody, LessonIndexEntry, LessonIndexTag, LessonPage, LessonPageTag
+
+
+LISTING_FIELDS = (
+    "id", "title", "subtitle", "domain", "url_path", "last_published_at", "live",
+)
+
+SUMMARY_FIELDS = ("toc", "excerpt", "word_count", "reading_time")
+
+
+def _tag_ids_by_page(page_ids):
+    tag_ids = defaultdict(list)
+    rows = LessonPageTag.objects.filter(content_object_id__in=page_ids).values_list(
+        "content_object_id", "tag_id"
+    )
+    for page_id, tag_id in rows.order_by("tag_id"):
+        tag_ids[page_id].append(tag_id)
+    return tag_ids
+
+
+@transaction.atomic
+def index_lessons(pages):
+    """
+    Write index rows for ``pages`` (LessonPage instances, with their body):
+    live pages are upserted and pages that are not live are removed. Costs
+    a fixed number of queries however many pages are passed in.
+    """
+    pages = list(pages)
+    live = [page for page in pages if page.live]
+    remove_lessons([page.pk for page in pages if not page.live])
+    if not live:
+        return 0
+
+    tag_ids = _tag_ids_by_page([page.pk for page in live])
+    entries = [
+        LessonIndexEntry(
+            page_id=page.pk,
+            title=page.title,
+            subtitle=page.subtitle,
+            domain=page.domain,
+            url_path=page.url_path,
+            tag_ids=tag_ids.get(page.pk, []),
+            last_published_at=page.last_published_at,
+            **summarize_stream(page.body),
+        )
+        for page in live
+    ]
+    LessonIndexEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=["page"],
+        update_fields=[
+            "title", "subtitle", "domain", "url_path", "tag_ids", "last_published_at",
+            *SUMMARY_FIELDS,
+        ],
+    )
+    _replace_tag_rows(entries)
+    _store_api_bodies(live)
+    return len(entries)
+
+
+def _replace_tag_rows(entries):
+    LessonIndexTag.objects.filter(entry_id__in=[entry.pk for entry in entries]).delete()
+    LessonIndexTag.objects.bulk_create(
+        [
+            LessonIndexTag(entry_id=entry.pk, tag_id=tag_id, domain=entry.domain)
+            for entry in entries
+            for tag_id in entry.tag_ids
+        ],
+        batch_size=1000,
+    )
+
+
+def _store_api_bodies(pages):
+    """Serialize each page's body for the lessons API (see porpoise_blocks/api.py)."""
+    renderings = load_latex_renderings_many({page.live_revision_id for page in pages})
+    rows = []
+    for page in pages:
+        blocks = json.dumps(
+            serialize_stream(page.body, prerendered=renderings.get(page.live_revision_id)),
+            cls=DjangoJSONEncoder,
+            separators=(",", ":"),
+        )
+        rows.append(LessonApiBody(
+            entry_id=page.pk,
+            blocks=blocks,
+            digest=hashlib.sha256(blocks.encode("utf-8")).hexdigest(),
+        ))
+    LessonApiBody.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["entry"],
+        update_fields=["blocks", "digest"],
+    )
+
+
+def refresh_api_body(revision):
+    """Store the API body of an indexed lesson again if ``revision`` is live."""
+    page = LessonPage.objects.filter(
+        pk=revision.object_id,
+        live=True,
+        live_revision_id=revision.pk,
+        pk__in=LessonIndexEntry.objects.values("page_id"),
+    ).first()
+    if page is not None:
+        _store_api_bodies([page])
+
+
+def remove_lessons(page_ids):
+    if page_ids:
+        LessonIndexEntry.objects.filter(page_id__in=page_ids).delete()
+
+
+@transaction.atomic
+def refresh_tags(page_id):
+    """Re-read one lesson's tags (after a tag change outside of publishing)."""
+    entry = LessonIndexEntry.objects.filter(page_id=page_id).first()
+    if entry is None:
+        return
+    entry.tag_ids = _tag_ids_by_page([page_id]).get(page_id, [])
+    entry.save(update_fields=["tag_ids"])
+    _replace_tag_rows([entry])
+
+
+def refresh_url_paths(page):
+    """Update url_path for indexed lessons at or below ``page`` after a move."""
+    moved = Page.objects.descendant_of(page, inclusive=True).filter(
+        pk__in=LessonIndexEntry.objects.values("page_id")
+    )
+    entries = [
+        LessonIndexEntry(page_id=pk, url_path=url_path)
+        for pk, url_path in moved.values_list("pk", "url_path")
+    ]
+    LessonIndexEntry.objects.bulk_update(entries, ["url_path"], batch_size=500)
+
+
+@transaction.atomic
+def rebuild(chunk_size=2000):
+    """Repopulate the whole index from the live LessonPages; returns the row count."""
+    LessonIndexEntry.objects.all().delete()
+    pages = LessonPage.objects.live().only(*LISTING_FIELDS, "live_revision", "body").order_by("pk")
+    total = 0
+    batch = []
+    for page in pages.iterator(chunk_size=chunk_size):
+        batch.append(page)
+        if len(batch) >= chunk_size:
+            total += index_lessons(batch)
+            batch = []
+    if batch:
+        total += index_lessons(batch)
+    return total
+
+
+# Queries
+
+
+def filter_entries(domain=None, tag_id=None):
+    entries = LessonIndexEntry.objects.all()
+    if tag_id is not None:
+        tag_rows = LessonIndexTag.objects.filter(tag_id=tag_id)
+        if domain:
+            tag_rows = tag_rows.filter(domain=domain)
+        entries = entries.filter(pk__in=tag_rows.values("entry_id"))
+    elif domain:
+        entries = entries.filter(domain=domain)
+    return entries.order_by("title", "pk")
+
+
+def domain_counts(tag_id=None):
+    """[(domain, count)] for lessons carrying ``tag_id`` (or all lessons)."""
+    if tag_id is not None:
+        rows = LessonIndexTag.objects.filter(tag_id=tag_id)
+        counted = rows.values("domain").annotate(count=Count("entry_id"))
+    else:
+        counted = LessonIndexEntry.objects.values("domain").annotate(count=Count("pk"))
+    return [(row["domain"], row["count"]) for row in counted.order_by("-count", "domain")]
+
+
+def tag_counts(domain=None, limit=50):
+    """[(tag_id, name, slug, count)] for lessons in ``domain`` (or all lessons)."""
+    rows = LessonIndexTag.objects.all()
+    if domain:
+        rows = rows.filter(domain=domain)
+    counted = (
+        rows.values("tag_id", "tag__name", "tag__slug")
+        .annotate(count=Count("entry_id"))
+        .order_by("-count", "tag__name")[:limit]
+    )
+    return [
+        (row["tag_id"], row["tag__name"], row["tag__slug"], row["count"])
+        for row in counted
+    ]
+
+
+def entry_url(entry, request=None):
+    """
+    The public URL of an index entry, resolved from its url_path the same way
+    Page.get_url does (relative when it belongs to the current site).
+    """
+    root_paths = Site.get_site_root_paths()
+    current_site = Site.find_for_request(request) if request is not None else None
+    for site_id, root_path, root_url, _ in root_paths:
+        if entry.url_path.startswith(root_path):
+            path = entry.url_path[len(root_path) - 1:]
+            if len(root_paths) == 1 or (current_site and current_site.pk == site_id):
+                return path
+            return root_url + path
+    return None
@@ -0,0 +1,49 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from porpoise_blocks.renditions import pregenerate_renditions, stream_image_ids
+
+from home.models import LessonPage
+
+
+class Command(BaseCommand):
+    help = "Generate the responsive renditions of every image in a live lesson that misses one."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes generating renditions in parallel (default: CPU count).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=200,
+            help="Images checked and generated per batch.",
+        )
+
+    def handle(self, *args, **options):
+        # Pass 1: collect the images of each live lesson without loading them.
+        image_ids = set()
+        pages = LessonPage.objects.live().only("id", "body")
+        for page in pages.iterator(chunk_size=200):
+            image_ids |= stream_image_ids(page.body)
+
+        self.stdout.write(f"{len(image_ids)} images in live lessons")
+
+        # Pass 2: generate what's missing, a batch at a time.
+        ordered = sorted(image_ids)
+        chunk_size = options["chunk_size"]
+        images = created = failed = 0
+        for start in range(0, len(ordered), chunk_size):
+            chunk = ordered[start:start + chunk_size]
+            done = pregenerate_renditions(chunk, processes=options["processes"])
+            images, created, failed = images + done[0], created + done[1], failed + done[2]
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {created} renditions for {images} images ({failed} failed)"
+            )
+        )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from home import revisions
+from home.models import LessonPage
+
+
+class Command(BaseCommand):
+    help = (
+        "Store older LessonPage revisions as deltas and delete expired ones, "
+        "following LESSON_REVISION_RETENTION."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page",
+            type=int,
+            action="append",
+            dest="page_ids",
+            help="Only this lesson (repeatable).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be compacted and deleted without changing anything.",
+        )
+
+    def handle(self, *args, **options):
+        policy = revisions.get_policy()
+        pages = LessonPage.objects.only("id", "latest_revision", "live_revision").order_by("pk")
+        if options["page_ids"]:
+            pages = pages.filter(pk__in=options["page_ids"])
+
+        # One transaction per lesson, so editing goes on while this runs.
+        totals = {"compacted": 0, "full_size": 0, "stored_size": 0, "deleted": 0}
+        for page in pages.iterator(chunk_size=200):
+            stats = revisions.compact_page(page, policy=policy, dry_run=options["dry_run"])
+            for key, value in stats.items():
+                totals[key] += value
+
+        if options["dry_run"]:
+            compacted, deleted = "Would compact", "would delete"
+        else:
+            compacted, deleted = "Compacted", "deleted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{compacted} {totals['compacted']} revisions "
+                f"({totals['full_size']} -> {totals['stored_size']} bytes), "
+                f"{deleted} {totals['deleted']}"
+            )
+        )
@@ -0,0 +1,90 @@
+import datetime
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from home.lesson_export import NdjsonWriter, ParquetWriter, lesson_chunks, render_rows
+from porpoise_blocks.worker_pool import fork_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Export lessons (metadata, tags, raw StreamField JSON and optionally "
+        "rendered HTML) as NDJSON, or Parquet when pyarrow is installed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='File to write, or "-" for stdout (NDJSON only).')
+        parser.add_argument("--format", choices=["ndjson", "parquet"], default="ndjson")
+        parser.add_argument(
+            "--since",
+            help="Only lessons with last_published_at at or after this ISO date/datetime.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--html", action="store_true", help="Include the rendered body HTML."
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Render HTML in this many worker processes (with --html).",
+        )
+
+    def handle(self, *args, **options):
+        since = self.parse_since(options["since"])
+        writer = self.get_writer(options["path"], options["format"], options["html"])
+
+        pool = None
+        if options["html"] and options["processes"] > 1:
+            # Started before any query, so workers open their own connections.
+            pool = fork_pool(options["processes"])
+
+        total = 0
+        started = time.perf_counter()
+        try:
+            for rows in lesson_chunks(since=since, chunk_size=options["chunk_size"]):
+                if options["html"]:
+                    render_rows(rows, pool)
+                writer.write(rows)
+                total += len(rows)
+        finally:
+            writer.close()
+            if pool is not None:
+                pool.shutdown()
+
+        elapsed = time.perf_counter() - started
+        # Keep stdout clean when the export itself goes there.
+        report = self.stderr if options["path"] == "-" else self.stdout
+        report.write(
+            self.style.SUCCESS(f"Exported {total} lessons in {elapsed:.1f}s")
+        )
+
+    def parse_since(self, value):
+        if not value:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"--since: not an ISO date or datetime: {value!r}")
+            since = datetime.datetime.combine(day, datetime.time.min)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def get_writer(self, path, format, with_html):
+        if format == "ndjson":
+            if path == "-":
+                return NdjsonWriter(sys.stdout)
+            return NdjsonWriter(open(path, "w", encoding="utf-8"), close_stream=True)
+
+        if path == "-":
+            raise CommandError("Parquet output needs a file path")
+        try:
+            return ParquetWriter(path, with_html)
+        except ImportError:
+            raise CommandError("Parquet output needs pyarrow (pip install pyarrow)")
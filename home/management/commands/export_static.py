@@ -0,0 +1,49 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.static_export import export
+from porpoise_blocks.worker_pool import fork_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every live lesson and home page to static HTML under a directory. "
+        "Pages whose content and dependencies haven't changed since the last run are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output_dir", help="Directory to write the site to.")
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Render pages in this many worker processes (default: CPU count).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Render every page, e.g. after a deploy that changes how pages render.",
+        )
+
+    def handle(self, *args, **options):
+        pool = None
+        if options["processes"] > 1:
+            # Started before any query, so workers open their own connections.
+            pool = fork_pool(options["processes"])
+
+        started = time.perf_counter()
+        try:
+            counts = export(options["output_dir"], pool=pool, force=options["force"])
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported {counts['pages']} pages in {elapsed:.1f}s: {counts['rendered']} rendered, "
+                f"{counts['written']} written, {counts['removed']} removed"
+            )
+        )
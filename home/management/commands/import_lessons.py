@@ -0,0 +1,100 @@
+import json
+import sys
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.models import Page, Site
+
+from home.lesson_import import LessonImportError, TagResolver, TreeSlots, import_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Create published lessons from NDJSON: one object per line with title, "
+        "subtitle, domain, tags, slug (optional) and body (a list of "
+        '{"type": ..., "value": ...} blocks).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='NDJSON file to read, or "-" for stdin.')
+        parser.add_argument(
+            "--parent",
+            type=int,
+            help="Id of the page to add lessons under (default: the default site's root page).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--skip-search-index",
+            action="store_true",
+            help="Don't update the search index (run update_index afterwards).",
+        )
+
+    def handle(self, *args, **options):
+        parent = self.get_parent(options["parent"])
+        stream = sys.stdin if options["path"] == "-" else open(options["path"], encoding="utf-8")
+
+        slots = TreeSlots(parent)
+        tags = TagResolver()
+        total = 0
+        started = time.perf_counter()
+        try:
+            rows = self.read_rows(stream)
+            while batch := list(islice(rows, options["batch_size"])):
+                batch_started = time.perf_counter()
+                try:
+                    import_batch(
+                        parent,
+                        [row for _, row in batch],
+                        slots,
+                        tags,
+                        index_search=not options["skip_search_index"],
+                    )
+                except LessonImportError as error:
+                    raise CommandError(
+                        f"Batch starting at line {batch[0][0]}: {error} "
+                        f"({total} lessons were imported before it)"
+                    )
+                total += len(batch)
+                if options["verbosity"] > 1:
+                    elapsed = time.perf_counter() - batch_started
+                    self.stdout.write(
+                        f"{total} lessons ({len(batch) / elapsed:.0f} lessons/s in this batch)"
+                    )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {total} lessons in {elapsed:.1f}s ({rate:.0f} lessons/s)"
+            )
+        )
+        if total:
+            self.stdout.write("Run `manage.py prerender_latex` to typeset their LaTeX blocks.")
+
+    def get_parent(self, page_id):
+        if page_id is None:
+            site = Site.objects.filter(is_default_site=True).first() or Site.objects.first()
+            if site is None:
+                raise CommandError("No site found; pass --parent")
+            return site.root_page
+        try:
+            return Page.objects.get(pk=page_id)
+        except Page.DoesNotExist:
+            raise CommandError(f"Page {page_id} does not exist")
+
+    def read_rows(self, stream):
+        """Yield (line number, dict) for each non-blank line."""
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                raise CommandError(f"Line {number}: invalid JSON ({error})")
+            if not isinstance(row, dict):
+                raise CommandError(f"Line {number}: expected an object")
+            yield number, row
@@ -0,0 +1,116 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from porpoise_blocks.latex import (
+    get_latex_renderer,
+    latex_children,
+    render_latex_sources,
+)
+from porpoise_blocks.models import LatexRendering
+from porpoise_blocks.render_cache import value_digest
+from porpoise_blocks.worker_pool import fork_pool
+
+from home.models import LessonPage
+
+
+class Command(BaseCommand):
+    help = "Typeset the LaTeX blocks of every live lesson's published revision."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Renderer processes to run in parallel (default: CPU count).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-render sources that already have a stored rendering.",
+        )
+
+    def handle(self, *args, **options):
+        renderer_name = get_latex_renderer().name
+
+        # Pass 1: collect the LaTeX of each live revision without rendering.
+        pending = []  # (revision_id, block, block_id, source)
+        pages = (
+            LessonPage.objects.live()
+            .exclude(live_revision=None)
+            .only("id", "live_revision_id", "body")
+        )
+        for page in pages.iterator(chunk_size=200):
+            for block, block_id, source in latex_children(page.body):
+                pending.append((page.live_revision_id, block, block_id, source))
+
+        if not options["force"]:
+            done = set(
+                LatexRendering.objects.filter(renderer=renderer_name).values_list(
+                    "revision_id", "block_id"
+                )
+            )
+            pending = [item for item in pending if (item[0], item[2]) not in done]
+
+        sources = {source for _, _, _, source in pending}
+        if not options["force"]:
+            known = dict(
+                LatexRendering.objects.filter(
+                    renderer=renderer_name,
+                    source_hash__in={value_digest(source) for source in sources},
+                ).values_list("source_hash", "html")
+            )
+        else:
+            known = {}
+        to_render = [source for source in sources if value_digest(source) not in known]
+
+        self.stdout.write(
+            f"{len(pending)} LaTeX blocks to store, {len(to_render)} unique sources to render"
+        )
+
+        # Pass 2: render unique sources, one batch per process.
+        if options["processes"] > 1 and len(to_render) > 1:
+            processes = min(options["processes"], len(to_render))
+            batches = [to_render[start::processes] for start in range(processes)]
+            with fork_pool(processes) as pool:
+                results = {}
+                for rendered in pool.map(render_latex_sources, batches):
+                    results.update(rendered)
+        else:
+            results = render_latex_sources(to_render)
+
+        # Pass 3: wrap in the block template and store against each revision.
+        markup_by_digest = dict(known)
+        rows = []
+        failed = 0
+        for revision_id, block, block_id, source in pending:
+            digest = value_digest(source)
+            if digest not in markup_by_digest:
+                markup = results.get(source)
+                if markup is None:
+                    failed += 1
+                    continue
+                markup_by_digest[digest] = block.render_prerendered(source, markup)
+            rows.append(
+                LatexRendering(
+                    revision_id=revision_id,
+                    block_id=block_id,
+                    source_hash=digest,
+                    renderer=renderer_name,
+                    html=markup_by_digest[digest],
+                )
+            )
+
+        # Replace anything stored for these revisions by another renderer
+        # (or by this one, with --force) before inserting the new rows.
+        stale = LatexRendering.objects.filter(
+            revision_id__in={row.revision_id for row in rows}
+        )
+        if not options["force"]:
+            stale = stale.exclude(renderer=renderer_name)
+        stale.delete()
+        LatexRendering.objects.bulk_create(rows, batch_size=500)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Stored {len(rows)} renderings ({failed} failed)")
+        )
@@ -0,0 +1,158 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+STAGE_MARKER = "profile_imports:stage"
+
+# Run with -X importtime in a fresh interpreter, so nothing is imported yet.
+PROBE = f"""
+import importlib, sys, time
+
+def stage(name):
+    sys.stderr.write(f"{STAGE_MARKER} {{name}} {{time.perf_counter()}}\\n")
+
+stage("settings")
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+stage("apps")
+django.setup()
+stage("urls")
+importlib.import_module(settings.ROOT_URLCONF)
+stage("hooks")
+from wagtail import hooks
+hooks.search_for_hooks()
+stage("end")
+"""
+
+# The interpreter's own imports come before the first marker.
+FIRST_STAGE = "interpreter"
+
+
+def parse_importtime(lines):
+    """
+    Turn ``-X importtime`` output interleaved with stage markers into
+    ``(imports, stage_seconds)``. Each import is a dict with the module name,
+    its own and cumulative import time in microseconds and the stage it was
+    imported in.
+    """
+    imports, marks = [], []
+    stage = FIRST_STAGE
+    for line in lines:
+        if line.startswith(STAGE_MARKER):
+            _, name, timestamp = line.split()
+            marks.append((name, float(timestamp)))
+            stage = name
+            continue
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, module = line[len("import time:"):].split("|", 2)
+        if not own.strip().isdigit():
+            continue  # the header
+        imports.append({
+            "module": module.strip(),
+            "self_us": int(own),
+            "cumulative_us": int(cumulative),
+            "stage": stage,
+        })
+    stage_seconds = {
+        name: end - start
+        for (name, start), (_, end) in zip(marks, marks[1:])
+    }
+    return imports, stage_seconds
+
+
+def group_name(module, depth):
+    return ".".join(module.split(".")[:depth])
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the settings, the apps, the URLconf and the Wagtail hooks in a fresh "
+        "interpreter with -X importtime, and report the modules that cost the most. "
+        "Use --settings to profile another settings module."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=25, help="Rows per table.")
+        parser.add_argument(
+            "--sort",
+            choices=["self", "cumulative"],
+            default="self",
+            help="Rank modules by their own import time or including what they import.",
+        )
+        parser.add_argument(
+            "--depth",
+            type=int,
+            default=2,
+            help="Dotted components to group packages by (2: wagtail.admin, django.contrib).",
+        )
+        parser.add_argument("--json", action="store_true", help="Print everything as JSON.")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE],
+            env=env,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Importing {settings.SETTINGS_MODULE} failed:\n{result.stderr[-2000:]}")
+
+        imports, stage_seconds = parse_importtime(result.stderr.splitlines())
+        stages = defaultdict(lambda: {"modules": 0, "self_us": 0})
+        packages = defaultdict(lambda: {"modules": 0, "self_us": 0})
+        for record in imports:
+            for bucket in (stages[record["stage"]], packages[group_name(record["module"], options["depth"])]):
+                bucket["modules"] += 1
+                bucket["self_us"] += record["self_us"]
+        for name, seconds in stage_seconds.items():
+            stages[name]["wall_ms"] = seconds * 1000
+
+        key = "self_us" if options["sort"] == "self" else "cumulative_us"
+        top_modules = sorted(imports, key=lambda record: record[key], reverse=True)[: options["limit"]]
+        top_packages = sorted(packages.items(), key=lambda item: item[1]["self_us"], reverse=True)[
+            : options["limit"]
+        ]
+
+        if options["json"]:
+            self.stdout.write(json.dumps({
+                "settings": settings.SETTINGS_MODULE,
+                "modules": len(imports),
+                "stages": stages,
+                "top_modules": top_modules,
+                "top_packages": dict(top_packages),
+            }, indent=2))
+            return
+
+        self.stdout.write(f"{settings.SETTINGS_MODULE}: {len(imports)} modules imported")
+        self.stdout.write("")
+        self.stdout.write(f"{'stage':<12} {'modules':>8} {'import ms':>10} {'wall ms':>9}")
+        for name, bucket in stages.items():
+            wall = f"{bucket['wall_ms']:.0f}" if "wall_ms" in bucket else "-"
+            self.stdout.write(
+                f"{name:<12} {bucket['modules']:>8} {bucket['self_us'] / 1000:>10.1f} {wall:>9}"
+            )
+
+        self.stdout.write("")
+        self.stdout.write(f"Top modules by {options['sort']} time:")
+        self.stdout.write(f"{'self ms':>9} {'cumul ms':>9}  {'stage':<10} module")
+        for record in top_modules:
+            self.stdout.write(
+                f"{record['self_us'] / 1000:>9.1f} {record['cumulative_us'] / 1000:>9.1f}  "
+                f"{record['stage']:<10} {record['module']}"
+            )
+
+        self.stdout.write("")
+        self.stdout.write("Top packages by self time:")
+        self.stdout.write(f"{'self ms':>9} {'modules':>8}  package")
+        for name, bucket in top_packages:
+            self.stdout.write(f"{bucket['self_us'] / 1000:>9.1f} {bucket['modules']:>8}  {name}")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from home import lesson_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized lesson index and the lessons API bodies from the live LessonPages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = lesson_index.rebuild(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} lessons"))
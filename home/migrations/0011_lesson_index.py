@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0010_alter_lessonpage_body'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonIndexEntry',
+            fields=[
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='index_entry', serialize=False, to='home.lessonpage')),
+                ('title', models.CharField(max_length=255)),
+                ('subtitle', models.CharField(blank=True, max_length=255)),
+                ('domain', models.CharField(max_length=100)),
+                ('url_path', models.TextField()),
+                ('tag_ids', models.JSONField(blank=True, default=list)),
+                ('last_published_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['domain', 'title'], name='lesson_index_domain_title'), models.Index(fields=['title'], name='lesson_index_title')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LessonIndexTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('domain', models.CharField(max_length=100)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_rows', to='home.lessonindexentry')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taggit.tag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', 'domain', 'entry'], name='lesson_index_tag_domain'), models.Index(fields=['domain', 'tag'], name='lesson_index_domain_tag')],
+                'constraints': [models.UniqueConstraint(fields=('tag', 'entry'), name='unique_lesson_index_tag')],
+            },
+        ),
+    ]
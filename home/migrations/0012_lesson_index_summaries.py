@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0011_lesson_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lessonindexentry',
+            name='excerpt',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='lessonindexentry',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='lessonindexentry',
+            name='toc',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='lessonindexentry',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
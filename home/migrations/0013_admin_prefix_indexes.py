@@ -0,0 +1,53 @@
+"""
+Indexes for the case-insensitive prefix search in the Lessons admin listing
+(home/admin_listing.py). Django's ``istartswith`` compiles to
+``UPPER(col::text) LIKE UPPER(%s)`` on PostgreSQL and to ``col LIKE %s`` on
+SQLite, where LIKE ignores case. Neither can use a plain index, so the
+indexes are created per backend: an expression index with text_pattern_ops,
+or a NOCASE one. The page title lives in wagtailcore's table, which is why
+Meta.indexes can't declare them.
+"""
+from django.db import migrations
+
+
+INDEXES = {
+    "postgresql": [
+        "CREATE INDEX IF NOT EXISTS lesson_admin_title_prefix "
+        "ON wagtailcore_page (UPPER(title::text) text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS lesson_admin_subtitle_prefix "
+        "ON home_lessonpage (UPPER(subtitle::text) text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS lesson_admin_domain_prefix "
+        "ON home_lessonpage (UPPER(domain::text) text_pattern_ops)",
+    ],
+    "sqlite": [
+        "CREATE INDEX IF NOT EXISTS lesson_admin_title_prefix "
+        "ON wagtailcore_page (title COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS lesson_admin_subtitle_prefix "
+        "ON home_lessonpage (subtitle COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS lesson_admin_domain_prefix "
+        "ON home_lessonpage (domain COLLATE NOCASE)",
+    ],
+}
+
+
+def create_indexes(apps, schema_editor):
+    for sql in INDEXES.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in INDEXES:
+        schema_editor.execute("DROP INDEX IF EXISTS lesson_admin_title_prefix")
+        schema_editor.execute("DROP INDEX IF EXISTS lesson_admin_subtitle_prefix")
+        schema_editor.execute("DROP INDEX IF EXISTS lesson_admin_domain_prefix")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0012_lesson_index_summaries'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes, elidable=False),
+    ]
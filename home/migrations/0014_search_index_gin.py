@@ -0,0 +1,34 @@
+"""
+A GIN index on ``title || body`` of Wagtail's search index table.
+
+On PostgreSQL the database search backend matches ``(title || body) @@
+query`` when no fields are given (every lesson search). wagtailsearch only
+indexes the two tsvector columns separately, so that match scans the whole
+table. Nothing to do on other backends: SQLite searches its FTS5 table.
+"""
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS wagtailsearch_indexentry_title_body_gin "
+            "ON wagtailsearch_indexentry USING GIN ((title || body))"
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS wagtailsearch_indexentry_title_body_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0013_admin_prefix_indexes'),
+        ('wagtailsearch', '0009_remove_ngram_autocomplete'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index, elidable=False),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0015_lessonpage_responsive_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonApiBody',
+            fields=[
+                ('entry', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='api_body', serialize=False, to='home.lessonindexentry')),
+                ('blocks', models.TextField()),
+                ('digest', models.CharField(max_length=64)),
+            ],
+        ),
+    ]
@@ -1,9 +1,8 @@
 from django.db import models
-from wagtail.models import Page
+from django.utils.functional import cached_property
+from wagtail.models import Page, Revision
 from wagtail.fields import StreamField
 from wagtail.admin.panels import FieldPanel
-from wagtail import blocks
-from wagtail.images.blocks import ImageChooserBlock
 from modelcluster.fields import ParentalKey
 
 # These are deprecated
@@ -12,15 +11,17 @@ from modelcluster.fields import ParentalKey
 
 # These are current 
 from modelcluster.contrib.taggit import ClusterTaggableManager
-from taggit.models import TaggedItemBase
+from taggit.models import Tag, TaggedItemBase
 
-from wagtail.fields import StreamField
 from wagtail.admin.panels import FieldPanel
-from wagtail import blocks
-from wagtail.images.blocks import ImageChooserBlock
 from modelcluster.fields import ParentalKey
 
+from wagtail.search import index
+
+from porpoise_blocks import indexing
 from porpoise_blocks.common import ESSENTIAL_BLOCKS
+from porpoise_blocks.latex import load_latex_renderings
+from porpoise_blocks.media_blocks import ResponsiveImageBlock
 
 class LessonPageTag(TaggedItemBase):
     content_object = ParentalKey(
@@ -37,10 +38,12 @@ class LessonPage(Page):
     tags = ClusterTaggableManager(through=LessonPageTag, blank=True)
 
     # Merge inline blocks + reusable blocks
+    # ("latex" comes from ESSENTIAL_BLOCKS as porpoise_blocks' LaTeXBlock)
+    # Images render as responsive <picture> elements (see
+    # porpoise_blocks/media_blocks.py).
     body = StreamField(
         ESSENTIAL_BLOCKS + [
-            ("image", ImageChooserBlock()),
-            ("latex", blocks.TextBlock(help_text="Wrap your LaTeX in $$...$$ or \\(...\\)")),
+            ("image", ResponsiveImageBlock()),
         ],
         use_json_field=True
     )
@@ -52,6 +55,139 @@ class LessonPage(Page):
         FieldPanel("body"),
     ]
 
+    # Body text is indexed per weight tier (see porpoise_blocks/indexing.py).
+    search_fields = Page.search_fields + [
+        index.SearchField("subtitle", boost=2),
+        index.AutocompleteField("subtitle"),
+        index.FilterField("domain"),
+        index.RelatedFields("tags", [index.SearchField("name")]),
+    ] + indexing.search_fields("body")
+
+    # Indexed from home/signals.py on publish rather than on every save.
+    search_auto_update = False
+
+    @cached_property
+    def prerendered_blocks(self):
+        """HTML typeset at publish time for the live revision, keyed by block id and value digest."""
+        return load_latex_renderings(self.live_revision_id)
+
+    @cached_property
+    def body_search_text(self):
+        return indexing.stream_text(self.body)
+
+    def body_high_text(self):
+        return self.body_search_text["high"]
+
+    def body_normal_text(self):
+        return self.body_search_text["normal"]
+
+    def body_low_text(self):
+        return self.body_search_text["low"]
+
+    def with_content_json(self, content):
+        # Older revisions may be stored as deltas (see home/revisions.py).
+        from . import revisions
+
+        return super().with_content_json(revisions.expand_content(content))
+
+class LessonIndexEntry(models.Model):
+    """
+    Denormalized read model: one row per live LessonPage, kept up to date by
+    home/lesson_index.py on publish/unpublish. Listing and faceting queries
+    read this table instead of joining the page tree and taggit.
+    """
+    page = models.OneToOneField(
+        LessonPage,
+        primary_key=True,
+        related_name="index_entry",
+        on_delete=models.CASCADE,
+    )
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+    domain = models.CharField(max_length=100)
+    url_path = models.TextField()
+    tag_ids = models.JSONField(default=list, blank=True)
+    last_published_at = models.DateTimeField(null=True)
+
+    # Body summaries computed at publish (porpoise_blocks/summary.py), so
+    # lesson cards never decode the StreamField.
+    toc = models.JSONField(default=list, blank=True)
+    excerpt = models.TextField(blank=True)
+    word_count = models.PositiveIntegerField(default=0)
+    reading_time = models.PositiveIntegerField(default=0, help_text="Minutes")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["domain", "title"], name="lesson_index_domain_title"),
+            models.Index(fields=["title"], name="lesson_index_title"),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class LessonIndexTag(models.Model):
+    """
+    One row per (lesson, tag), with the lesson's domain copied in so that
+    "domain X with tag Y" and the per-tag/per-domain facet counts are answered
+    from the composite indexes alone.
+    """
+    entry = models.ForeignKey(
+        LessonIndexEntry,
+        related_name="tag_rows",
+        on_delete=models.CASCADE,
+    )
+    tag = models.ForeignKey(Tag, related_name="+", on_delete=models.CASCADE)
+    domain = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tag", "entry"], name="unique_lesson_index_tag"),
+        ]
+        indexes = [
+            models.Index(fields=["tag", "domain", "entry"], name="lesson_index_tag_domain"),
+            models.Index(fields=["domain", "tag"], name="lesson_index_domain_tag"),
+        ]
+
+
+class LessonApiBody(models.Model):
+    """
+    A live lesson's body as the lessons API serves it (home/api.py),
+    serialized at publish by home/lesson_index.py. It has its own table so
+    that listings, which read LessonIndexEntry, never load it.
+    """
+    entry = models.OneToOneField(
+        LessonIndexEntry,
+        primary_key=True,
+        related_name="api_body",
+        on_delete=models.CASCADE,
+    )
+    # A JSON array, stored as text and served without decoding it.
+    blocks = models.TextField()
+    # SHA-256 of ``blocks``; part of the detail endpoint's ETag.
+    digest = models.CharField(max_length=64)
+
+
+class RevisionDelta(models.Model):
+    """
+    A LessonPage revision whose ``content`` was compacted into a delta
+    against ``base``, a full revision of the same page (see
+    home/revisions.py).
+    """
+    revision = models.OneToOneField(
+        Revision,
+        primary_key=True,
+        related_name="+",
+        on_delete=models.CASCADE,
+    )
+    # Revisions stored against this one are rebuilt whole before it is
+    # deleted (home/signals.py), so this only cleans up the rows.
+    base = models.ForeignKey(Revision, related_name="+", on_delete=models.CASCADE)
+    # Size of the content as JSON, in bytes, before and after compaction.
+    full_size = models.PositiveIntegerField()
+    stored_size = models.PositiveIntegerField()
+
+
 class HomePage(Page):
     template = "home/home_page.html"        
 
@@ -0,0 +1,171 @@
+"""
+Opt-in full-response cache for live LessonPage views.
+
+Enable it with ``LESSON_PAGE_CACHE["ENABLED"]``. ``LessonPageCacheMiddleware``
+answers cache hits before Wagtail routes the request, so a hit costs no tree
+lookup, model load or render. Responses carry ETag/Last-Modified headers, and
+conditional requests get a 304.
+
+Entries are keyed by host and path, and each entry records the generation
+of its page. Publishing, unpublishing, moving or re-tagging a lesson replaces
+the page's generation (see home/signals.py), and every entry stored under
+the old generation stops being served. A generation token that has been
+evicted counts as a miss, so an eviction can never serve a stale page.
+
+The middleware is sync. Under ASGI, Django runs it in the request's thread,
+like Wagtail's ``serve``. Django's cache backends implement their async API
+by calling the sync one in that same thread, so an async path would save
+nothing.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import LessonPage
+
+
+DEFAULTS = {
+    "ENABLED": False,
+    "CACHE": "default",
+    "TIMEOUT": 300,
+}
+
+KEY_PREFIX = "lessonpage"
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "LESSON_PAGE_CACHE", {})}
+
+
+def get_cache():
+    return caches[get_config()["CACHE"]]
+
+
+def generation_key(page_id):
+    return f"{KEY_PREFIX}:generation:{page_id}"
+
+
+def response_key(request):
+    location = f"{request.get_host()}{request.path}"
+    digest = hashlib.sha256(location.encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}:response:{digest}"
+
+
+def invalidate_lessons(page_ids):
+    """Give each page a fresh generation, orphaning its cached responses."""
+    if not page_ids:
+        return
+    get_cache().set_many(
+        {generation_key(page_id): uuid.uuid4().hex for page_id in page_ids},
+        timeout=None,
+    )
+
+
+def current_generation(cache, page_id):
+    key = generation_key(page_id)
+    cache.add(key, uuid.uuid4().hex, timeout=None)
+    return cache.get(key)
+
+
+def remember_generation(page, request):
+    """
+    Record the page's generation on the request before it is rendered
+    (called from the ``before_serve_page`` hook). If the page is invalidated
+    while it renders, its response is stored under the old generation and
+    never served.
+    """
+    if get_config()["ENABLED"] and isinstance(page, LessonPage):
+        request.lesson_cache_generation = current_generation(get_cache(), page.pk)
+
+
+def is_cacheable_request(request):
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.GET
+        and not request.user.is_authenticated
+    )
+
+
+def is_cacheable_response(response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    cache_control = response.get("Cache-Control", "")
+    if "private" in cache_control or "no-store" in cache_control:
+        return False
+    page = (getattr(response, "context_data", None) or {}).get("page")
+    return isinstance(page, LessonPage)
+
+
+def add_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+
+
+class LessonPageCacheMiddleware:
+    """
+    Serves and stores anonymous LessonPage responses. Place it after
+    AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config["ENABLED"] or not is_cacheable_request(request):
+            return self.get_response(request)
+
+        cache = get_cache()
+        key = response_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            if cache.get(generation_key(entry["page_id"])) == entry["generation"]:
+                return self.cached_response(request, entry)
+
+        response = self.get_response(request)
+        entry = self.make_entry(request, response)
+        if entry is None:
+            return response
+        cache.set(key, entry, config["TIMEOUT"])
+        return self.stored_response(request, response, entry)
+
+    def make_entry(self, request, response):
+        """The cache entry for ``response``, or None if it can't be cached."""
+        generation = getattr(request, "lesson_cache_generation", None)
+        if generation is None or not is_cacheable_response(response):
+            return None
+
+        page = response.context_data["page"]
+        return {
+            "page_id": page.pk,
+            "generation": generation,
+            "content": response.content,
+            "content_type": response["Content-Type"],
+            "etag": '"%s"' % hashlib.sha256(response.content).hexdigest(),
+            "last_modified": (
+                int(page.last_published_at.timestamp()) if page.last_published_at else None
+            ),
+        }
+
+    def stored_response(self, request, response, entry):
+        add_validators(response, entry["etag"], entry["last_modified"])
+        return get_conditional_response(
+            request, etag=entry["etag"], last_modified=entry["last_modified"], response=response
+        )
+
+    def cached_response(self, request, entry):
+        response = HttpResponse(entry["content"], content_type=entry["content_type"])
+        add_validators(response, entry["etag"], entry["last_modified"])
+        response["X-Lesson-Cache"] = "hit"
+        return get_conditional_response(
+            request,
+            etag=entry["etag"],
+            last_modified=entry["last_modified"],
+            response=response,
+        )
@@ -0,0 +1,14 @@
+"""
+Wagtail's page history view, without the revisions' content.
+
+The history listing joins each log entry to its revision, and so loads and
+decodes the whole serialized page for every row, although it only shows the
+revision's id and schedule. lesson_space/urls.py routes the page history
+URLs here ahead of the Wagtail admin.
+"""
+from wagtail.admin.views.pages.history import PageHistoryView
+
+
+class LeanPageHistoryView(PageHistoryView):
+    def _annotate_queryset(self, queryset):
+        return super()._annotate_queryset(queryset).defer("revision__content")
@@ -0,0 +1,247 @@
+"""
+Compaction and retention of LessonPage revisions.
+
+Wagtail stores every revision as the whole serialized page, body included,
+so a heavily edited lesson accumulates hundreds of near-identical copies of
+its body. ``compact_page`` rewrites older revisions as deltas against a full
+revision of the same page, their *base*:
+
+* top-level fields equal to the base's are left out. Child relations (lists
+  of objects) are always kept, so code that rewrites them in place, like
+  copying a page with its revisions, still finds them;
+* in the body, each block the base has unchanged is kept as its id alone.
+
+A compacted revision keeps its row, so history, comparing and reverting
+work as before: ``LessonPage.with_content_json`` (used by
+``Revision.as_object``) rebuilds the full content with one query for the
+base. ``RevisionDelta`` records which revisions are deltas and their base.
+Bases are never compacted, so a rebuild never chains. A base is always newer
+than the deltas stored against it, so deleting revisions by age removes
+deltas before their base; a base deleted anyway has them rebuilt whole first
+(home/signals.py).
+
+``LESSON_REVISION_RETENTION`` says what is compacted and what is deleted,
+and ``manage.py compact_revisions`` applies it. The live, latest, scheduled
+and in-workflow revisions are never compacted or deleted.
+"""
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from wagtail.fields import StreamField
+from wagtail.models import Revision, WorkflowState
+
+from .models import LessonPage, RevisionDelta
+
+
+DEFAULTS = {
+    "KEEP_LATEST": 10,
+    "KEEP_DAYS": 14,
+    "SNAPSHOT_INTERVAL": 20,
+    "DELETE_AFTER_DAYS": None,
+}
+
+# Key of compacted content holding {"base": <revision id>, "removed": [...],
+# "streams": {<field>: [<block id or block>, ...]}}.
+DELTA_KEY = "__delta__"
+
+# Revisions loaded and rewritten at a time.
+CHUNK_SIZE = 100
+
+MISSING = object()
+
+
+def get_policy():
+    return {**DEFAULTS, **getattr(settings, "LESSON_REVISION_RETENTION", {})}
+
+
+def stream_field_names():
+    return {
+        field.name for field in LessonPage._meta.concrete_fields if isinstance(field, StreamField)
+    }
+
+
+def content_size(content):
+    return len(json.dumps(content, cls=DjangoJSONEncoder).encode("utf-8"))
+
+
+def _blocks_by_id(raw):
+    # Revisions hold a StreamField as its JSON text.
+    return {block["id"]: block for block in json.loads(raw or "[]") if block.get("id")}
+
+
+def is_delta(content):
+    return DELTA_KEY in content
+
+
+def encode_delta(content, base_content, base_id):
+    """Return ``content`` as a delta against ``base_content``."""
+    streams = stream_field_names()
+    delta = {}
+    stream_deltas = {}
+    for key, value in content.items():
+        base_value = base_content.get(key, MISSING)
+        if key in streams and isinstance(value, str) and isinstance(base_value, str):
+            if value != base_value:
+                base_blocks = _blocks_by_id(base_value)
+                stream_deltas[key] = [
+                    block["id"] if block.get("id") and base_blocks.get(block["id"]) == block else block
+                    for block in json.loads(value)
+                ]
+        elif isinstance(value, list) or value != base_value:
+            delta[key] = value
+    delta[DELTA_KEY] = {
+        "base": base_id,
+        "removed": [key for key in base_content if key not in content],
+        "streams": stream_deltas,
+    }
+    return delta
+
+
+def apply_delta(delta, base_content):
+    """Rebuild the full content ``encode_delta`` was given."""
+    meta = delta[DELTA_KEY]
+    content = {key: value for key, value in base_content.items() if key not in meta["removed"]}
+    content.update((key, value) for key, value in delta.items() if key != DELTA_KEY)
+    for name, items in meta["streams"].items():
+        base_blocks = _blocks_by_id(base_content[name])
+        blocks = [base_blocks[item] if isinstance(item, str) else item for item in items]
+        content[name] = json.dumps(blocks, cls=DjangoJSONEncoder)
+    return content
+
+
+def expand_content(content):
+    """The full content of a revision, rebuilt from its base if it is a delta."""
+    if not is_delta(content):
+        return content
+    base_id = content[DELTA_KEY]["base"]
+    base_content = Revision.objects.filter(pk=base_id).values_list("content", flat=True).first()
+    if base_content is None:
+        raise Revision.DoesNotExist(f"Base revision {base_id} of a compacted revision is missing.")
+    return apply_delta(content, base_content)
+
+
+def restore_dependents(base):
+    """Store every revision compacted against ``base`` whole again."""
+    dependents = RevisionDelta.objects.filter(base=base)
+    revision_ids = list(dependents.values_list("revision_id", flat=True))
+    if not revision_ids:
+        return 0
+    rows = Revision.objects.filter(pk__in=revision_ids).values_list("pk", "content")
+    for revision_id, content in rows:
+        Revision.objects.filter(pk=revision_id).update(content=apply_delta(content, base.content))
+    dependents.delete()
+    return len(revision_ids)
+
+
+def kept_revision_ids(page, revisions, policy):
+    """Revisions of ``page`` that stay whole and are never deleted."""
+    kept = {page.latest_revision_id, page.live_revision_id}
+    # The newest ones; ``revisions`` is ordered newest first.
+    kept.update(revision_id for revision_id, _ in revisions[:policy["KEEP_LATEST"]])
+    # Scheduled and in-workflow revisions, as purge_revisions spares them.
+    pinned = page.revisions.filter(
+        Q(approved_go_live_at__isnull=False)
+        | Q(task_states__workflow_state__status__in=[
+            WorkflowState.STATUS_IN_PROGRESS,
+            WorkflowState.STATUS_NEEDS_CHANGES,
+        ])
+    )
+    kept.update(pinned.values_list("pk", flat=True))
+    kept.discard(None)
+    return kept
+
+
+def plan_compaction(page, revisions, kept, policy, now):
+    """
+    Return ``{revision id: base id}`` for the revisions of ``page`` to compact.
+
+    Eligible revisions are taken newest first in runs of
+    ``SNAPSHOT_INTERVAL``: the first of each run stays whole as the base of
+    the others.
+    """
+    cutoff = now - timedelta(days=policy["KEEP_DAYS"])
+    existing = dict(
+        RevisionDelta.objects.filter(revision__in=page.revisions.values("pk")).values_list(
+            "revision_id", "base_id"
+        )
+    )
+    bases_in_use = set(existing.values())
+
+    plan = {}
+    base_id, run = None, 0
+    for revision_id, created_at in revisions:
+        if (
+            revision_id in kept
+            or created_at >= cutoff
+            or revision_id in existing
+            or revision_id in bases_in_use
+        ):
+            continue
+        if base_id is None or run >= policy["SNAPSHOT_INTERVAL"]:
+            base_id, run = revision_id, 1
+        else:
+            plan[revision_id] = base_id
+            run += 1
+    return plan
+
+
+def compact_page(page, policy=None, now=None, dry_run=False):
+    """
+    Apply the retention policy to the revisions of ``page``: compact the
+    older ones and delete expired ones. Returns counts and sizes in bytes.
+    """
+    policy = policy or get_policy()
+    now = now or timezone.now()
+    stats = {"compacted": 0, "full_size": 0, "stored_size": 0, "deleted": 0}
+
+    with transaction.atomic():
+        revisions = list(
+            page.revisions.order_by("-created_at", "-pk").values_list("pk", "created_at")
+        )
+        kept = kept_revision_ids(page, revisions, policy)
+
+        if policy["DELETE_AFTER_DAYS"] is not None:
+            expire_before = now - timedelta(days=policy["DELETE_AFTER_DAYS"])
+            # Oldest first, so that deltas go before their base.
+            expired = [
+                revision_id
+                for revision_id, created_at in reversed(revisions)
+                if created_at < expire_before and revision_id not in kept
+            ]
+            stats["deleted"] = len(expired)
+            if not dry_run:
+                for start in range(0, len(expired), CHUNK_SIZE):
+                    Revision.objects.filter(pk__in=expired[start:start + CHUNK_SIZE]).delete()
+            expired = set(expired)
+            revisions = [row for row in revisions if row[0] not in expired]
+
+        plan = plan_compaction(page, revisions, kept, policy, now)
+        bases = dict(
+            Revision.objects.filter(pk__in=set(plan.values())).values_list("pk", "content")
+        )
+        revision_ids = list(plan)
+        for start in range(0, len(revision_ids), CHUNK_SIZE):
+            rows = Revision.objects.filter(pk__in=revision_ids[start:start + CHUNK_SIZE])
+            deltas = []
+            for revision_id, content in rows.values_list("pk", "content"):
+                base_id = plan[revision_id]
+                delta = encode_delta(content, bases[base_id], base_id)
+                deltas.append(RevisionDelta(
+                    revision_id=revision_id,
+                    base_id=base_id,
+                    full_size=content_size(content),
+                    stored_size=content_size(delta),
+                ))
+                if not dry_run:
+                    Revision.objects.filter(pk=revision_id).update(content=delta)
+            if not dry_run:
+                RevisionDelta.objects.bulk_create(deltas)
+            stats["compacted"] += len(deltas)
+            stats["full_size"] += sum(delta.full_size for delta in deltas)
+            stats["stored_size"] += sum(delta.stored_size for delta in deltas)
+    return stats
@@ -0,0 +1,131 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from wagtail.images import get_image_model
+from wagtail.models import Revision
+from wagtail.search import index
+from wagtail.search.tasks import insert_or_update_object_task
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from porpoise_blocks.highlighting import highlight_stream
+from porpoise_blocks.latex import prerender_latex_task
+from porpoise_blocks.renditions import pregenerate_renditions_task, stream_image_ids
+from porpoise_blocks.signals import latex_prerendered
+
+from . import lesson_index, page_cache, revisions
+from .models import LessonPage, LessonPageTag
+
+
+@receiver(page_published, sender=LessonPage)
+def prerender_lesson_latex(sender, instance, revision, **kwargs):
+    # Typeset LaTeX once per publish, off the request; unchanged sources are
+    # reused.
+    prerender_latex_task.enqueue(revision.pk, "body")
+
+
+@receiver(page_published, sender=LessonPage)
+def highlight_lesson_code(sender, instance, **kwargs):
+    # Highlight new or edited code snippets before the first view.
+    highlight_stream(instance.body)
+
+
+@receiver(page_published, sender=LessonPage)
+def pregenerate_lesson_image_renditions(sender, instance, **kwargs):
+    # Generate responsive renditions for new images before the first view.
+    image_ids = stream_image_ids(instance.body)
+    if image_ids:
+        pregenerate_renditions_task.enqueue(sorted(image_ids))
+
+
+@receiver(post_save, sender=get_image_model())
+def pregenerate_uploaded_image_renditions(sender, instance, **kwargs):
+    # Also runs on edits: a new file or focal point needs new renditions.
+    pregenerate_renditions_task.enqueue([instance.pk])
+
+
+@receiver(page_published, sender=LessonPage)
+@receiver(page_unpublished, sender=LessonPage)
+@receiver(post_delete, sender=LessonPage)
+def invalidate_lesson_page_cache(sender, instance, **kwargs):
+    page_cache.invalidate_lessons([instance.pk])
+
+
+@receiver(post_page_move)
+def invalidate_moved_lesson_page_cache(sender, instance, **kwargs):
+    # Moving any page changes the URL of every lesson below it.
+    page_cache.invalidate_lessons(
+        LessonPage.objects.descendant_of(instance, inclusive=True).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_save, sender=LessonPageTag)
+@receiver(post_delete, sender=LessonPageTag)
+def invalidate_retagged_lesson_page_cache(sender, instance, **kwargs):
+    page_cache.invalidate_lessons([instance.content_object_id])
+
+
+@receiver(page_published, sender=LessonPage)
+def index_published_lesson(sender, instance, **kwargs):
+    lesson_index.index_lessons([instance])
+
+
+@receiver(latex_prerendered, sender=LessonPage)
+def refresh_typeset_lesson(sender, revision, **kwargs):
+    # prerender_latex_task runs after publish stored the API body and may have
+    # served the page; both still have the untypeset LaTeX.
+    lesson_index.refresh_api_body(revision)
+    page_cache.invalidate_lessons([int(revision.object_id)])
+
+
+@receiver(page_unpublished, sender=LessonPage)
+def unindex_unpublished_lesson(sender, instance, **kwargs):
+    lesson_index.remove_lessons([instance.pk])
+
+
+@receiver(post_page_move)
+def reindex_moved_lesson_urls(sender, instance, **kwargs):
+    lesson_index.refresh_url_paths(instance)
+
+
+@receiver(post_save, sender=LessonPageTag)
+@receiver(post_delete, sender=LessonPageTag)
+def reindex_lesson_tags(sender, instance, **kwargs):
+    lesson_index.refresh_tags(instance.content_object_id)
+
+
+# LessonPage has search_auto_update = False: the search index is written for
+# new pages (so drafts show up in the admin) and then only when the live
+# content changes. Tags are committed with the page on publish, so publishing
+# picks them up too. Draft saves never touch the index.
+
+
+@receiver(post_save, sender=LessonPage)
+def search_index_new_lesson(sender, instance, created, raw=False, **kwargs):
+    # Raw saves come from fixtures and home/lesson_import.py, which indexes in bulk.
+    if created and not raw:
+        insert_or_update_object_task.enqueue("home", "lessonpage", str(instance.pk))
+
+
+@receiver(page_published, sender=LessonPage)
+@receiver(page_unpublished, sender=LessonPage)
+def search_index_published_lesson(sender, instance, **kwargs):
+    insert_or_update_object_task.enqueue("home", "lessonpage", str(instance.pk))
+
+
+@receiver(post_delete, sender=LessonPage)
+def search_unindex_deleted_lesson(sender, instance, **kwargs):
+    index.remove_object(instance)
+
+
+@receiver(pre_delete, sender=Revision)
+def restore_compacted_revisions(sender, instance, **kwargs):
+    # Revisions compacted against this one can't be rebuilt without it.
+    revisions.restore_dependents(instance)
+
+
+@receiver(post_save, sender=Revision)
+def expand_copied_revision(sender, instance, created, **kwargs):
+    # Copying a page copies its revisions' content as stored. A copied delta
+    # would depend on a revision of the original page, so it's stored whole.
+    if created and revisions.is_delta(instance.content):
+        instance.content = revisions.expand_content(instance.content)
+        Revision.objects.filter(pk=instance.pk).update(content=instance.content)
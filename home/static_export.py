@@ -0,0 +1,231 @@
+"""
+Static-site export of live pages for ``manage.py export_static``.
+
+Each live LessonPage and HomePage is rendered through its own template and
+``serve()``, as an anonymous visitor would get it, and written to
+``<output>/<url path>/index.html``.
+
+Rebuilds are incremental. A manifest in the output directory records, for
+every exported page, a fingerprint of what its HTML depends on and the
+SHA-256 of the HTML written:
+
+* the page itself: its URL, ``last_published_at`` and live revision;
+* everything the page refers to, from Wagtail's reference index: images,
+  linked pages and documents, snippets. Linked pages count by URL and
+  status, anything else by all its stored fields;
+* the project's templates and ``STATIC_VERSION``, for every page at once.
+
+Only pages whose fingerprint changed are rendered again, and a rendered
+page whose HTML hashes the same as before is not rewritten, so its file
+keeps its modification time. Files of pages that are no longer live, or
+have moved, are removed. Changes to Python code aren't tracked: rebuild
+everything with ``--force`` after a deploy that changes how pages render.
+"""
+import hashlib
+import json
+import os
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.utils.encoding import force_str
+from wagtail.models import Page, ReferenceIndex, Site
+
+from lesson_space.warmup import project_template_names
+
+from .models import HomePage, LessonPage
+
+
+MANIFEST_NAME = ".static-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def digest(value):
+    return hashlib.sha256(force_str(value).encode("utf-8")).hexdigest()
+
+
+def templates_key():
+    """Changes whenever a project template or the static files version does."""
+    sources = []
+    for name in project_template_names():
+        template = getattr(get_template(name), "template", None)
+        sources.append((name, getattr(template, "source", "")))
+    return digest(json.dumps([settings.STATIC_VERSION, sources]))
+
+
+def page_file(page_path):
+    """Output path of a page, relative to the export directory."""
+    parts = [part for part in page_path.split("/") if part]
+    return os.path.join(*parts, "index.html")
+
+
+def exported_pages():
+    """Live LessonPages and HomePages with a URL, as ``{page_id: (page, relative file)}``."""
+    pages = {}
+    for page in Page.objects.live().type(LessonPage, HomePage).order_by("pk"):
+        url_parts = page.get_url_parts()
+        if url_parts is None or url_parts[2] is None:
+            continue  # not under a site
+        pages[page.pk] = (page, page_file(url_parts[2]))
+    return pages
+
+
+def page_references(page_ids):
+    """``{page_id: {(content type id, object id)}}`` from the reference index."""
+    references = {page_id: set() for page_id in page_ids}
+    rows = ReferenceIndex.objects.filter(
+        base_content_type=ContentType.objects.get_for_model(Page),
+        object_id__in=[str(page_id) for page_id in page_ids],
+    ).values_list("object_id", "to_content_type_id", "to_object_id")
+    for object_id, content_type_id, to_object_id in rows:
+        references[int(object_id)].add((content_type_id, to_object_id))
+    return references
+
+
+def object_version(obj):
+    if isinstance(obj, Page):
+        # A link to a page only renders its URL.
+        return [obj.url_path, obj.live]
+    return [field.value_to_string(obj) for field in obj._meta.concrete_fields]
+
+
+def reference_versions(references):
+    """``{(content type id, object id): version}`` for every referenced object, a query per type."""
+    by_type = {}
+    for content_type_id, object_id in references:
+        by_type.setdefault(content_type_id, set()).add(object_id)
+
+    versions = {}
+    for content_type_id, object_ids in by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        for obj in model._default_manager.filter(pk__in=object_ids):
+            versions[(content_type_id, str(obj.pk))] = object_version(obj)
+    return versions
+
+
+def fingerprints(pages, global_key):
+    """``{page_id: fingerprint}`` for the pages from ``exported_pages()``."""
+    references = page_references(list(pages))
+    versions = reference_versions(set().union(*references.values()))
+    result = {}
+    for page_id, (page, path) in pages.items():
+        dependencies = sorted(
+            (f"{content_type_id}:{object_id}", versions.get((content_type_id, object_id)))
+            for content_type_id, object_id in references[page_id]
+        )
+        result[page_id] = digest(json.dumps([
+            global_key,
+            path,
+            page.last_published_at.isoformat() if page.last_published_at else None,
+            page.live_revision_id,
+            dependencies,
+        ]))
+    return result
+
+
+def render_page(page_id):
+    """
+    Render a live page as an anonymous GET of its URL. Takes and returns
+    plain values so it can run in a worker process.
+    """
+    page = Page.objects.get(pk=page_id).specific
+    site_id, root_url, page_path = page.get_url_parts()
+    request = RequestFactory().get(page_path)
+    # Set the site up front: the export's host needn't be in ALLOWED_HOSTS.
+    request._wagtail_site = Site.objects.get(pk=site_id)
+    response = page.serve(request)
+    if hasattr(response, "render"):
+        response.render()
+    return page_id, response.content.decode(response.charset)
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "pages": {}}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "pages": {}}
+    return manifest
+
+
+def write_atomic(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as tmp_file:
+        tmp_file.write(content)
+    os.replace(tmp_path, path)
+
+
+def save_manifest(output_dir, manifest):
+    write_atomic(os.path.join(output_dir, MANIFEST_NAME), json.dumps(manifest, indent=1, sort_keys=True))
+
+
+def remove_file(output_dir, relative_path):
+    """Delete an exported file and any directories that leaves empty."""
+    path = os.path.join(output_dir, relative_path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    directory = os.path.dirname(path)
+    while os.path.realpath(directory) != os.path.realpath(output_dir):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break  # not empty
+        directory = os.path.dirname(directory)
+
+
+def export(output_dir, pool=None, force=False):
+    """
+    Bring ``output_dir`` up to date. Returns counts: ``pages`` exported,
+    ``rendered``, ``written`` (rendered with new HTML) and ``removed``.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    previous = manifest["pages"]
+
+    pages = exported_pages()
+    current = fingerprints(pages, templates_key())
+
+    to_render = [
+        page_id for page_id, (page, path) in pages.items()
+        if force
+        or previous.get(str(page_id), {}).get("fingerprint") != current[page_id]
+        or previous[str(page_id)]["path"] != path
+        or not os.path.exists(os.path.join(output_dir, path))
+    ]
+
+    # Pages left as they are keep their manifest entries.
+    entries = {
+        str(page_id): previous[str(page_id)] for page_id in pages.keys() - set(to_render)
+    }
+    mapper = pool.map if pool is not None else map
+    written = 0
+    for page_id, html in mapper(render_page, to_render):
+        path = pages[page_id][1]
+        html_hash = digest(html)
+        old = previous.get(str(page_id), {})
+        if old.get("sha256") != html_hash or old.get("path") != path or not os.path.exists(
+            os.path.join(output_dir, path)
+        ):
+            write_atomic(os.path.join(output_dir, path), html)
+            written += 1
+        entries[str(page_id)] = {"path": path, "fingerprint": current[page_id], "sha256": html_hash}
+
+    # Files no longer produced: unpublished or deleted pages, and old paths
+    # of moved ones.
+    live_paths = {entry["path"] for entry in entries.values()}
+    removed = 0
+    for entry in previous.values():
+        if entry["path"] not in live_paths:
+            remove_file(output_dir, entry["path"])
+            removed += 1
+
+    save_manifest(output_dir, {"version": MANIFEST_VERSION, "pages": entries})
+    return {"pages": len(pages), "rendered": len(to_render), "written": written, "removed": removed}
@@ -0,0 +1,108 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from wagtail.models import Page
+
+from home.admin_listing import LessonSearchHandler, estimated_count
+from home.models import HomePage, LessonPage
+
+
+LIST_URL = "/admin/home/lessonpage/"
+
+
+@pytest.fixture
+def homepage():
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Admin Home", slug="admin-home")
+    root.add_child(instance=homepage)
+    return homepage
+
+
+@pytest.fixture
+def admin_client():
+    user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def add_lessons(parent, count, start=0, domain="physics", tags=("waves",)):
+    for number in range(start, start + count):
+        lesson = LessonPage(
+            title=f"Lesson {number}", slug=f"lesson-{number}", subtitle="Sub", domain=domain
+        )
+        lesson.body = [("paragraph", "<p>Body</p>")]
+        lesson.tags.add(*tags)
+        parent.add_child(instance=lesson)
+        lesson.save_revision().publish()
+
+
+def search(term):
+    handler = LessonSearchHandler(("title", "subtitle", "domain"))
+    return set(
+        handler.search_queryset(LessonPage.objects.all(), term).values_list("title", flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_search_matches_field_prefixes_and_tag_names(homepage):
+    add_lessons(homepage, 1, start=0, domain="physics", tags=["optics"])
+    add_lessons(homepage, 1, start=1, domain="chemistry", tags=["optics", "bonds"])
+
+    assert search("lesson 1") == {"Lesson 1"}
+    assert search("CHEM") == {"Lesson 1"}
+    assert search("sub") == {"Lesson 0", "Lesson 1"}
+    assert search("Optics") == {"Lesson 0", "Lesson 1"}
+    # Tags must match whole, and titles only at the start.
+    assert search("opt") == set()
+    assert search("son") == set()
+    assert search("  ") == {"Lesson 0", "Lesson 1"}
+
+
+@pytest.mark.django_db
+def test_estimated_count_is_exact_below_the_limit(homepage):
+    add_lessons(homepage, 3)
+
+    assert estimated_count(LessonPage.objects.all(), limit=5) == (3, False)
+    if connection.vendor == "sqlite":
+        # SQLite has no planner estimate, so past the limit it counts everything.
+        assert estimated_count(LessonPage.objects.all(), limit=2) == (3, False)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("plain_storages")
+def test_listing_query_count_does_not_grow_with_lessons(homepage, admin_client):
+    add_lessons(homepage, 2)
+    admin_client.get(LIST_URL)
+    with CaptureQueriesContext(connection) as small:
+        response = admin_client.get(LIST_URL)
+    assert response.status_code == 200
+
+    add_lessons(homepage, 10, start=2)
+    with CaptureQueriesContext(connection) as large:
+        response = admin_client.get(LIST_URL)
+    assert response.status_code == 200
+    assert len(large) == len(small)
+    assert b"Lesson 11" in response.content
+    assert response.content.count(b'class="field-tag_names title">waves<') == 12
+    assert not any('"home_lessonpage"."body"' in query["sql"] for query in large)
+    # Every count of lessons stops at LESSON_ADMIN_EXACT_COUNT_LIMIT.
+    counts = [
+        query["sql"] for query in large
+        if "COUNT(" in query["sql"] and "home_lessonpage" in query["sql"]
+    ]
+    assert counts and all("LIMIT" in sql for sql in counts)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("plain_storages")
+def test_listing_search(homepage, admin_client):
+    add_lessons(homepage, 3, tags=["waves", "light"])
+
+    response = admin_client.get(LIST_URL, {"q": "lesson 2"})
+
+    assert response.context["result_count"] == 1
+    assert response.context["all_count"] == 3
+    assert list(response.context["object_list"]) == [LessonPage.objects.get(slug="lesson-2")]
@@ -0,0 +1,82 @@
+import pytest
+from django.db import transaction
+from wagtail.models import Page
+
+from lesson_space import database
+
+
+def test_sqlite_is_the_default():
+    config = database.databases("/srv/app", {})["default"]
+
+    assert config == {"ENGINE": "django.db.backends.sqlite3", "NAME": "/srv/app/db.sqlite3"}
+    assert database.search_backends({}) == {
+        "default": {"BACKEND": "wagtail.search.backends.database"}
+    }
+
+
+def test_postgresql_with_persistent_connections():
+    environ = {
+        "DATABASE_ENGINE": "postgresql",
+        "PGHOST": "db",
+        "PGDATABASE": "lessons",
+        "PGUSER": "app",
+        "DATABASE_CONN_MAX_AGE": "300",
+    }
+
+    config = database.databases("/srv/app", environ)["default"]
+
+    assert config["ENGINE"] == "django.db.backends.postgresql"
+    assert (config["HOST"], config["NAME"], config["USER"]) == ("db", "lessons", "app")
+    assert config["CONN_MAX_AGE"] == 300
+    assert config["CONN_HEALTH_CHECKS"] is True
+    assert "pool" not in config["OPTIONS"]
+
+
+def test_postgresql_with_pool():
+    environ = {"DATABASE_ENGINE": "postgresql", "DATABASE_POOL": "1", "DATABASE_POOL_MAX_SIZE": "4"}
+
+    config = database.databases("/srv/app", environ)["default"]
+
+    # Django rejects a pool combined with persistent connections.
+    assert config["CONN_MAX_AGE"] == 0
+    assert config["OPTIONS"]["pool"] == {"min_size": 2, "max_size": 4, "timeout": 10}
+
+
+def test_postgresql_search_config():
+    backend = database.search_backends({"DATABASE_ENGINE": "postgresql", "SEARCH_CONFIG": "simple"})
+
+    assert backend["default"]["SEARCH_CONFIG"] == "simple"
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        database.databases("/srv/app", {"DATABASE_ENGINE": "mysql"})
+
+
+def test_sqlite_concurrent_mode():
+    aliases = database.databases("/srv/app", {"SQLITE_CONCURRENT_MODE": "1"})
+
+    default, replica = aliases["default"], aliases["replica"]
+    assert default["OPTIONS"]["transaction_mode"] == "IMMEDIATE"
+    assert "PRAGMA journal_mode=WAL" in default["OPTIONS"]["init_command"]
+    assert replica["NAME"] == "file:///srv/app/db.sqlite3?mode=ro"
+    assert "PRAGMA query_only=ON" in replica["OPTIONS"]["init_command"]
+    assert replica["TEST"] == {"MIRROR": "default"}
+    assert database.routers({"SQLITE_CONCURRENT_MODE": "1"}) == [
+        "lesson_space.database.ReadWriteRouter"
+    ]
+    # Only applies to SQLite.
+    assert database.routers({"SQLITE_CONCURRENT_MODE": "1", "DATABASE_ENGINE": "postgresql"}) == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_read_write_router():
+    router = database.ReadWriteRouter()
+
+    assert router.db_for_read(Page) == "replica"
+    assert router.db_for_read(Page, instance=Page()) == "default"
+    assert router.db_for_write(Page) == "default"
+    with transaction.atomic():
+        assert router.db_for_read(Page) == "default"
+    assert router.allow_migrate("default", "home")
+    assert not router.allow_migrate("replica", "home")
@@ -0,0 +1,91 @@
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from wagtail.models import Page
+
+from home.lesson_export import lesson_chunks
+from home.models import HomePage, LessonPage
+
+
+@pytest.fixture
+def lessons():
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Export Home", slug="export-home")
+    root.add_child(instance=homepage)
+
+    created = []
+    for number in range(5):
+        lesson = LessonPage(title=f"Lesson {number}", slug=f"lesson-{number}", domain="physics")
+        lesson.body = [("paragraph", f"<p>Body {number}</p>")]
+        lesson.tags.add("exported", f"group-{number % 2}")
+        homepage.add_child(instance=lesson)
+        lesson.save_revision().publish()
+        created.append(lesson)
+    return created
+
+
+def export(tmp_path, *args):
+    path = tmp_path / "lessons.ndjson"
+    call_command("export_lessons", str(path), *args, stdout=io.StringIO())
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.mark.django_db
+def test_export_writes_one_line_per_lesson(lessons, tmp_path):
+    rows = export(tmp_path, "--chunk-size", "2")
+
+    assert [row["slug"] for row in rows] == [f"lesson-{n}" for n in range(5)]
+    assert rows[1]["tags"] == ["exported", "group-1"]
+    assert rows[1]["body"][0]["type"] == "paragraph"
+    assert rows[1]["body"][0]["value"] == "<p>Body 1</p>"
+    assert "html" not in rows[1]
+
+
+@pytest.mark.django_db
+def test_export_renders_html(lessons, tmp_path):
+    rows = export(tmp_path, "--html")
+    assert "<p>Body 0</p>" in rows[0]["html"]
+
+
+@pytest.mark.django_db
+def test_export_renders_html_in_worker_processes(lessons, tmp_path):
+    rows = export(tmp_path, "--html", "--processes", "2", "--chunk-size", "2")
+    assert [row["slug"] for row in rows] == [f"lesson-{n}" for n in range(5)]
+    assert all(f"<p>Body {n}</p>" in row["html"] for n, row in enumerate(rows))
+
+
+@pytest.mark.django_db
+def test_export_since_last_published_at(lessons, tmp_path):
+    cutoff = timezone.now() - timedelta(days=1)
+    LessonPage.objects.filter(pk__in=[lessons[0].pk, lessons[1].pk]).update(
+        last_published_at=cutoff - timedelta(days=1)
+    )
+
+    rows = export(tmp_path, "--since", cutoff.isoformat())
+    assert [row["slug"] for row in rows] == ["lesson-2", "lesson-3", "lesson-4"]
+
+
+@pytest.mark.django_db
+def test_tags_are_prefetched_per_chunk(lessons):
+    with CaptureQueriesContext(connection) as queries:
+        chunks = list(lesson_chunks(chunk_size=10))
+    assert sum(len(chunk) for chunk in chunks) == 5
+    # Pages, their tagged items and the tags: no query per lesson.
+    assert len(queries) == 3
+
+
+@pytest.mark.django_db
+def test_parquet_export(lessons, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "lessons.parquet"
+    call_command("export_lessons", str(path), "--format", "parquet", stdout=io.StringIO())
+
+    table = pq.read_table(path)
+    assert table.num_rows == 5
+    assert table.column("tags")[1].as_py() == ["exported", "group-1"]
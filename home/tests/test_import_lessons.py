@@ -0,0 +1,120 @@
+import io
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+from wagtail.models import Page, Site
+
+from home.lesson_import import TagResolver, TreeSlots, import_batch
+from home.models import HomePage, LessonIndexEntry, LessonPage
+
+
+@pytest.fixture
+def homepage():
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Import Home", slug="import-home")
+    root.add_child(instance=homepage)
+    homepage.save_revision().publish()
+    Site.objects.update(root_page=homepage)
+    return homepage
+
+
+def ndjson(*rows):
+    return "\n".join(json.dumps(row) for row in rows) + "\n"
+
+
+def run_import(tmp_path, text, *args):
+    path = tmp_path / "lessons.ndjson"
+    path.write_text(text)
+    out = io.StringIO()
+    call_command("import_lessons", str(path), *args, stdout=out)
+    return out.getvalue()
+
+
+def lesson_row(number, **extra):
+    return {
+        "title": f"Lesson {number}",
+        "subtitle": "Imported",
+        "domain": "physics",
+        "tags": ["imported", f"group-{number % 2}"],
+        "body": [
+            {"type": "heading", "value": "Overview"},
+            ["paragraph", f"<p>Body of lesson {number}</p>"],
+        ],
+        **extra,
+    }
+
+
+@pytest.mark.django_db
+def test_import_creates_published_lessons_in_batches(homepage, tmp_path):
+    existing = LessonPage(title="Existing", slug="lesson-1", domain="physics")
+    homepage.add_child(instance=existing)
+
+    output = run_import(
+        tmp_path, ndjson(*(lesson_row(n) for n in range(1, 6))), "--batch-size", "2"
+    )
+
+    assert "Imported 5 lessons" in output
+    assert not any(Page.find_problems())
+    homepage.refresh_from_db()
+    assert homepage.numchild == 6
+
+    lessons = LessonPage.objects.live().exclude(pk=existing.pk).order_by("path")
+    assert [lesson.slug for lesson in lessons] == [
+        "lesson-1-2", "lesson-2", "lesson-3", "lesson-4", "lesson-5",
+    ]
+    first = lessons[0]
+    assert first.url == "/lesson-1-2/"
+    assert first.live_revision == first.latest_revision
+    assert first.live_revision.as_object().body.raw_data[1]["value"] == "<p>Body of lesson 1</p>"
+    assert sorted(first.tags.names()) == ["group-1", "imported"]
+    assert LessonIndexEntry.objects.count() == 5
+    assert [page.slug for page in LessonPage.objects.live().search("lesson 3")][0] == "lesson-3"
+
+
+@pytest.mark.django_db
+def test_imported_lesson_can_be_edited_and_siblings_added(homepage, tmp_path):
+    run_import(tmp_path, ndjson(lesson_row(1)))
+
+    lesson = LessonPage.objects.get(slug="lesson-1")
+    lesson.subtitle = "Edited"
+    lesson.save_revision().publish()
+    homepage.refresh_from_db()
+    homepage.add_child(instance=LessonPage(title="Later", slug="later", domain="physics"))
+
+    assert not any(Page.find_problems())
+    assert LessonIndexEntry.objects.get(page=lesson).subtitle == "Edited"
+
+
+@pytest.mark.django_db
+def test_unknown_block_type_stops_the_import(homepage, tmp_path):
+    rows = ndjson(lesson_row(1, body=[{"type": "video", "value": "x"}]))
+
+    with pytest.raises(CommandError, match="Unknown block type"):
+        run_import(tmp_path, rows)
+    assert not LessonPage.objects.exists()
+
+
+@pytest.mark.django_db
+def test_invalid_block_value_stops_the_import(homepage, tmp_path):
+    rows = ndjson(lesson_row(1, body=[{"type": "heading", "value": ""}]))
+
+    with pytest.raises(CommandError, match="Invalid body"):
+        run_import(tmp_path, rows)
+    assert not LessonPage.objects.exists()
+
+
+@pytest.mark.django_db
+def test_pages_added_between_batches_keep_their_paths_and_slugs(homepage):
+    slots, tags = TreeSlots(homepage), TagResolver()
+    import_batch(homepage, [lesson_row(1)], slots, tags)
+
+    Page.objects.get(pk=homepage.pk).add_child(
+        instance=LessonPage(title="Lesson 2", slug="lesson-2", domain="physics")
+    )
+    import_batch(homepage, [lesson_row(2)], slots, tags)
+
+    assert not any(Page.find_problems())
+    assert sorted(LessonPage.objects.values_list("slug", flat=True)) == [
+        "lesson-1", "lesson-2", "lesson-2-2",
+    ]
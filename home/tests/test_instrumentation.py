@@ -0,0 +1,71 @@
+import pytest
+from django.core.cache import caches
+from django.test import Client, override_settings
+from wagtail.models import Page, Site
+
+from home.models import HomePage, LessonPage
+from lesson_space.instrumentation import METRICS
+
+
+ENABLED = {"ENABLED": True}
+
+
+@pytest.fixture
+def lesson():
+    caches["blocks"].clear()
+    METRICS.reset()
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Timing Home", slug="timing-home")
+    root.add_child(instance=homepage)
+    homepage.save_revision().publish()
+    Site.objects.update(root_page=homepage)
+
+    lesson = LessonPage(title="Timed", slug="timed", domain="physics")
+    lesson.body = [
+        ("heading", "Timing"),
+        ("code", {"language": "python", "code": "x = 1", "style": "default"}),
+        ("code", {"language": "python", "code": "y = 2", "style": "default"}),
+    ]
+    homepage.add_child(instance=lesson)
+    lesson.save_revision().publish()
+    yield lesson
+    METRICS.reset()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("plain_storages")
+@override_settings(PERFORMANCE_INSTRUMENTATION=ENABLED)
+def test_server_timing_header_breaks_down_request(lesson):
+    response = Client().get("/timed/")
+
+    assert response.status_code == 200
+    timing = response["Server-Timing"]
+    assert timing.startswith("db;dur=")
+    assert "tpl;dur=" in timing
+    assert 'block-code;dur=' in timing and '"2 rendered"' in timing
+    assert 'block-heading;dur=' in timing
+    assert "total;dur=" in timing
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("plain_storages")
+@override_settings(PERFORMANCE_INSTRUMENTATION=ENABLED)
+def test_metrics_endpoint_reports_totals(lesson):
+    client = Client()
+    client.get("/timed/")
+
+    body = client.get("/metrics/").content.decode()
+    assert 'lesson_space_request_seconds_count{view="wagtail_serve"} 1' in body
+    assert 'lesson_space_block_render_seconds_count{block_type="code"} 2' in body
+    assert "# TYPE lesson_space_db_queries_total counter" in body
+
+    assert client.get("/metrics/", REMOTE_ADDR="203.0.113.9").status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("plain_storages")
+@override_settings(PERFORMANCE_INSTRUMENTATION={"ENABLED": False})
+def test_disabled_by_default(lesson):
+    client = Client()
+    assert "Server-Timing" not in client.get("/timed/")
+    assert client.get("/metrics/").status_code == 404
@@ -0,0 +1,129 @@
+import io
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from wagtail.models import Page, Site
+
+from home import lesson_index
+from home.models import HomePage, LessonIndexEntry, LessonIndexTag, LessonPage
+
+
+@pytest.fixture
+def homepage():
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Index Home", slug="index-home")
+    root.add_child(instance=homepage)
+    homepage.save_revision().publish()
+
+    site = Site.objects.first()
+    site.root_page = homepage
+    site.save()
+    return homepage
+
+
+def add_lesson(parent, slug, domain, tags=()):
+    lesson = LessonPage(title=slug.title(), slug=slug, subtitle="Sub", domain=domain)
+    lesson.body = [("paragraph", "<p>Body</p>")]
+    lesson.tags.add(*tags)
+    parent.add_child(instance=lesson)
+    lesson.save_revision().publish()
+    lesson.refresh_from_db()
+    return lesson
+
+
+@pytest.mark.django_db
+def test_publish_indexes_lesson_with_tags(homepage):
+    lesson = add_lesson(homepage, "optics", "physics", tags=["light", "waves"])
+
+    entry = LessonIndexEntry.objects.get(page=lesson)
+    assert (entry.title, entry.subtitle, entry.domain) == ("Optics", "Sub", "physics")
+    assert entry.url_path == lesson.url_path
+    assert len(entry.tag_ids) == 2
+    assert set(LessonIndexTag.objects.values_list("domain", flat=True)) == {"physics"}
+    assert lesson_index.entry_url(entry) == "/optics/"
+
+
+@pytest.mark.django_db
+def test_unpublish_removes_lesson(homepage):
+    lesson = add_lesson(homepage, "optics", "physics", tags=["light"])
+    lesson.unpublish()
+
+    assert not LessonIndexEntry.objects.exists()
+    assert not LessonIndexTag.objects.exists()
+
+
+@pytest.mark.django_db
+def test_filters_and_facets(homepage):
+    add_lesson(homepage, "optics", "physics", tags=["light"])
+    add_lesson(homepage, "lasers", "physics", tags=["light", "quantum"])
+    add_lesson(homepage, "photosynthesis", "biology", tags=["light"])
+
+    light = LessonIndexTag.objects.filter(tag__slug="light").values_list("tag_id", flat=True)[0]
+    titles = [e.title for e in lesson_index.filter_entries(domain="physics", tag_id=light)]
+    assert titles == ["Lasers", "Optics"]
+
+    assert lesson_index.domain_counts(tag_id=light) == [("physics", 2), ("biology", 1)]
+    assert [(name, count) for _, name, _, count in lesson_index.tag_counts("physics")] == [
+        ("light", 2), ("quantum", 1),
+    ]
+
+
+@pytest.mark.django_db
+def test_rebuild_command_repopulates_index(homepage):
+    add_lesson(homepage, "optics", "physics", tags=["light"])
+    LessonIndexEntry.objects.all().delete()
+
+    call_command("rebuild_lesson_index", stdout=io.StringIO())
+
+    assert LessonIndexEntry.objects.get().title == "Optics"
+    assert LessonIndexTag.objects.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("plain_storages")
+def test_lesson_list_view_filters_by_domain(homepage):
+    add_lesson(homepage, "optics", "physics")
+    add_lesson(homepage, "cells", "biology")
+
+    response = Client().get("/lessons/", {"domain": "biology"})
+    assert response.status_code == 200
+    assert [e.title for e in response.context["lessons"]] == ["Cells"]
+    assert b'href="/cells/"' in response.content
+
+    facets = Client().get("/lessons/facets/").json()
+    assert {d["domain"]: d["count"] for d in facets["domains"]} == {"physics": 1, "biology": 1}
+
+
+@pytest.mark.django_db
+def test_publish_stores_body_summary(homepage):
+    lesson = LessonPage(title="Optics", slug="optics", domain="physics")
+    lesson.body = [
+        ("heading", "Refraction"),
+        ("paragraph", "<p>Light <i>bends</i>.</p>"),
+    ]
+    homepage.add_child(instance=lesson)
+    lesson.save_revision().publish()
+
+    entry = LessonIndexEntry.objects.get(page=lesson)
+    assert [heading["text"] for heading in entry.toc] == ["Refraction"]
+    assert entry.excerpt == "Light bends."
+    assert (entry.word_count, entry.reading_time) == (3, 1)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("plain_storages")
+def test_lesson_cards_render_without_loading_bodies(homepage):
+    lesson = LessonPage(title="Optics", slug="optics", domain="physics")
+    lesson.body = [("heading", "Refraction"), ("paragraph", "<p>Light bends.</p>")]
+    homepage.add_child(instance=lesson)
+    lesson.save_revision().publish()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = Client().get("/lessons/")
+
+    assert b"Light bends." in response.content
+    assert b"1 min read" in response.content
+    assert b"<li>Refraction</li>" in response.content
+    assert not any("home_lessonpage" in query["sql"] for query in queries)
@@ -0,0 +1,183 @@
+import json
+
+import pytest
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from wagtail.models import Page, Site
+
+from home.models import HomePage, LessonApiBody, LessonPage
+
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("no_block_cache"),
+]
+
+
+@pytest.fixture
+def no_block_cache():
+    with override_settings(PORPOISE_BLOCK_CACHE=None):
+        yield
+
+
+@pytest.fixture
+def homepage():
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="API Home", slug="api-home")
+    root.add_child(instance=homepage)
+    homepage.save_revision().publish()
+    Site.objects.update(root_page=homepage)
+    Site.clear_site_root_paths_cache()
+    yield homepage
+    Site.clear_site_root_paths_cache()
+
+
+def add_lesson(parent, title, domain="physics", tags=(), body=None):
+    lesson = LessonPage(title=title, slug=title.lower().replace(" ", "-"), subtitle="Sub", domain=domain)
+    lesson.body = body or [("heading", title), ("paragraph", f"<p>About {title}.</p>")]
+    lesson.tags.add(*tags)
+    parent.add_child(instance=lesson)
+    lesson.save_revision().publish()
+    return LessonPage.objects.get(pk=lesson.pk)
+
+
+def get_json(client, url, **headers):
+    response = client.get(url, **headers)
+    return response, json.loads(response.content) if response.content else None
+
+
+def test_list_returns_listing_fields(homepage):
+    add_lesson(homepage, "Optics", tags=["light"])
+    add_lesson(homepage, "Acoustics", tags=["sound"])
+
+    response, data = get_json(Client(), "/api/lessons/")
+
+    assert response.status_code == 200
+    assert [lesson["title"] for lesson in data["results"]] == ["Acoustics", "Optics"]
+    optics = data["results"][1]
+    assert set(optics) == {"id", "title", "subtitle", "domain", "tags", "url"}
+    assert optics["url"] == "/optics/"
+    assert [tag["name"] for tag in optics["tags"]] == ["light"]
+    assert data["next"] is None
+
+
+def test_list_never_loads_body(homepage):
+    add_lesson(homepage, "Optics")
+
+    with CaptureQueriesContext(connection) as queries:
+        response, data = get_json(Client(), "/api/lessons/?fields=id,title,excerpt")
+
+    assert data["results"][0]["excerpt"] == "About Optics."
+    assert set(data["results"][0]) == {"id", "title", "excerpt"}
+    sql = " ".join(query["sql"] for query in queries)
+    assert "lessonapibody" not in sql
+    assert '"body"' not in sql
+    assert '"toc"' not in sql
+
+    response, data = get_json(Client(), "/api/lessons/?fields=title,body")
+    assert response.status_code == 400
+
+
+def test_unknown_field_is_rejected(homepage):
+    response, data = get_json(Client(), "/api/lessons/?fields=title,secret")
+    assert response.status_code == 400
+    assert data == {"error": "Unknown fields: secret."}
+
+
+def test_list_filters_and_pages_with_cursor(homepage):
+    for number in range(5):
+        add_lesson(homepage, f"Lesson {number}", domain="physics" if number % 2 else "maths")
+
+    client = Client()
+    response, data = get_json(client, "/api/lessons/?limit=2&fields=title")
+    titles = [lesson["title"] for lesson in data["results"]]
+    while data["next"]:
+        response, data = get_json(client, data["next"])
+        titles += [lesson["title"] for lesson in data["results"]]
+    assert titles == [f"Lesson {number}" for number in range(5)]
+
+    response, data = get_json(client, "/api/lessons/?domain=physics&fields=title")
+    assert [lesson["title"] for lesson in data["results"]] == ["Lesson 1", "Lesson 3"]
+
+    response, data = get_json(client, "/api/lessons/?cursor=forged")
+    assert response.status_code == 400
+
+
+def test_detail_serves_body_stored_at_publish(homepage):
+    lesson = add_lesson(homepage, "Optics", body=[
+        ("heading", "Light"),
+        ("paragraph", f'<p>See <a linktype="page" id="{homepage.pk}">home</a>.</p>'),
+        ("code", {"language": "python", "code": "x = 1", "style": "default"}),
+    ])
+    stored = LessonApiBody.objects.get(pk=lesson.pk)
+
+    response, data = get_json(Client(), f"/api/lessons/{lesson.pk}/")
+
+    assert response.status_code == 200
+    assert data["title"] == "Optics"
+    assert data["toc"] == [{"text": "Light", "id": data["body"][0]["id"]}]
+    assert data["body"] == json.loads(stored.blocks)
+    heading, paragraph, code = data["body"]
+    assert (heading["type"], heading["value"]) == ("heading", "Light")
+    assert paragraph["value"] == '<p>See <a href="/">home</a>.</p>'
+    assert code["value"]["code"] == "x = 1"
+    assert 'class="highlight' in code["html"]
+
+
+@override_settings(PORPOISE_LATEX_RENDERER={"BACKEND": "porpoise_blocks.latex.LocalLatexRenderer"})
+def test_detail_body_has_latex_typeset_after_publish(homepage, django_capture_on_commit_callbacks):
+    lesson = LessonPage(title="Maths", slug="maths", domain="math")
+    lesson.body = [("latex", r"$$E=mc^2$$")]
+    homepage.add_child(instance=lesson)
+    # The typesetting task is enqueued on commit, after the index is written.
+    with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+        lesson.save_revision().publish()
+
+    response, data = get_json(Client(), f"/api/lessons/{lesson.pk}/")
+
+    assert "latex-prerendered" in data["body"][0]["html"]
+
+
+def test_detail_sparse_fields(homepage):
+    lesson = add_lesson(homepage, "Optics")
+
+    response, data = get_json(Client(), f"/api/lessons/{lesson.pk}/?fields=title")
+    assert data == {"title": "Optics"}
+
+    response, data = get_json(Client(), f"/api/lessons/{lesson.pk}/?fields=body")
+    assert list(data) == ["body"]
+
+
+def test_detail_etag(homepage):
+    lesson = add_lesson(homepage, "Optics")
+    client = Client()
+    url = f"/api/lessons/{lesson.pk}/"
+
+    response = client.get(url)
+    etag = response["ETag"]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    assert "lessonapibody\".\"blocks" not in " ".join(query["sql"] for query in queries).lower()
+
+    # Another field set is another representation.
+    assert client.get(f"{url}?fields=title")["ETag"] != etag
+
+    lesson.body = [("paragraph", "<p>Rewritten.</p>")]
+    lesson.save_revision().publish()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert json.loads(response.content)["body"][0]["value"] == "<p>Rewritten.</p>"
+
+
+def test_unpublished_lesson_is_not_found(homepage):
+    lesson = add_lesson(homepage, "Optics")
+    lesson.unpublish()
+
+    response, data = get_json(Client(), f"/api/lessons/{lesson.pk}/")
+    assert response.status_code == 404
+    assert not LessonApiBody.objects.exists()
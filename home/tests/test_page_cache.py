@@ -0,0 +1,116 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, Client, override_settings
+from wagtail.models import Page, Site
+
+from home.models import HomePage, LessonPage
+
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("clear_cache", "plain_storages"),
+]
+
+
+@pytest.fixture
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def lesson():
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Cache Home", slug="cache-home")
+    root.add_child(instance=homepage)
+    homepage.save_revision().publish()
+
+    site = Site.objects.first()
+    site.root_page = homepage
+    site.save()
+
+    lesson = LessonPage(title="Cached Lesson", slug="cached-lesson", domain="physics")
+    lesson.body = [("paragraph", "<p>First version.</p>")]
+    homepage.add_child(instance=lesson)
+    lesson.save_revision().publish()
+    lesson.refresh_from_db()
+    return lesson
+
+
+@override_settings(LESSON_PAGE_CACHE={"ENABLED": True})
+def test_second_request_is_served_from_cache(lesson):
+    client = Client()
+    first = client.get("/cached-lesson/")
+    second = client.get("/cached-lesson/")
+
+    assert first.status_code == second.status_code == 200
+    assert "X-Lesson-Cache" not in first
+    assert second["X-Lesson-Cache"] == "hit"
+    assert second.content == first.content
+    assert second["ETag"] == first["ETag"]
+    assert "Last-Modified" in second
+
+
+@override_settings(LESSON_PAGE_CACHE={"ENABLED": True})
+def test_async_requests_share_the_cache(lesson):
+    sync_response = Client().get("/cached-lesson/")
+    get = async_to_sync(AsyncClient().get)
+    first = get("/cached-lesson/")
+    second = get("/cached-lesson/")
+
+    assert first.status_code == second.status_code == 200
+    assert first["X-Lesson-Cache"] == second["X-Lesson-Cache"] == "hit"
+    assert second.content == sync_response.content
+    assert second["ETag"] == sync_response["ETag"]
+
+
+@override_settings(LESSON_PAGE_CACHE={"ENABLED": True})
+def test_conditional_request_returns_not_modified(lesson):
+    client = Client()
+    etag = client.get("/cached-lesson/")["ETag"]
+
+    response = client.get("/cached-lesson/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+
+@override_settings(LESSON_PAGE_CACHE={"ENABLED": True})
+def test_publish_invalidates_cached_response(lesson):
+    client = Client()
+    client.get("/cached-lesson/")
+
+    lesson.body = [("paragraph", "<p>Second version.</p>")]
+    lesson.save_revision().publish()
+
+    response = client.get("/cached-lesson/")
+    assert "X-Lesson-Cache" not in response
+    assert b"Second version." in response.content
+
+
+@override_settings(LESSON_PAGE_CACHE={"ENABLED": True})
+def test_unpublish_invalidates_cached_response(lesson):
+    client = Client()
+    client.get("/cached-lesson/")
+
+    lesson.unpublish()
+
+    assert client.get("/cached-lesson/").status_code == 404
+
+
+@override_settings(LESSON_PAGE_CACHE={"ENABLED": True})
+def test_tag_change_invalidates_cached_response(lesson):
+    client = Client()
+    client.get("/cached-lesson/")
+
+    lesson.tags.add("kinematics")
+    lesson.save()
+
+    assert "X-Lesson-Cache" not in client.get("/cached-lesson/")
+
+
+@override_settings(LESSON_PAGE_CACHE={"ENABLED": False})
+def test_cache_disabled_by_default(lesson):
+    client = Client()
+    client.get("/cached-lesson/")
+    assert "X-Lesson-Cache" not in client.get("/cached-lesson/")
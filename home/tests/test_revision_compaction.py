@@ -0,0 +1,191 @@
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from wagtail.models import Page, Revision
+
+from home import revisions
+from home.models import HomePage, LessonPage, RevisionDelta
+
+
+pytestmark = pytest.mark.django_db
+
+# A few hundred bytes, like a real paragraph.
+FILLER = "Light travels in straight lines until it meets a surface. " * 6
+
+POLICY = {"KEEP_LATEST": 3, "KEEP_DAYS": 7, "SNAPSHOT_INTERVAL": 10, "DELETE_AFTER_DAYS": None}
+
+
+@pytest.fixture
+def lesson():
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Revisions Home", slug="revisions-home")
+    root.add_child(instance=homepage)
+    lesson = LessonPage(title="Optics", slug="optics", domain="physics")
+    lesson.body = [
+        ("paragraph", f"<p>Paragraph {number}, version 0. {FILLER}</p>") for number in range(12)
+    ]
+    homepage.add_child(instance=lesson)
+    lesson.save_revision().publish()
+    return lesson
+
+
+def edit(lesson, count):
+    """Save ``count`` revisions, each rewriting one block, dated a day apart going back."""
+    for version in range(1, count + 1):
+        lesson = LessonPage.objects.get(pk=lesson.pk).get_latest_revision_as_object()
+        index = version % len(lesson.body)
+        lesson.body[index].value = lesson.body[index].block.to_python(
+            f"<p>Paragraph {index}, version {version}. {FILLER}</p>"
+        )
+        lesson.title = f"Optics {version}"
+        lesson.save_revision()
+    revision_ids = list(lesson.revisions.order_by("-created_at", "-pk").values_list("pk", flat=True))
+    now = timezone.now()
+    for age, revision_id in enumerate(revision_ids):
+        Revision.objects.filter(pk=revision_id).update(
+            created_at=now - timedelta(days=age, hours=12)
+        )
+    return LessonPage.objects.get(pk=lesson.pk)
+
+
+def snapshot(lesson):
+    return {revision.pk: revision.as_object() for revision in lesson.revisions.all()}
+
+
+def assert_same_pages(before, after):
+    assert before.keys() == after.keys()
+    for revision_id, page in before.items():
+        assert after[revision_id].title == page.title
+        assert after[revision_id].body.get_prep_value() == page.body.get_prep_value()
+
+
+def test_compaction_round_trips_every_revision(lesson):
+    lesson = edit(lesson, 30)
+    before = snapshot(lesson)
+    contents = dict(lesson.revisions.values_list("pk", "content"))
+
+    stats = revisions.compact_page(lesson, policy=POLICY)
+
+    # 31 revisions: the 7 newest (KEEP_DAYS) and the live one, the oldest,
+    # are kept. Of the other 23, one in ten stays whole as a base.
+    assert stats["compacted"] == 20
+    assert RevisionDelta.objects.count() == 20
+    # Up to 9 of the 12 blocks differ from the base; each other one is an id.
+    assert stats["stored_size"] * 2 < stats["full_size"]
+    assert_same_pages(before, snapshot(lesson))
+    for revision_id, content in lesson.revisions.values_list("pk", "content"):
+        expanded = revisions.expand_content(content)
+        assert json.loads(expanded.pop("body")) == json.loads(contents[revision_id].pop("body"))
+        assert expanded == contents[revision_id]
+
+    # Bases are whole, and nothing is compacted twice.
+    for delta in RevisionDelta.objects.select_related("base"):
+        assert not revisions.is_delta(delta.base.content)
+    assert revisions.compact_page(lesson, policy=POLICY)["compacted"] == 0
+
+
+def test_kept_revisions_stay_whole(lesson):
+    lesson = edit(lesson, 30)
+    live_revision = lesson.live_revision
+    scheduled = lesson.revisions.order_by("created_at")[5]
+    scheduled.approved_go_live_at = timezone.now() + timedelta(days=1)
+    scheduled.save()
+
+    revisions.compact_page(lesson, policy=POLICY)
+
+    compacted = set(RevisionDelta.objects.values_list("pk", flat=True))
+    newest = set(lesson.revisions.order_by("-created_at")[:7].values_list("pk", flat=True))
+    assert not compacted & newest
+    assert live_revision.pk not in compacted
+    assert scheduled.pk not in compacted
+
+
+def test_compacted_revision_can_be_reverted_to_and_published(lesson):
+    lesson = edit(lesson, 30)
+    revisions.compact_page(lesson, policy=POLICY)
+    revision = Revision.objects.get(pk=RevisionDelta.objects.order_by("pk").last().pk)
+    expected = revision.as_object()
+
+    revision.as_object().save_revision().publish()
+
+    lesson = LessonPage.objects.get(pk=lesson.pk)
+    assert lesson.title == expected.title
+    assert lesson.body.get_prep_value() == expected.body.get_prep_value()
+
+
+def test_deleting_a_base_restores_its_revisions(lesson):
+    lesson = edit(lesson, 30)
+    revisions.compact_page(lesson, policy=POLICY)
+    before = snapshot(lesson)
+    base = RevisionDelta.objects.first().base
+    dependents = set(RevisionDelta.objects.filter(base=base).values_list("pk", flat=True))
+
+    del before[base.pk]
+    base.delete()
+
+    assert_same_pages(before, snapshot(lesson))
+    assert not RevisionDelta.objects.filter(pk__in=dependents).exists()
+    for content in Revision.objects.filter(pk__in=dependents).values_list("content", flat=True):
+        assert not revisions.is_delta(content)
+
+
+def test_copied_revisions_are_stored_whole(lesson):
+    lesson = edit(lesson, 30)
+    revisions.compact_page(lesson, policy=POLICY)
+
+    copy = lesson.copy(update_attrs={"slug": "optics-copy"}, copy_revisions=True)
+
+    copied = copy.revisions.exclude(pk=copy.latest_revision_id).order_by("pk")
+    assert copied.count() == 31
+    assert not any(revisions.is_delta(content) for content in copied.values_list("content", flat=True))
+    originals = [revision.as_object() for revision in lesson.revisions.order_by("pk")]
+    assert_same_pages(
+        dict(enumerate(originals)),
+        dict(enumerate(revision.as_object() for revision in copied)),
+    )
+
+
+def test_command_deletes_expired_revisions(lesson):
+    lesson = edit(lesson, 30)
+    policy = {**POLICY, "DELETE_AFTER_DAYS": 25}
+
+    with override_settings(LESSON_REVISION_RETENTION=policy):
+        out = io.StringIO()
+        call_command("compact_revisions", "--dry-run", stdout=out)
+        assert "Would compact 16 revisions" in out.getvalue()
+        assert "would delete 5" in out.getvalue()
+        assert lesson.revisions.count() == 31
+        assert not RevisionDelta.objects.exists()
+
+        call_command("compact_revisions", "--page", str(lesson.pk), stdout=io.StringIO())
+
+    remaining = lesson.revisions.order_by("created_at")
+    # Ages 25 to 29 days are deleted; of ages 7 to 24, two runs leave a base.
+    assert remaining.count() == 26
+    assert RevisionDelta.objects.count() == 16
+    # The live revision is the oldest, and is kept.
+    assert remaining.first().pk == lesson.live_revision_id
+
+
+@pytest.mark.usefixtures("plain_storages")
+def test_history_view_does_not_load_revision_content(lesson):
+    lesson = edit(lesson, 5)
+    user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+    client = Client()
+    client.force_login(user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"/admin/pages/{lesson.pk}/history/")
+
+    assert response.status_code == 200
+    assert b"Optics" in response.content
+    sql = " ".join(query["sql"] for query in queries)
+    assert '"wagtailcore_revision"."content"' not in sql
@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import patch
+
+from wagtail.models import Page
+
+from home.models import HomePage, LessonPage
+
+
+@pytest.fixture
+def homepage():
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Indexing Home", slug="indexing-home")
+    root.add_child(instance=homepage)
+    return homepage
+
+
+def search(query):
+    return [page.slug for page in LessonPage.objects.live().search(query)]
+
+
+@pytest.mark.django_db
+def test_published_block_text_is_searchable(homepage, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        lesson = LessonPage(title="Refraction", slug="refraction", domain="physics")
+        lesson.body = [
+            ("quote", {"quote": "<p>Nature is simple</p>", "attribution": "Fresnel"}),
+            ("code", {"language": "python", "code": "snell_angle()", "caption": "optics.py"}),
+        ]
+        homepage.add_child(instance=lesson)
+        lesson.save_revision().publish()
+
+    assert search("Fresnel") == ["refraction"]
+    assert search("snell_angle") == ["refraction"]
+
+
+@pytest.mark.django_db
+def test_only_publish_reindexes(homepage, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        lesson = LessonPage(title="Lenses", slug="lenses", domain="physics")
+        lesson.body = [("paragraph", "<p>Convex</p>")]
+        homepage.add_child(instance=lesson)
+
+    with patch("wagtail.search.index.insert_or_update_object") as update:
+        with django_capture_on_commit_callbacks(execute=True):
+            lesson.body = [("paragraph", "<p>Concave</p>")]
+            lesson.save_revision()
+        update.assert_not_called()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            lesson.save_revision().publish()
+        update.assert_called_once()
@@ -0,0 +1,151 @@
+import io
+import json
+import os
+import runpy
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.template import engines
+
+from home.management.commands import profile_imports
+from lesson_space import warmup
+
+
+CONFIG = os.path.join(settings.BASE_DIR, "gunicorn.conf.py")
+
+
+def load_config(monkeypatch, **environ):
+    for name in list(os.environ):
+        if name.startswith(("GUNICORN_", "WEB_CONCURRENCY")):
+            monkeypatch.delenv(name)
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(CONFIG)
+
+
+def test_config_defaults(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1}, raising=False)
+    config = load_config(monkeypatch, PORT="9000")
+
+    assert config["bind"] == "0.0.0.0:9000"
+    assert config["workers"] == 5
+    assert config["preload_app"] is True
+    assert config["max_requests"] == 1000
+    assert config["max_requests_jitter"] == 100
+
+
+def test_config_from_environment(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1}, raising=False)
+    config = load_config(
+        monkeypatch,
+        GUNICORN_WORKER_CLASS="uvicorn_worker.UvicornWorker",
+        GUNICORN_PRELOAD="0",
+        GUNICORN_ACCESS_LOG="",
+    )
+    assert config["workers"] == 2
+    assert config["preload_app"] is False
+    assert config["accesslog"] is None
+
+    assert load_config(monkeypatch, WEB_CONCURRENCY="3")["workers"] == 3
+
+
+def test_project_template_names():
+    names = warmup.project_template_names()
+
+    assert "base.html" in names
+    assert "home/lesson_page.html" in names
+    assert "porpoise_blocks/code_block.html" in names
+    assert not any(name.startswith("wagtailadmin/") for name in names)
+
+
+def test_stream_blocks_covers_nested_blocks():
+    names = {block.name for block in warmup.stream_blocks()}
+
+    assert {"paragraph", "code", "callout"} <= names
+
+
+@pytest.mark.django_db
+def test_warmup_runs_without_queries(django_assert_num_queries):
+    with django_assert_num_queries(0):
+        timings = warmup.run()
+
+    assert set(timings) == {name for name, _ in warmup.STEPS}
+    assert all(seconds >= 0 for seconds in timings.values())
+    # The cached loader now holds the project's templates.
+    assert engines["django"].engine.template_loaders[0].get_template_cache
+
+
+SERVING_PROBE = """
+import sys
+import django
+from django.apps import apps
+from django.template.loader import get_template
+from django.urls import NoReverseMatch, resolve, reverse
+from wagtail import hooks
+
+django.setup()
+assert not apps.is_installed("wagtail.admin")
+assert resolve("/search/lessons/").url_name == "lesson_search"
+for name in ("wagtailadmin_home", "admin:index"):
+    try:
+        reverse(name)
+    except NoReverseMatch:
+        continue
+    raise AssertionError(f"{name} is routed")
+get_template("base.html")
+get_template("home/home_page.html")
+hooks.search_for_hooks()
+assert "wagtail_modeladmin.options" not in sys.modules
+assert "wagtail.admin.urls" not in sys.modules
+"""
+
+
+def test_serving_profile_has_no_admin():
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "lesson_space.settings.serving"}
+    result = subprocess.run(
+        [sys.executable, "-c", SERVING_PROBE],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+
+
+def test_parse_importtime():
+    lines = [
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 | encodings",
+        f"{profile_imports.STAGE_MARKER} settings 1.0",
+        "import time:        20 |         20 |     django.utils",
+        "import time:        30 |         50 |   django",
+        f"{profile_imports.STAGE_MARKER} apps 1.5",
+        "import time:       400 |        400 | wagtail.admin.panels",
+        f"{profile_imports.STAGE_MARKER} end 2.5",
+    ]
+
+    imports, stage_seconds = profile_imports.parse_importtime(lines)
+
+    assert [(i["module"], i["stage"], i["self_us"]) for i in imports] == [
+        ("encodings", "interpreter", 100),
+        ("django.utils", "settings", 20),
+        ("django", "settings", 30),
+        ("wagtail.admin.panels", "apps", 400),
+    ]
+    assert imports[2]["cumulative_us"] == 50
+    assert stage_seconds == {"settings": 0.5, "apps": 1.0}
+
+
+def test_profile_imports_command():
+    out = io.StringIO()
+    call_command("profile_imports", "--json", "--limit", "5", stdout=out)
+    report = json.loads(out.getvalue())
+
+    assert report["modules"] > 100
+    assert {"settings", "apps", "urls", "hooks"} <= set(report["stages"])
+    assert len(report["top_modules"]) == 5
+    assert "django.db" in report["top_packages"] or len(report["top_packages"]) == 5
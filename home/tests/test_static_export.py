@@ -0,0 +1,143 @@
+import io
+import json
+import os
+
+import pytest
+from django.core.management import call_command
+from wagtail.models import Page, Site
+
+from home.models import HomePage, LessonPage
+from home.static_export import MANIFEST_NAME
+
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("plain_storages", "no_block_cache"),
+]
+
+
+@pytest.fixture
+def no_block_cache(settings):
+    settings.PORPOISE_BLOCK_CACHE = None
+
+
+@pytest.fixture
+def site(django_capture_on_commit_callbacks):
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Static Home", slug="static-home")
+    root.add_child(instance=homepage)
+    homepage.save_revision().publish()
+    Site.objects.update(root_page=homepage)
+    Site.clear_site_root_paths_cache()
+
+    lessons = []
+    for number in range(3):
+        lesson = LessonPage(title=f"Lesson {number}", slug=f"lesson-{number}", domain="physics")
+        lesson.body = [("paragraph", f"<p>Lesson number {number}.</p>")]
+        homepage.add_child(instance=lesson)
+        lessons.append(lesson)
+    # Lesson 2 links to lesson 0. The reference index is written on commit.
+    lessons[2].body = [(
+        "paragraph", f'<p>See <a linktype="page" id="{lessons[0].pk}">the first lesson</a>.</p>',
+    )]
+    with django_capture_on_commit_callbacks(execute=True):
+        for lesson in lessons:
+            lesson.save_revision().publish()
+    yield homepage, [LessonPage.objects.get(pk=lesson.pk) for lesson in lessons]
+    Site.clear_site_root_paths_cache()
+
+
+def export(output_dir, processes=1, **options):
+    out = io.StringIO()
+    call_command("export_static", str(output_dir), processes=processes, stdout=out, **options)
+    return out.getvalue()
+
+
+def read(output_dir, *parts):
+    with open(os.path.join(output_dir, *parts), encoding="utf-8") as exported:
+        return exported.read()
+
+
+def test_export_writes_every_live_page(site, tmp_path):
+    output = export(tmp_path)
+
+    assert "Exported 4 pages" in output
+    assert "4 rendered, 4 written, 0 removed" in output
+    assert "Lesson number 1." in read(tmp_path, "lesson-1", "index.html")
+    assert '<a href="/lesson-0/">the first lesson</a>' in read(tmp_path, "lesson-2", "index.html")
+    assert "<html" in read(tmp_path, "index.html")
+
+    manifest = json.loads(read(tmp_path, MANIFEST_NAME))
+    assert sorted(entry["path"] for entry in manifest["pages"].values()) == [
+        "index.html",
+        os.path.join("lesson-0", "index.html"),
+        os.path.join("lesson-1", "index.html"),
+        os.path.join("lesson-2", "index.html"),
+    ]
+
+
+def test_export_renders_in_worker_processes(site, tmp_path):
+    output = export(tmp_path, processes=2)
+
+    assert "4 rendered, 4 written, 0 removed" in output
+    assert "Lesson number 1." in read(tmp_path, "lesson-1", "index.html")
+    assert '<a href="/lesson-0/">the first lesson</a>' in read(tmp_path, "lesson-2", "index.html")
+
+
+def test_second_run_renders_nothing(site, tmp_path):
+    export(tmp_path)
+
+    assert "0 rendered, 0 written, 0 removed" in export(tmp_path)
+
+
+def test_republished_page_is_rendered_again(site, tmp_path):
+    homepage, lessons = site
+    export(tmp_path)
+
+    lessons[1].body = [("paragraph", "<p>Edited.</p>")]
+    lessons[1].save_revision().publish()
+
+    assert "1 rendered, 1 written" in export(tmp_path)
+    assert "Edited." in read(tmp_path, "lesson-1", "index.html")
+
+
+def test_moving_a_linked_page_renders_the_pages_linking_to_it(site, tmp_path):
+    homepage, lessons = site
+    export(tmp_path)
+
+    lessons[0].slug = "lesson-zero"
+    lessons[0].save_revision().publish()
+
+    # Lesson 0 itself, and lesson 2 whose link changed.
+    assert "2 rendered, 2 written, 1 removed" in export(tmp_path)
+    assert '<a href="/lesson-zero/">' in read(tmp_path, "lesson-2", "index.html")
+    assert not os.path.exists(tmp_path / "lesson-0")
+
+
+def test_unchanged_html_is_not_rewritten(site, tmp_path):
+    homepage, lessons = site
+    export(tmp_path)
+    path = tmp_path / "lesson-1" / "index.html"
+    os.utime(path, (0, 0))
+
+    # Publishing without changes gives a new fingerprint and the same HTML.
+    lessons[1].save_revision().publish()
+
+    assert "1 rendered, 0 written" in export(tmp_path)
+    assert os.stat(path).st_mtime == 0
+
+
+def test_unpublished_page_is_removed(site, tmp_path):
+    homepage, lessons = site
+    export(tmp_path)
+
+    lessons[1].unpublish()
+
+    assert "0 rendered, 0 written, 1 removed" in export(tmp_path)
+    assert not os.path.exists(tmp_path / "lesson-1")
+
+
+def test_force_renders_everything(site, tmp_path):
+    export(tmp_path)
+
+    assert "4 rendered, 0 written" in export(tmp_path, force=True)
@@ -0,0 +1,64 @@
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+from taggit.models import Tag
+
+from . import lesson_index
+
+
+def _filters(request):
+    domain = request.GET.get("domain") or None
+    tag = None
+    tag_slug = request.GET.get("tag")
+    if tag_slug:
+        tag = Tag.objects.filter(slug=tag_slug).only("id", "name", "slug").first()
+    return domain, tag
+
+
+def lesson_list(request):
+    domain, tag = _filters(request)
+    if request.GET.get("tag") and tag is None:
+        entries = lesson_index.filter_entries().none()
+    else:
+        entries = lesson_index.filter_entries(domain, tag.pk if tag else None)
+
+    # Pagination
+    paginator = Paginator(entries, 20)
+    page = request.GET.get("page", 1)
+    try:
+        lessons = paginator.page(page)
+    except PageNotAnInteger:
+        lessons = paginator.page(1)
+    except EmptyPage:
+        lessons = paginator.page(paginator.num_pages)
+
+    for entry in lessons:
+        entry.url = lesson_index.entry_url(entry, request)
+
+    return TemplateResponse(
+        request,
+        "home/lesson_list.html",
+        {
+            "lessons": lessons,
+            "domain": domain,
+            "tag": tag,
+            "domain_facets": lesson_index.domain_counts(tag.pk if tag else None),
+            "tag_facets": lesson_index.tag_counts(domain),
+        },
+    )
+
+
+def lesson_facets(request):
+    domain, tag = _filters(request)
+    return JsonResponse(
+        {
+            "domains": [
+                {"domain": name, "count": count}
+                for name, count in lesson_index.domain_counts(tag.pk if tag else None)
+            ],
+            "tags": [
+                {"id": tag_id, "name": name, "slug": slug, "count": count}
+                for tag_id, name, slug, count in lesson_index.tag_counts(domain)
+            ],
+        }
+    )
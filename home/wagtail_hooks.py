@@ -1,19 +1,14 @@
-from wagtail_modeladmin.options import (
-    ModelAdmin, modeladmin_register
-)
+from django.apps import apps
+from wagtail import hooks
 
-from .models import LessonPage
+from . import page_cache
 
 
-class LessonPageAdmin(ModelAdmin):
-    model = LessonPage
-    menu_label = "Lessons"
-    menu_icon = "doc-full"  # You can pick from https://docs.wagtail.org/en/stable/topics/icons.html
-    menu_order = 200
-    add_to_settings_menu = False
-    exclude_from_explorer = False
-    list_display = ("title", "subtitle", "domain")
-    search_fields = ("title", "subtitle", "domain", "tags__name")
+if apps.is_installed("wagtail_modeladmin"):
+    # Not installed on serving nodes (lesson_space/settings/serving.py).
+    from . import lesson_admin  # noqa: F401
 
 
-modeladmin_register(LessonPageAdmin)
+@hooks.register("before_serve_page")
+def remember_lesson_cache_generation(page, request, serve_args, serve_kwargs):
+    page_cache.remember_generation(page, request)
@@ -0,0 +1,19 @@
+"""
+ASGI config for lesson_space project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+See docs/SERVING.md for running it under uvicorn or gunicorn.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "lesson_space.settings.dev")
+# Serve the async search views (see lesson_space/settings/base.py).
+os.environ.setdefault("ASYNC_VIEWS", "1")
+
+application = get_asgi_application()
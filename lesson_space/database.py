@@ -0,0 +1,179 @@
+"""
+Database settings from the environment (used by lesson_space/settings/base.py).
+
+``DATABASE_ENGINE`` selects the backend: ``sqlite`` (the default, a file in
+the project directory) or ``postgresql``. PostgreSQL takes its connection
+parameters from the standard libpq variables (``PGHOST``, ``PGPORT``,
+``PGDATABASE``, ``PGUSER``, ``PGPASSWORD``), so the same variables work for
+``psql`` and for the application.
+
+A PostgreSQL connection is reused in one of two ways:
+
+* ``DATABASE_POOL=1``: a psycopg connection pool per process
+  (``DATABASE_POOL_MIN_SIZE`` / ``DATABASE_POOL_MAX_SIZE``, ``DATABASE_POOL_TIMEOUT``
+  seconds to wait for a free connection). Requires ``psycopg[pool]``. Suited to
+  threaded or async workers, where several requests in a process need a
+  connection at the same time.
+* otherwise, persistent connections: each thread keeps its connection for
+  ``DATABASE_CONN_MAX_AGE`` seconds (default 60) and checks it before reuse.
+  Suited to sync workers, which only ever need one.
+
+Django doesn't allow both at once.
+
+SQLite can be tuned for several concurrent workers on one node with
+``SQLITE_CONCURRENT_MODE=1``:
+
+* WAL journaling, so readers never block the writer or each other, with
+  ``synchronous=NORMAL`` (durable at checkpoints, never corrupt) and a larger
+  page cache and memory map;
+* ``BEGIN IMMEDIATE`` for every transaction, so a writer takes the write
+  lock up front and waits for it (up to ``SQLITE_BUSY_TIMEOUT`` seconds)
+  rather than failing with "database is locked" when it tries to upgrade a
+  read lock mid-transaction;
+* a second, read-only ``replica`` connection to the same file, which
+  ``ReadWriteRouter`` uses for most reads. Writes go through the
+  serialized ``default`` connection.
+"""
+import os
+import pathlib
+
+
+def _int(environ, name, default):
+    value = environ.get(name, "")
+    return int(value) if value else default
+
+
+def postgresql(environ):
+    config = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": environ.get("PGDATABASE", "lesson_space"),
+        "USER": environ.get("PGUSER", ""),
+        "PASSWORD": environ.get("PGPASSWORD", ""),
+        "HOST": environ.get("PGHOST", ""),
+        "PORT": environ.get("PGPORT", ""),
+        "OPTIONS": {},
+    }
+    if environ.get("DATABASE_POOL", "") == "1":
+        config["CONN_MAX_AGE"] = 0
+        config["OPTIONS"]["pool"] = {
+            "min_size": _int(environ, "DATABASE_POOL_MIN_SIZE", 2),
+            "max_size": _int(environ, "DATABASE_POOL_MAX_SIZE", 10),
+            "timeout": _int(environ, "DATABASE_POOL_TIMEOUT", 10),
+        }
+    else:
+        config["CONN_MAX_AGE"] = _int(environ, "DATABASE_CONN_MAX_AGE", 60)
+        config["CONN_HEALTH_CHECKS"] = True
+    return config
+
+
+SQLITE_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # KiB, i.e. 64 MB per connection
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+def _pragmas(pragmas):
+    return ";".join(f"PRAGMA {name}={value}" for name, value in pragmas.items())
+
+
+def sqlite(environ, base_dir):
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": environ.get("SQLITE_PATH", os.path.join(base_dir, "db.sqlite3")),
+    }
+
+
+def sqlite_concurrent(environ, base_dir):
+    """``default`` (read-write, serialized) and ``replica`` (read-only) aliases."""
+    default = sqlite(environ, base_dir)
+    timeout = _int(environ, "SQLITE_BUSY_TIMEOUT", 20)
+    default["OPTIONS"] = {
+        "transaction_mode": "IMMEDIATE",
+        "timeout": timeout,
+        # journal_mode is stored in the file, so only the writer sets it.
+        "init_command": _pragmas({"journal_mode": "WAL", **SQLITE_PRAGMAS}),
+    }
+    replica = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": f"{pathlib.Path(default['NAME']).resolve().as_uri()}?mode=ro",
+        "OPTIONS": {
+            "timeout": timeout,
+            "init_command": _pragmas({"query_only": "ON", **SQLITE_PRAGMAS}),
+        },
+        "TEST": {"MIRROR": "default"},
+    }
+    return {"default": default, "replica": replica}
+
+
+def _sqlite_concurrent_mode(environ):
+    return (
+        environ.get("DATABASE_ENGINE", "sqlite") == "sqlite"
+        and environ.get("SQLITE_CONCURRENT_MODE", "") == "1"
+    )
+
+
+def databases(base_dir, environ=os.environ):
+    engine = environ.get("DATABASE_ENGINE", "sqlite")
+    if engine == "postgresql":
+        return {"default": postgresql(environ)}
+    if engine == "sqlite":
+        if _sqlite_concurrent_mode(environ):
+            return sqlite_concurrent(environ, base_dir)
+        return {"default": sqlite(environ, base_dir)}
+    raise ValueError(f"DATABASE_ENGINE must be 'sqlite' or 'postgresql', not {engine!r}")
+
+
+def routers(environ=os.environ):
+    if _sqlite_concurrent_mode(environ):
+        return ["lesson_space.database.ReadWriteRouter"]
+    return []
+
+
+class ReadWriteRouter:
+    """
+    Reads go to ``replica``, with two exceptions that stay on ``default``:
+
+    * reads inside a transaction on ``default``, which must see its
+      uncommitted writes (and already hold the write lock);
+    * reads tied to an instance (related managers, ``refresh_from_db``).
+      Generic relation managers pin their queryset to the read alias and
+      some callers write through it, e.g. ``page.revisions.update(...)``
+      when Wagtail publishes.
+
+    Everything else goes to ``default``.
+    """
+
+    read_alias = "replica"
+    write_alias = "default"
+
+    def db_for_read(self, model, **hints):
+        from django.db import connections
+
+        if "instance" in hints or connections[self.write_alias].in_atomic_block:
+            return self.write_alias
+        return self.read_alias
+
+    def db_for_write(self, model, **hints):
+        return self.write_alias
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == self.write_alias
+
+
+def search_backends(environ=os.environ):
+    """
+    The Wagtail search backend for the selected database. On PostgreSQL,
+    ``SEARCH_CONFIG`` is the text search configuration used to index and to
+    query (stemming and stop words; run ``manage.py update_index`` after
+    changing it). SQLite uses FTS5 and ignores it.
+    """
+    backend = {"BACKEND": "wagtail.search.backends.database"}
+    if environ.get("DATABASE_ENGINE", "sqlite") == "postgresql":
+        backend["SEARCH_CONFIG"] = environ.get("SEARCH_CONFIG", "english")
+    return {"default": backend}
@@ -0,0 +1,194 @@
+"""
+Opt-in request instrumentation.
+
+With ``PERFORMANCE_INSTRUMENTATION["ENABLED"]`` set, ``InstrumentationMiddleware``
+measures for every request:
+
+* the number of SQL queries and the time spent in them (all connections);
+* the time spent rendering the TemplateResponse (which includes blocks);
+* the render time of each StreamField child rendered through
+  porpoise_blocks' ``render_stream``, by block type (cache hits aren't
+  rendered, so they aren't counted);
+* the total time spent in the rest of the middleware chain and the view.
+
+The measurements are sent back in a ``Server-Timing`` header (visible in the
+browser's network panel) and added to process-wide totals, which ``metrics``
+serves in the Prometheus text format. Each worker process keeps its own totals.
+
+When disabled, the middleware raises MiddlewareNotUsed, so Django drops it from
+the chain. The only remaining cost is one context variable lookup per block
+rendered.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+from porpoise_blocks.render_cache import block_timings
+
+
+DEFAULTS = {
+    "ENABLED": False,
+    "SERVER_TIMING": True,
+    # Clients allowed to read the metrics endpoint, besides INTERNAL_IPS.
+    "METRICS_IPS": ["127.0.0.1", "::1"],
+}
+
+METRIC_PREFIX = "lesson_space"
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "PERFORMANCE_INSTRUMENTATION", {})}
+
+
+class RequestTimings:
+    """Measurements for one request; times are in seconds."""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+        self.total_time = 0.0
+        self.blocks = defaultdict(lambda: [0, 0.0])  # block_type -> [count, seconds]
+
+    def record_block(self, block_type, seconds):
+        entry = self.blocks[block_type]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += time.perf_counter() - start
+
+    def server_timing(self):
+        entries = [
+            f'db;dur={self.query_time * 1000:.1f};desc="{self.queries} queries"',
+            f"tpl;dur={self.template_time * 1000:.1f}",
+        ]
+        for block_type, (count, seconds) in sorted(self.blocks.items()):
+            entries.append(
+                f'block-{block_type};dur={seconds * 1000:.1f};desc="{count} rendered"'
+            )
+        entries.append(f"total;dur={self.total_time * 1000:.1f}")
+        return ", ".join(entries)
+
+
+class Metrics:
+    """Process-wide totals, exposed in the Prometheus text format."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = defaultdict(lambda: [0, 0.0])  # view -> [count, seconds]
+        self.queries = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+        self.blocks = defaultdict(lambda: [0, 0.0])
+
+    def add(self, view, timings):
+        with self.lock:
+            request = self.requests[view]
+            request[0] += 1
+            request[1] += timings.total_time
+            self.queries += timings.queries
+            self.query_time += timings.query_time
+            self.template_time += timings.template_time
+            for block_type, (count, seconds) in timings.blocks.items():
+                block = self.blocks[block_type]
+                block[0] += count
+                block[1] += seconds
+
+    def render(self):
+        name = METRIC_PREFIX
+        with self.lock:
+            lines = [
+                f"# HELP {name}_request_seconds Time spent handling requests.",
+                f"# TYPE {name}_request_seconds summary",
+            ]
+            for view, (count, seconds) in sorted(self.requests.items()):
+                label = f'{{view="{_escape(view)}"}}'
+                lines.append(f"{name}_request_seconds_count{label} {count}")
+                lines.append(f"{name}_request_seconds_sum{label} {seconds:.6f}")
+            lines += [
+                f"# HELP {name}_db_queries_total SQL queries executed.",
+                f"# TYPE {name}_db_queries_total counter",
+                f"{name}_db_queries_total {self.queries}",
+                f"# HELP {name}_db_query_seconds_total Time spent in SQL queries.",
+                f"# TYPE {name}_db_query_seconds_total counter",
+                f"{name}_db_query_seconds_total {self.query_time:.6f}",
+                f"# HELP {name}_template_seconds_total Time spent rendering templates.",
+                f"# TYPE {name}_template_seconds_total counter",
+                f"{name}_template_seconds_total {self.template_time:.6f}",
+                f"# HELP {name}_block_render_seconds Time spent rendering StreamField blocks.",
+                f"# TYPE {name}_block_render_seconds summary",
+            ]
+            for block_type, (count, seconds) in sorted(self.blocks.items()):
+                label = f'{{block_type="{_escape(block_type)}"}}'
+                lines.append(f"{name}_block_render_seconds_count{label} {count}")
+                lines.append(f"{name}_block_render_seconds_sum{label} {seconds:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = Metrics()
+
+
+class InstrumentationMiddleware:
+    """Put this first in MIDDLEWARE so the total covers the whole chain."""
+
+    def __init__(self, get_response):
+        config = get_config()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = config["SERVER_TIMING"]
+
+    def __call__(self, request):
+        timings = request._timings = RequestTimings()
+        token = block_timings.set(timings.record_block)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            block_timings.reset(token)
+        timings.total_time = time.perf_counter() - start
+
+        match = request.resolver_match
+        METRICS.add(match.view_name if match else "unresolved", timings)
+        if self.server_timing:
+            response["Server-Timing"] = timings.server_timing()
+        return response
+
+    def process_template_response(self, request, response):
+        # Render here (last, since this middleware is outermost) to time it;
+        # the handler won't render it again.
+        start = time.perf_counter()
+        response.render()
+        request._timings.template_time += time.perf_counter() - start
+        return response
+
+
+def metrics(request):
+    """Prometheus text exposition of ``METRICS``, for local scrapers only."""
+    config = get_config()
+    allowed = set(config["METRICS_IPS"]) | set(getattr(settings, "INTERNAL_IPS", []))
+    if not config["ENABLED"] or request.META.get("REMOTE_ADDR") not in allowed:
+        raise Http404
+    return HttpResponse(METRICS.render(), content_type="text/plain; version=0.0.4")
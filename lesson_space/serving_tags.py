@@ -0,0 +1,14 @@
+"""
+Stand-in for Wagtail's ``wagtailuserbar`` template library, for settings
+without ``wagtail.admin`` (lesson_space/settings/serving.py). Editors use the
+full site, so the userbar is always empty here.
+"""
+from django import template
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def wagtailuserbar(position="bottom-right"):
+    return ""
@@ -0,0 +1,39 @@
+"""
+URLconf for the public site alone, used by lesson_space/settings/serving.py.
+lesson_space/urls.py adds the admin and, in DEBUG, static files to the same
+patterns.
+"""
+from django.conf import settings
+from django.urls import include, path
+
+from wagtail import urls as wagtail_urls
+from wagtail.documents import urls as wagtaildocs_urls
+
+from home import api as lessons_api
+from home import views as home_views
+from lesson_space import instrumentation
+from search import views as search_views
+
+async_views = settings.ASYNC_VIEWS
+
+site_urlpatterns = [
+    path("documents/", include(wagtaildocs_urls)),
+    path("search/", search_views.asearch if async_views else search_views.search, name="search"),
+    path(
+        "search/lessons/",
+        search_views.alesson_search if async_views else search_views.lesson_search,
+        name="lesson_search",
+    ),
+    path("lessons/", home_views.lesson_list, name="lesson_list"),
+    path("lessons/facets/", home_views.lesson_facets, name="lesson_facets"),
+    path("api/lessons/", lessons_api.lesson_list, name="api_lesson_list"),
+    path("api/lessons/<int:page_id>/", lessons_api.lesson_detail, name="api_lesson_detail"),
+    path("metrics/", instrumentation.metrics, name="metrics"),
+]
+
+# Wagtail's page serving handles everything else, so it comes last.
+page_urlpatterns = [
+    path("", include(wagtail_urls)),
+]
+
+urlpatterns = site_urlpatterns + page_urlpatterns
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 import os
 
+from lesson_space import database
+
 PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))  # → .../lesson_space/lesson_space/settings
 BASE_DIR = os.path.dirname(os.path.dirname(PROJECT_DIR))  # → .../lesson_space
 SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", "test-secret-key")
@@ -67,10 +69,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so its total covers everything else. No-op unless
+    # PERFORMANCE_INSTRUMENTATION["ENABLED"] is set.
+    "lesson_space.instrumentation.InstrumentationMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # No-op unless LESSON_PAGE_CACHE["ENABLED"] is set.
+    "home.page_cache.LessonPageCacheMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -98,16 +105,99 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "lesson_space.wsgi.application"
+ASGI_APPLICATION = "lesson_space.asgi.application"
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# SQLite unless DATABASE_ENGINE=postgresql; see lesson_space/database.py for
+# the environment variables. SQLITE_CONCURRENT_MODE=1 adds a read-only
+# "replica" alias and its router.
+
+DATABASES = database.databases(BASE_DIR)
+DATABASE_ROUTERS = database.routers()
+
 
-DATABASES = {
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
-    }
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Rendered StreamField blocks (see porpoise_blocks/render_cache.py).
+    # LocMemCache evicts least-recently-used entries once MAX_ENTRIES is hit;
+    # point this at Redis/Memcached to share it between workers. Bump VERSION
+    # after changing a block template to drop every cached render at once.
+    "blocks": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "porpoise-blocks",
+        "TIMEOUT": 60 * 60,
+        "VERSION": 1,
+        "OPTIONS": {
+            "MAX_ENTRIES": 5000,
+        },
+    },
+    # Lesson search ids and facet counts (see search/lessons.py).
+    "search": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "lesson-search",
+        "TIMEOUT": 60,
+        "OPTIONS": {
+            "MAX_ENTRIES": 2000,
+        },
+    },
+}
+
+# Cache alias used for rendered blocks; None renders every block on each request.
+PORPOISE_BLOCK_CACHE = "blocks"
+
+# Processes generating image renditions on publish and upload (see
+# porpoise_blocks/renditions.py). Above 1, the web or task worker forks a
+# process pool; leave it at 1 where that process runs threads (ASGI).
+PORPOISE_RENDITION_PROCESSES = int(os.environ.get("PORPOISE_RENDITION_PROCESSES", "1"))
+
+# Revision retention for lessons, applied by manage.py compact_revisions (see
+# home/revisions.py). Revisions past the newest KEEP_LATEST and older than
+# KEEP_DAYS are stored as deltas, with one in every SNAPSHOT_INTERVAL kept
+# whole as their base. Revisions older than DELETE_AFTER_DAYS are deleted
+# (None keeps them). Live, latest, scheduled and in-workflow revisions are
+# always kept whole.
+LESSON_REVISION_RETENTION = {
+    "KEEP_LATEST": 10,
+    "KEEP_DAYS": 14,
+    "SNAPSHOT_INTERVAL": 20,
+    "DELETE_AFTER_DAYS": None,
+}
+
+# Lesson search results and facet counts (see search/lessons.py). Kept short:
+# new lessons appear in search after at most this many seconds.
+LESSON_SEARCH_CACHE = "search"
+LESSON_SEARCH_CACHE_TIMEOUT = 60
+
+# The Lessons admin listing counts up to this many rows exactly; past that it
+# shows the database's estimate (PostgreSQL only; see home/admin_listing.py).
+LESSON_ADMIN_EXACT_COUNT_LIMIT = 10000
+
+# Full-response cache for anonymous LessonPage views (see home/page_cache.py).
+# Entries are invalidated on publish/unpublish/move/tag change, so TIMEOUT
+# only bounds memory use. Use a shared backend when running several workers.
+LESSON_PAGE_CACHE = {
+    "ENABLED": os.environ.get("LESSON_PAGE_CACHE", "") == "1",
+    "CACHE": "default",
+    "TIMEOUT": 60 * 10,
+}
+
+# Route the search pages to the async views in search/views.py. On by default
+# under lesson_space/asgi.py; under WSGI the sync views skip an event loop per
+# request.
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "") == "1"
+
+# Per-request SQL/template/block timings as Server-Timing headers, plus
+# Prometheus metrics at /metrics/ (see lesson_space/instrumentation.py).
+PERFORMANCE_INSTRUMENTATION = {
+    "ENABLED": os.environ.get("PERFORMANCE_INSTRUMENTATION", "") == "1",
+    "SERVER_TIMING": True,
 }
 
 
@@ -188,11 +278,13 @@ WAGTAIL_SITE_NAME = "lesson_space"
 
 # Search
 # https://docs.wagtail.org/en/stable/topics/search/backends.html
-WAGTAILSEARCH_BACKENDS = {
-    "default": {
-        "BACKEND": "wagtail.search.backends.database",
-    }
-}
+# The database backend: FTS5 on SQLite, tsvector on PostgreSQL with the text
+# search configuration from SEARCH_CONFIG.
+WAGTAILSEARCH_BACKENDS = database.search_backends()
+
+# Search tier for each porpoise block type in LessonPage.body ("high",
+# "normal", "low", or None to leave it out); see porpoise_blocks/indexing.py.
+# PORPOISE_SEARCH_WEIGHTS = {"code": "normal"}
 
 # Base URL to use when referring to full URLs within the Wagtail admin backend -
 # e.g. in notification emails. Don't include '/admin' or a trailing slash
@@ -203,3 +295,15 @@ WAGTAILADMIN_BASE_URL = "http://example.com"
 # if untrusted users are allowed to upload files -
 # see https://docs.wagtail.org/en/stable/advanced_topics/deploying.html#user-uploaded-files
 WAGTAILDOCS_EXTENSIONS = ['csv', 'docx', 'key', 'odt', 'pdf', 'pptx', 'rtf', 'txt', 'xlsx', 'zip']
+
+# Publish-time LaTeX typesetting (see porpoise_blocks/latex.py). KaTeX runs
+# under Node.js when both are installed ("module" may be a path to the katex
+# package); otherwise blocks fall back to client-side KaTeX.
+PORPOISE_LATEX_RENDERER = {
+    "BACKEND": "porpoise_blocks.latex.KatexCommandRenderer",
+    "OPTIONS": {
+        "command": ["node"],
+        "module": "katex",
+        "timeout": 10,
+    },
+}
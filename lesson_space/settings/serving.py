@@ -0,0 +1,54 @@
+"""
+Settings for a node that only serves the public site.
+
+Production settings without the apps that exist for editors: the Wagtail and
+Django admins, ModelAdmin, snippets, users, form pages and their
+dependencies. The URLconf (lesson_space/serving_urls.py) has no ``admin/``
+or ``django-admin/``. Each worker imports and keeps less; see
+docs/SERVING.md for the measurements.
+
+    DJANGO_SETTINGS_MODULE=lesson_space.settings.serving gunicorn lesson_space.wsgi:application
+
+The database is the one the full site uses. Run ``migrate`` and other
+management commands with the production settings: this profile doesn't know
+the admin apps' models.
+"""
+from .production import *
+
+
+ADMIN_APPS = [
+    "wagtail_modeladmin",
+    "wagtail.contrib.forms",
+    "wagtail.users",
+    "wagtail.snippets",
+    "wagtail.admin",
+    "django_filters",
+    "django.contrib.admin",
+    "django.contrib.messages",
+]
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in ADMIN_APPS]
+
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if middleware != "django.contrib.messages.middleware.MessageMiddleware"
+]
+
+ROOT_URLCONF = "lesson_space.serving_urls"
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "OPTIONS": {
+            **TEMPLATES[0]["OPTIONS"],
+            "context_processors": [
+                processor
+                for processor in TEMPLATES[0]["OPTIONS"]["context_processors"]
+                if processor != "django.contrib.messages.context_processors.messages"
+            ],
+            # base.html loads the userbar; without the admin there's none to show.
+            "libraries": {"wagtailuserbar": "lesson_space.serving_tags"},
+        },
+    },
+]
@@ -3,16 +3,21 @@ from django.urls import include, path
 from django.contrib import admin
 
 from wagtail.admin import urls as wagtailadmin_urls
-from wagtail import urls as wagtail_urls
-from wagtail.documents import urls as wagtaildocs_urls
 
-from search import views as search_views
+from home.revision_history import LeanPageHistoryView
+from lesson_space import serving_urls
 
 urlpatterns = [
     path("django-admin/", admin.site.urls),
+    # Page history without loading revision content (see home/revision_history.py).
+    path("admin/pages/<int:page_id>/history/", LeanPageHistoryView.as_view()),
+    path(
+        "admin/pages/<int:page_id>/history/results/",
+        LeanPageHistoryView.as_view(results_only=True),
+    ),
     path("admin/", include(wagtailadmin_urls)),
-    path("documents/", include(wagtaildocs_urls)),
-    path("search/", search_views.search, name="search"),
+    # The public site; lesson_space/settings/serving.py uses these alone.
+    *serving_urls.site_urlpatterns,
 ]
 
 
@@ -24,12 +29,8 @@ if settings.DEBUG:
     urlpatterns += staticfiles_urlpatterns()
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
-urlpatterns = urlpatterns + [
-    # For anything not caught by a more specific rule above, hand over to
-    # Wagtail's page serving mechanism. This should be the last pattern in
-    # the list:
-    path("", include(wagtail_urls)),
-    # Alternatively, if you want Wagtail pages to be served from a subpath
-    # of your site, rather than the site root:
-    #    path("pages/", include(wagtail_urls)),
-]
+# For anything not caught by a more specific rule above, hand over to
+# Wagtail's page serving mechanism. This should be the last pattern in the
+# list. To serve Wagtail pages from a subpath of your site rather than the
+# site root, change the prefix in lesson_space/serving_urls.py.
+urlpatterns = urlpatterns + serving_urls.page_urlpatterns
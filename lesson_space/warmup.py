@@ -0,0 +1,154 @@
+"""
+Work a server process does once before it takes traffic (see gunicorn.conf.py).
+
+Django and Wagtail build a lot lazily: the URL resolver's lookup tables on
+the first ``resolve``/``reverse``, every app's ``wagtail_hooks`` module on
+the first page served, each template on its first render, each
+block's form field on first use, the rich text rewriter on the first rich
+text, and Pygments imports a lexer module the first time a language is
+highlighted. Done per worker, that work lands on the first requests each
+worker serves. ``run()`` does it up front.
+
+With ``preload_app`` gunicorn calls ``run()`` in the master before forking,
+so every worker starts with the result and shares its memory pages
+copy-on-write. Nothing here touches the database or a cache server: the
+master must not hold connections its workers would inherit.
+"""
+import logging
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def warm_urls():
+    """Build the URL resolver's reverse and resolve tables."""
+    from django.urls import get_resolver, resolve
+
+    resolver = get_resolver()
+    # reverse_dict populates the tables that resolve() and reverse() share.
+    resolver.reverse_dict
+    resolve("/")
+    return len(resolver.reverse_dict)
+
+
+def warm_hooks():
+    """Import every app's wagtail_hooks module."""
+    from wagtail import hooks
+
+    hooks.search_for_hooks()
+
+
+def project_template_names():
+    """Names of the templates shipped in this project (not third-party apps)."""
+    base_dir = os.path.realpath(settings.BASE_DIR)
+    directories = [
+        os.path.join(app_config.path, "templates")
+        for app_config in apps.get_app_configs()
+        if os.path.realpath(app_config.path).startswith(base_dir + os.sep)
+    ]
+    for backend in settings.TEMPLATES:
+        directories.extend(str(directory) for directory in backend.get("DIRS", []))
+
+    names = set()
+    for directory in directories:
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith((".html", ".txt", ".xml")):
+                    path = os.path.join(dirpath, filename)
+                    names.add(os.path.relpath(path, directory).replace(os.sep, "/"))
+    return sorted(names)
+
+
+def warm_templates():
+    """Compile the project's templates into the cached template loader."""
+    from django.template import TemplateDoesNotExist, TemplateSyntaxError
+    from django.template.loader import get_template
+
+    count = 0
+    for name in project_template_names():
+        try:
+            get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError):
+            # Shadowed or partial templates; they fail later, where they're used.
+            logger.warning("Could not compile template %s during warmup.", name)
+            continue
+        count += 1
+    return count
+
+
+def stream_blocks():
+    """Every block used by a StreamField on a page model, depth first."""
+    from wagtail.fields import StreamField
+    from wagtail.models import get_page_models
+
+    seen = set()
+    pending = [
+        field.stream_block
+        for model in get_page_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, StreamField)
+    ]
+    while pending:
+        block = pending.pop()
+        if id(block) in seen:
+            continue
+        seen.add(id(block))
+        yield block
+        pending.extend(getattr(block, "child_blocks", {}).values())
+        if getattr(block, "child_block", None) is not None:
+            pending.append(block.child_block)
+
+
+def warm_blocks():
+    """Load block templates and, where the admin is installed, build block form fields."""
+    from django.template.loader import get_template
+    from wagtail.blocks import FieldBlock
+
+    from porpoise_blocks.highlighting import LEXERS, highlight_code
+
+    # Form fields are only used by the editor, and without the admin's
+    # rich text features the rich text widgets can't be built.
+    editing = apps.is_installed("wagtail.admin")
+    count = 0
+    for block in stream_blocks():
+        if editing and isinstance(block, FieldBlock):
+            block.field
+        template = getattr(block.meta, "template", None)
+        if template:
+            get_template(template)
+        count += 1
+    # Imports each Pygments lexer the code block can ask for.
+    for language in LEXERS:
+        highlight_code(language, "default", "")
+    return count
+
+
+def warm_rich_text():
+    """Build Wagtail's rich text rewriter (link and embed handlers)."""
+    from wagtail.rich_text import expand_db_html
+
+    expand_db_html("<p></p>")
+
+
+STEPS = [
+    ("urls", warm_urls),
+    ("hooks", warm_hooks),
+    ("templates", warm_templates),
+    ("blocks", warm_blocks),
+    ("rich_text", warm_rich_text),
+]
+
+
+def run():
+    """Run every warmup step; returns {step: seconds}."""
+    timings = {}
+    for name, step in STEPS:
+        start = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - start
+    return timings
@@ -0,0 +1,61 @@
+"""
+JSON representation of a porpoise block stream, for the lessons API
+(home/api.py).
+
+Each child becomes ``{"type", "id", "value", "html"}``:
+
+* ``value`` is structured data a client can lay out natively. It is
+  Wagtail's ``get_api_representation``, except that rich text is expanded
+  to front-end HTML (real link URLs, embeds) and images are described
+  with their renditions (see ``ResponsiveImageBlock``).
+* ``html`` is the child rendered exactly as on the page, including LaTeX
+  typeset at publish and highlighted code, for clients that display blocks
+  in a web view.
+
+Building this renders every child, so callers store the result at publish
+time (home/lesson_index.py) and serve the stored JSON.
+"""
+from wagtail.blocks import ListBlock, RichTextBlock, StreamBlock, StructBlock
+from wagtail.rich_text import expand_db_html
+
+from porpoise_blocks.render_cache import prerendered_key, render_child
+from porpoise_blocks.rich_text import prefetch_entities
+
+
+def api_value(block, value):
+    """``block.get_api_representation(value)``, with rich text expanded at any depth."""
+    if isinstance(block, RichTextBlock):
+        return expand_db_html(value.source) if value else ""
+    if isinstance(block, StructBlock):
+        return {name: api_value(block.child_blocks[name], item) for name, item in value.items()}
+    if isinstance(block, ListBlock):
+        return [api_value(block.child_block, item) for item in value]
+    if isinstance(block, StreamBlock):
+        return [
+            {"type": child.block_type, "id": child.id, "value": api_value(child.block, child.value)}
+            for child in value
+        ]
+    return block.get_api_representation(value)
+
+
+def serialize_stream(stream_value, prerendered=None):
+    """
+    Return the API representation of every child of ``stream_value``.
+    ``prerendered`` is the same ``{(block_id, value_digest): html}`` mapping
+    ``render_stream`` takes.
+    """
+    prerendered = prerendered or {}
+    blocks = []
+    # Links and embeds are looked up once for the whole stream, for both
+    # the values and the HTML.
+    with prefetch_entities(item["value"] for item in stream_value.raw_data):
+        for index, item in enumerate(stream_value.raw_data):
+            child = stream_value[index]
+            html = prerendered.get(prerendered_key(item))
+            blocks.append({
+                "type": child.block_type,
+                "id": child.id,
+                "value": api_value(child.block, child.value),
+                "html": str(html if html is not None else render_child(child)),
+            })
+    return blocks
@@ -0,0 +1,127 @@
+"""
+Server-side syntax highlighting for CodeBlock.
+
+Highlighted HTML is stored in ``HighlightedCode``, keyed by
+(language, style, sha256 of the code). The table is shared by every worker,
+so each snippet is tokenized once per edit. Snippets are stored at publish
+time only (``highlight_stream``): a snippet missing at render time is
+highlighted in memory, so a page view never writes. The block render cache
+sits in front of the lookups.
+"""
+import hashlib
+from functools import lru_cache
+
+from django.utils.safestring import mark_safe
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
+
+from porpoise_blocks.text_blocks import CodeBlock
+
+
+# CodeBlock language choices -> Pygments lexer aliases.
+LEXERS = {
+    "text": "text",
+    "python": "python",
+    "bash": "bash",
+    "json": "json",
+    "html": "html",
+    "javascript": "javascript",
+}
+
+CSS_CLASS = "highlight"
+
+GUTTER_CSS = """
+pre.highlight.line-numbers { position: relative; padding-left: 3.8em; counter-reset: linenumber; }
+pre.highlight.line-numbers > code { position: relative; white-space: inherit; }
+.highlight .line-numbers-rows { position: absolute; pointer-events: none; top: 0; left: -3.8em; width: 3em; border-right: 1px solid #999; user-select: none; }
+.highlight .line-numbers-rows > span { display: block; counter-increment: linenumber; }
+.highlight .line-numbers-rows > span:before { content: counter(linenumber); color: #999; display: block; padding-right: 0.8em; text-align: right; }
+"""
+
+
+def code_hash(code):
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def highlight_code(language, style, code):
+    """Return highlighted HTML for the contents of the ``<code>`` element."""
+    try:
+        lexer = get_lexer_by_name(LEXERS.get(language, "text"), stripnl=False)
+    except ClassNotFound:
+        lexer = get_lexer_by_name("text", stripnl=False)
+
+    html = highlight(code, lexer, HtmlFormatter(nowrap=True)).rstrip("\n")
+    if style == "lined":
+        # Same gutter markup Prism's line-numbers plugin generates; the
+        # numbers are drawn by GUTTER_CSS.
+        lines = code.rstrip("\n").count("\n") + 1
+        gutter = "<span></span>" * lines
+        html += f'<span aria-hidden="true" class="line-numbers-rows">{gutter}</span>'
+    return mark_safe(html)
+
+
+def highlighted_code(language, style, code):
+    """Return stored highlighted HTML, or highlight ``code`` on a miss without storing it."""
+    from porpoise_blocks.models import HighlightedCode
+
+    language = language or "text"
+    style = style or "default"
+    digest = code_hash(code)
+    html = (
+        HighlightedCode.objects.filter(language=language, style=style, code_hash=digest)
+        .values_list("html", flat=True)
+        .first()
+    )
+    if html is None:
+        return highlight_code(language, style, code)
+    return mark_safe(html)
+
+
+def highlight_stream(stream_value):
+    """
+    Make sure every CodeBlock in ``stream_value`` has stored highlighted HTML.
+
+    Existing entries are found with one query and the missing ones are
+    inserted with one bulk insert. Returns the number of snippets highlighted.
+    """
+    from porpoise_blocks.models import HighlightedCode
+
+    child_blocks = stream_value.stream_block.child_blocks
+    wanted = {}
+    for item in stream_value.raw_data:
+        if not isinstance(child_blocks.get(item["type"]), CodeBlock):
+            continue
+        value = item["value"]
+        language = value.get("language") or "text"
+        style = value.get("style") or "default"
+        code = value.get("code") or ""
+        wanted[(language, style, code_hash(code))] = code
+
+    if not wanted:
+        return 0
+
+    existing = set(
+        HighlightedCode.objects.filter(
+            code_hash__in={digest for _, _, digest in wanted}
+        ).values_list("language", "style", "code_hash")
+    )
+    missing = [
+        HighlightedCode(
+            language=language,
+            style=style,
+            code_hash=digest,
+            html=highlight_code(language, style, code),
+        )
+        for (language, style, digest), code in wanted.items()
+        if (language, style, digest) not in existing
+    ]
+    HighlightedCode.objects.bulk_create(missing, ignore_conflicts=True)
+    return len(missing)
+
+
+@lru_cache(maxsize=None)
+def highlight_css():
+    """Stylesheet for the token classes and gutter emitted by ``highlight_code``."""
+    return HtmlFormatter().get_style_defs(f".{CSS_CLASS}") + GUTTER_CSS
@@ -0,0 +1,85 @@
+"""
+Search text extraction for porpoise block streams.
+
+Each block type has an extractor that works on the stored JSON (so nothing
+is converted to Python values or rendered) and returns plain text: rich text
+with its markup stripped, quotes with their attribution, code with its
+heading and caption, LaTeX source.
+
+Blocks are grouped into weight tiers. A page indexes one search field per
+tier, each with its own boost (see ``search_fields``). Move a block type to
+another tier with the ``PORPOISE_SEARCH_WEIGHTS`` setting, e.g.
+``{"code": "normal"}``; that takes effect on the next publish, or on
+``manage.py update_index`` for existing pages.
+"""
+from django.conf import settings
+from wagtail.rich_text import get_text_for_indexing
+from wagtail.search import index
+
+
+# Tier -> boost of the search field holding that tier's text.
+TIER_BOOSTS = {
+    "high": 3.0,
+    "normal": 1.0,
+    "low": 0.5,
+}
+
+DEFAULT_WEIGHTS = {
+    "heading": "high",
+    "paragraph": "normal",
+    "callout": "normal",
+    "quote": "normal",
+    "code": "low",
+    "latex": "low",
+}
+
+
+def _rich_text(html):
+    return get_text_for_indexing(html or "")
+
+
+def _parts(*texts):
+    return " ".join(text.strip() for text in texts if text and text.strip())
+
+
+EXTRACTORS = {
+    "heading": lambda value: _parts(value),
+    "paragraph": lambda value: _rich_text(value),
+    "callout": lambda value: _parts(value.get("title"), _rich_text(value.get("body"))),
+    "quote": lambda value: _parts(_rich_text(value.get("quote")), value.get("attribution")),
+    "code": lambda value: _parts(value.get("heading"), value.get("caption"), value.get("code")),
+    "latex": lambda value: _parts(value),
+}
+
+
+def get_weights():
+    return {**DEFAULT_WEIGHTS, **getattr(settings, "PORPOISE_SEARCH_WEIGHTS", {})}
+
+
+def block_text(block_type, raw_value):
+    """Plain text for one stored block, or "" for block types with no text."""
+    extractor = EXTRACTORS.get(block_type)
+    if extractor is None or raw_value is None:
+        return ""
+    return extractor(raw_value)
+
+
+def stream_text(stream_value):
+    """{tier: text} for a StreamValue, read from its raw JSON."""
+    weights = get_weights()
+    texts = {tier: [] for tier in TIER_BOOSTS}
+    for item in stream_value.raw_data:
+        tier = weights.get(item["type"])
+        if tier in texts:
+            text = block_text(item["type"], item["value"])
+            if text:
+                texts[tier].append(text)
+    return {tier: "\n".join(parts) for tier, parts in texts.items()}
+
+
+def search_fields(prefix):
+    """One SearchField per tier, named ``{prefix}_{tier}_text``."""
+    return [
+        index.SearchField(f"{prefix}_{tier}_text", boost=boost)
+        for tier, boost in TIER_BOOSTS.items()
+    ]
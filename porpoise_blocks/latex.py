@@ -0,0 +1,308 @@
+"""
+Publish-time LaTeX typesetting for LaTeXBlock.
+
+The renderer is pluggable through ``settings.PORPOISE_LATEX_RENDERER``:
+
+    PORPOISE_LATEX_RENDERER = {
+        "BACKEND": "porpoise_blocks.latex.KatexCommandRenderer",
+        "OPTIONS": {"command": ["node"], "module": "katex"},
+    }
+
+``KatexCommandRenderer`` typesets with KaTeX under Node.js (``npm install
+katex``), in one process for all the math of a publish. ``LocalLatexRenderer``
+is a dependency-free stand-in for offline development and tests. When a
+renderer fails or isn't installed, the block is left to client-side KaTeX.
+
+home/signals.py enqueues ``prerender_latex_task`` when a lesson is published,
+so the publish request doesn't wait for the renderer.
+"""
+import json
+import logging
+import re
+import shutil
+import subprocess
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.utils.html import escape, linebreaks
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+from django_tasks import task
+
+from porpoise_blocks.math_blocks import LaTeXBlock
+from porpoise_blocks.render_cache import value_digest
+from porpoise_blocks.signals import latex_prerendered
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RENDERER = {
+    "BACKEND": "porpoise_blocks.latex.KatexCommandRenderer",
+    "OPTIONS": {},
+}
+
+# $$...$$ (display) or \(...\) (inline), matching the delimiters the
+# client-side auto-render in base.html is configured with.
+MATH_PATTERN = re.compile(r"\$\$(?P<display>.+?)\$\$|\\\((?P<inline>.+?)\\\)", re.DOTALL)
+
+# Reads [[tex, display], ...] as JSON on stdin and writes the HTML of each
+# span, or null where KaTeX rejects it. The module to load is argv[1].
+KATEX_SCRIPT = """
+const katex = require(process.argv[1]);
+let input = "";
+process.stdin.setEncoding("utf8");
+process.stdin.on("data", (chunk) => { input += chunk; });
+process.stdin.on("end", () => {
+  const html = JSON.parse(input).map(([tex, display]) => {
+    try {
+      return katex.renderToString(tex, {displayMode: display, throwOnError: true});
+    } catch (error) {
+      return null;
+    }
+  });
+  process.stdout.write(JSON.stringify(html));
+});
+"""
+
+
+class LatexRenderError(Exception):
+    pass
+
+
+class LatexRendererUnavailable(LatexRenderError):
+    """The renderer's program isn't installed."""
+
+
+def split_math(source):
+    """
+    Split LaTeX block source into ("text" | "display" | "inline", content) parts.
+    """
+    parts = []
+    position = 0
+    for match in MATH_PATTERN.finditer(source):
+        if match.start() > position:
+            parts.append(("text", source[position:match.start()]))
+        if match.group("display") is not None:
+            parts.append(("display", match.group("display")))
+        else:
+            parts.append(("inline", match.group("inline")))
+        position = match.end()
+    if position < len(source):
+        parts.append(("text", source[position:]))
+    return parts
+
+
+class BaseLatexRenderer:
+    """
+    Turns LaTeX block source into static HTML.
+
+    Subclasses implement ``render_math``, or ``render_math_many`` to typeset
+    several spans at once; plain text between math spans is escaped and
+    line-broken the same way latex_block.html does it.
+    """
+
+    name = "base"
+
+    def __init__(self, **options):
+        self.options = options
+
+    def render_math(self, tex, display):
+        raise NotImplementedError
+
+    def render_math_many(self, spans):
+        """HTML for each (tex, display) in ``spans``, or None where it failed."""
+        return [self.render_math(tex, display) for tex, display in spans]
+
+    def render_many(self, sources):
+        """
+        Return {source: html or None} for ``sources``, with a single
+        ``render_math_many`` call for all their math.
+        """
+        parts = {source: split_math(source) for source in sources}
+        spans = list(dict.fromkeys(
+            (content.strip(), kind == "display")
+            for source_parts in parts.values()
+            for kind, content in source_parts
+            if kind != "text"
+        ))
+        markup = dict(zip(spans, self.render_math_many(spans))) if spans else {}
+
+        rendered = {}
+        for source, source_parts in parts.items():
+            html = []
+            for kind, content in source_parts:
+                if kind == "text":
+                    if content.strip():
+                        html.append(linebreaks(escape(content.strip())))
+                else:
+                    html.append(markup[content.strip(), kind == "display"])
+            rendered[source] = None if None in html else mark_safe("".join(html))
+        return rendered
+
+    def render(self, source):
+        html = self.render_many([source])[source]
+        if html is None:
+            raise LatexRenderError(f"Could not typeset {source!r}")
+        return html
+
+
+class KatexCommandRenderer(BaseLatexRenderer):
+    """Typesets every math span of a batch in one Node.js process."""
+
+    name = "katex"
+
+    def render_math(self, tex, display):
+        return self.render_math_many([(tex, display)])[0]
+
+    def render_math_many(self, spans):
+        command = list(self.options.get("command", ["node"]))
+        if shutil.which(command[0]) is None:
+            raise LatexRendererUnavailable(f"{command[0]!r} was not found on PATH")
+        command += ["-e", KATEX_SCRIPT, self.options.get("module", "katex")]
+        try:
+            result = subprocess.run(
+                command,
+                input=json.dumps(spans),
+                capture_output=True,
+                text=True,
+                timeout=self.options.get("timeout", 10),
+                check=True,
+            )
+            html = json.loads(result.stdout)
+        except subprocess.CalledProcessError as e:
+            # Most often the katex module isn't installed.
+            raise LatexRendererUnavailable(e.stderr.strip() or str(e)) from e
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            raise LatexRenderError(str(e)) from e
+        if len(html) != len(spans):
+            raise LatexRenderError(f"Expected {len(spans)} spans, got {len(html)}")
+        return html
+
+
+class LocalLatexRenderer(BaseLatexRenderer):
+    """
+    Offline stand-in: wraps the escaped TeX in math markup without typesetting.
+    """
+
+    name = "local"
+
+    def render_math(self, tex, display):
+        if display:
+            return f'<div class="math math-display">{escape(tex)}</div>'
+        return f'<span class="math math-inline">{escape(tex)}</span>'
+
+
+def get_latex_renderer():
+    config = getattr(settings, "PORPOISE_LATEX_RENDERER", DEFAULT_RENDERER)
+    renderer_class = import_string(config["BACKEND"])
+    return renderer_class(**config.get("OPTIONS", {}))
+
+
+def render_latex_sources(sources):
+    """
+    Render LaTeX source strings in one batch; returns {source: html or None}.
+
+    Module-level so it can be handed to a process pool.
+    """
+    try:
+        return get_latex_renderer().render_many(sources)
+    except LatexRendererUnavailable as e:
+        logger.debug("LaTeX renderer unavailable, leaving math to the browser: %s", e)
+    except LatexRenderError as e:
+        logger.warning("LaTeX prerender failed, falling back to client-side: %s", e)
+    return dict.fromkeys(sources)
+
+
+def latex_children(stream_value):
+    """Yield (block, block_id, source) for every LaTeXBlock in a stream."""
+    child_blocks = stream_value.stream_block.child_blocks
+    for item in stream_value.raw_data:
+        block = child_blocks.get(item["type"])
+        if isinstance(block, LaTeXBlock) and item["value"]:
+            yield block, item.get("id") or "", item["value"]
+
+
+def prerender_latex(revision, stream_value, render=render_latex_sources):
+    """
+    Typeset every LaTeXBlock of ``stream_value`` and store it against ``revision``.
+
+    Sources that were already typeset by the current renderer (in any revision)
+    are reused rather than rendered again, so republishing after a small edit
+    only renders the blocks that changed. Sends ``latex_prerendered`` when
+    rows were stored. Returns the number of rows stored.
+    """
+    from porpoise_blocks.models import LatexRendering
+
+    children = list(latex_children(stream_value))
+    if not children:
+        return 0
+
+    renderer_name = get_latex_renderer().name
+    digests = {source: value_digest(source) for _, _, source in children}
+    known = dict(
+        LatexRendering.objects.filter(
+            source_hash__in=set(digests.values()), renderer=renderer_name
+        ).values_list("source_hash", "html")
+    )
+
+    rendered = render([source for source, digest in digests.items() if digest not in known])
+
+    rows = {}
+    for block, block_id, source in children:
+        digest = digests[source]
+        if digest not in known:
+            if rendered.get(source) is None:
+                continue
+            known[digest] = block.render_prerendered(source, rendered[source])
+        rows[block_id] = LatexRendering(
+            revision=revision,
+            block_id=block_id,
+            source_hash=digest,
+            renderer=renderer_name,
+            html=known[digest],
+        )
+
+    LatexRendering.objects.filter(revision=revision).delete()
+    LatexRendering.objects.bulk_create(rows.values())
+    if rows:
+        latex_prerendered.send(
+            sender=ContentType.objects.get_for_id(revision.content_type_id).model_class(),
+            revision=revision,
+        )
+    return len(rows)
+
+
+@task()
+def prerender_latex_task(revision_id, field_name):
+    """Typeset the LaTeX of ``field_name`` in the page saved as ``revision_id``."""
+    from wagtail.models import Revision
+
+    revision = Revision.objects.filter(pk=revision_id).first()
+    if revision is None:
+        return 0
+    return prerender_latex(revision, getattr(revision.as_object(), field_name))
+
+
+def load_latex_renderings(revision_id):
+    """Return {(block_id, value_digest): html} for the typeset LaTeX of a revision."""
+    from porpoise_blocks.models import LatexRendering
+
+    if revision_id is None:
+        return {}
+    rows = LatexRendering.objects.filter(revision_id=revision_id).values_list(
+        "block_id", "source_hash", "html"
+    )
+    return {(block_id, source_hash): html for block_id, source_hash, html in rows}
+
+
+def load_latex_renderings_many(revision_ids):
+    """Return {revision_id: {(block_id, value_digest): html}} for several revisions, in one query."""
+    from porpoise_blocks.models import LatexRendering
+
+    renderings = {}
+    rows = LatexRendering.objects.filter(
+        revision_id__in=[revision_id for revision_id in revision_ids if revision_id is not None]
+    ).values_list("revision_id", "block_id", "source_hash", "html")
+    for revision_id, block_id, source_hash, html in rows:
+        renderings.setdefault(revision_id, {})[block_id, source_hash] = html
+    return renderings
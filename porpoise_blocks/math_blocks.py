@@ -1,7 +1,13 @@
+from django.utils.safestring import mark_safe
 from wagtail.blocks import TextBlock
 
 class LaTeXBlock(TextBlock):
+    def render_prerendered(self, value, markup):
+        """Render the block template around HTML typeset ahead of time."""
+        return self.render(value, context={"prerendered": mark_safe(markup)})
+
     class Meta:
         icon = "code"
         label = "LaTeX"
-        template = "porpoise_blocks/latex_block.html"
\ No newline at end of file
+        help_text = "Wrap your LaTeX in $$...$$ or \\(...\\)"
+        template = "porpoise_blocks/latex_block.html"
@@ -0,0 +1,115 @@
+"""
+Responsive images for lesson bodies.
+
+``ResponsiveImageBlock`` renders an image as a ``<picture>`` with a WebP
+``<source>`` and a JPEG ``<img>`` fallback, each with a ``srcset`` of the
+widths in ``RENDITION_WIDTHS`` up to the image's own width. All the images in
+a stream are fetched with one query, and their renditions with one more.
+
+The renditions are generated ahead of time, on publish and on upload (see
+porpoise_blocks/renditions.py), so a visitor only pays for generating one
+when that was skipped or failed.
+"""
+import copy
+
+from wagtail.images.blocks import ImageChooserBlock
+from wagtail.images.models import Filter, Picture
+from wagtail.images.shortcuts import get_rendition_or_not_found, get_renditions_or_not_found
+
+
+RENDITION_WIDTHS = (320, 640, 1024, 1600)
+
+# In order of preference; the last one is the <img> fallback.
+RENDITION_FORMATS = ("webp", "jpeg")
+
+# Every spec the block can ask for. Which of them an image uses depends on
+# its width (see ``rendition_specs``).
+RENDITION_SPECS = [
+    f"width-{width}|format-{image_format}"
+    for image_format in RENDITION_FORMATS
+    for width in RENDITION_WIDTHS
+]
+
+# The lesson column is at most 1024px wide.
+SIZES = "(min-width: 1024px) 1024px, 100vw"
+
+
+def rendition_specs(image):
+    """
+    The specs rendered for ``image``: each width narrower than the image,
+    plus the first one that isn't, which gives the image at its own width.
+    """
+    widths = []
+    for width in RENDITION_WIDTHS:
+        widths.append(width)
+        if width >= image.width:
+            break
+    return [
+        f"width-{width}|format-{image_format}"
+        for image_format in RENDITION_FORMATS
+        for width in widths
+    ]
+
+
+def rendition_filters(image):
+    return [Filter(spec=spec) for spec in rendition_specs(image)]
+
+
+class ResponsiveImageBlock(ImageChooserBlock):
+    def to_python(self, value):
+        if value is None:
+            return None
+        return self.bulk_to_python([value])[0]
+
+    def bulk_to_python(self, values):
+        """
+        Like ChooserBlock's, with the renditions this block renders fetched
+        for all the images in one more query.
+        """
+        objects = self.model_class.objects.prefetch_renditions(*RENDITION_SPECS).in_bulk(values)
+        seen_ids = set()
+        result = []
+        for id in values:
+            obj = objects.get(id)
+            if obj is not None and id in seen_ids:
+                # As in ChooserBlock: one instance per occurrence.
+                obj = copy.copy(obj)
+            result.append(obj)
+            seen_ids.add(id)
+        return result
+
+    def get_api_representation(self, value, context=None):
+        if not value:
+            return None
+        if value.is_svg():
+            renditions = {"original": get_rendition_or_not_found(value, "original")}
+        else:
+            renditions = get_renditions_or_not_found(value, rendition_filters(value))
+        return {
+            "id": value.pk,
+            "title": value.title,
+            "alt": value.default_alt_text,
+            "width": value.width,
+            "height": value.height,
+            "renditions": [
+                {
+                    "url": rendition.url,
+                    "width": rendition.width,
+                    "height": rendition.height,
+                    "format": spec.rpartition("format-")[2] or None,
+                }
+                for spec, rendition in renditions.items()
+            ],
+        }
+
+    def render_basic(self, value, context=None):
+        if not value:
+            return ""
+        if value.is_svg():
+            # Vector images are served as they are.
+            return get_rendition_or_not_found(value, "original").img_tag()
+        renditions = get_renditions_or_not_found(value, rendition_filters(value))
+        return Picture(renditions, {"sizes": SIZES, "loading": "lazy", "decoding": "async"}).__html__()
+
+    class Meta:
+        icon = "image"
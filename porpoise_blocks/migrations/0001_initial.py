@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('wagtailcore', '0094_alter_page_locale'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatexRendering',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('block_id', models.CharField(max_length=64)),
+                ('source_hash', models.CharField(db_index=True, max_length=64)),
+                ('renderer', models.CharField(max_length=50)),
+                ('html', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('revision', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='latex_renderings', to='wagtailcore.revision')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('revision', 'block_id'), name='unique_latex_rendering_per_block')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('porpoise_blocks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HighlightedCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=50)),
+                ('style', models.CharField(max_length=50)),
+                ('code_hash', models.CharField(max_length=64)),
+                ('html', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('code_hash', 'language', 'style'), name='unique_highlighted_code')],
+            },
+        ),
+    ]
@@ -1,3 +1,54 @@
 from django.db import models
 
-# Create your models here.
+
+class LatexRendering(models.Model):
+    """
+    LaTeX typeset at publish time, stored alongside the published revision.
+
+    ``html`` is the complete block markup, ready to be emitted as-is.
+    ``source_hash`` is ``render_cache.value_digest`` of the block source, so
+    the page template can match rows against body children without decoding.
+    """
+    revision = models.ForeignKey(
+        "wagtailcore.Revision",
+        related_name="latex_renderings",
+        on_delete=models.CASCADE,
+    )
+    block_id = models.CharField(max_length=64)
+    source_hash = models.CharField(max_length=64, db_index=True)
+    renderer = models.CharField(max_length=50)
+    html = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["revision", "block_id"], name="unique_latex_rendering_per_block"
+            ),
+        ]
+
+    def __str__(self):
+        return f"LaTeX {self.block_id} (revision {self.revision_id})"
+
+
+class HighlightedCode(models.Model):
+    """
+    Content-addressed store of server-side highlighted CodeBlock HTML.
+
+    Rows are immutable: an edit to a snippet produces a new ``code_hash``.
+    """
+    language = models.CharField(max_length=50)
+    style = models.CharField(max_length=50)
+    code_hash = models.CharField(max_length=64)
+    html = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["code_hash", "language", "style"], name="unique_highlighted_code"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.language}/{self.style} {self.code_hash[:12]}"
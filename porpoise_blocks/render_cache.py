@@ -0,0 +1,158 @@
+"""
+Rendered-HTML cache for StreamField children.
+
+Every child of a stream is keyed by its block type plus a hash of its raw
+(JSON) value. An unchanged block keeps the same key across edits and
+republishes, so a cache hit skips both ``to_python`` and the template render.
+
+Children whose HTML depends on other objects are not cached, because their
+HTML can change while their value doesn't. These are blocks that choose a
+page, image, document or snippet, and rich text with links or embeds:
+moving a linked page changes its URL, and re-cropping an image changes its
+renditions. They are rendered on every request, with what they refer to
+fetched in bulk.
+
+The cache alias is taken from ``settings.PORPOISE_BLOCK_CACHE``; set it to
+``None`` to render every block directly. Eviction and expiry are whatever the
+configured backend provides (``LocMemCache`` is LRU, bounded by MAX_ENTRIES).
+
+While ``block_timings`` holds a callable (see lesson_space/instrumentation.py),
+each rendered child is reported to it as ``(block_type, seconds)``.
+"""
+import hashlib
+import json
+import re
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.safestring import mark_safe
+from wagtail.blocks import ChooserBlock, ListBlock, StreamBlock, StructBlock
+
+
+KEY_PREFIX = "porpoise:block"
+
+block_timings = ContextVar("porpoise_block_timings", default=None)
+
+# Rich text links and embeds, resolved when the text is rendered.
+REFERENCE_PATTERN = re.compile(r"\b(?:linktype|embedtype)=")
+
+
+def get_block_cache():
+    """Return the configured block cache, or None when caching is disabled."""
+    alias = getattr(settings, "PORPOISE_BLOCK_CACHE", None)
+    if not alias:
+        return None
+    return caches[alias]
+
+
+def value_digest(raw_value):
+    """Return a stable SHA-256 hex digest of a block's JSON-ish value."""
+    payload = json.dumps(
+        raw_value, sort_keys=True, separators=(",", ":"), cls=DjangoJSONEncoder
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def prerendered_key(item):
+    """
+    Key of a raw stream child in a ``prerendered`` mapping: its block id and
+    value digest, so that only that child, with that value, matches.
+    """
+    return item.get("id") or "", value_digest(item["value"])
+
+
+def chooses_objects(block):
+    """Whether ``block``, or any block nested in it, is a chooser block."""
+    if isinstance(block, ChooserBlock):
+        return True
+    if isinstance(block, (StructBlock, StreamBlock)):
+        return any(chooses_objects(child) for child in block.child_blocks.values())
+    if isinstance(block, ListBlock):
+        return chooses_objects(block.child_block)
+    return False
+
+
+def is_cacheable(block, raw_value):
+    """Whether a child's HTML depends on its value alone (see the module docstring)."""
+    if chooses_objects(block):
+        return False
+    return not REFERENCE_PATTERN.search(json.dumps(raw_value, cls=DjangoJSONEncoder))
+
+
+def block_cache_key(block_type, raw_value):
+    """Build the cache key for one stream child from its JSON-ish value."""
+    return f"{KEY_PREFIX}:{block_type}:{value_digest(raw_value)}"
+
+
+def render_child(child):
+    """Render a single StreamChild the same way ``{{ block }}`` does."""
+    record = block_timings.get()
+    if record is None:
+        return str(child)
+    start = time.perf_counter()
+    html = str(child)
+    record(child.block_type, time.perf_counter() - start)
+    return html
+
+
+def render_stream(stream_value, prerendered=None):
+    """
+    Render every child of ``stream_value`` and return the joined HTML.
+
+    Keys are computed from the raw stream data, and all of them are fetched
+    with one ``get_many`` call. Only the misses are converted to Python values
+    and rendered, and they are written back with one ``set_many``. Children
+    that refer to other objects are always rendered. The pages, documents and
+    embeds the rendered rich text refers to are fetched up front, one query
+    per type.
+
+    ``prerendered`` optionally maps ``prerendered_key()`` of a child (its id
+    and value digest) to final HTML produced ahead of time (e.g. LaTeX typeset
+    at publish); those children are emitted as-is and never touch the cache.
+    """
+    from porpoise_blocks.rich_text import prefetch_entities
+
+    prerendered = prerendered or {}
+    cache = get_block_cache()
+
+    child_blocks = stream_value.stream_block.child_blocks
+    rendered = [None] * len(stream_value)
+    keys = {}
+    uncached = []
+    for index, item in enumerate(stream_value.raw_data):
+        block_id, digest = prerendered_key(item)
+        if (block_id, digest) in prerendered:
+            rendered[index] = prerendered[block_id, digest]
+        elif cache is None or not is_cacheable(child_blocks.get(item["type"]), item["value"]):
+            uncached.append(index)
+        else:
+            keys[index] = f"{KEY_PREFIX}:{item['type']}:{digest}"
+
+    found = cache.get_many(set(keys.values())) if keys else {}
+
+    misses = {}
+    for index, key in keys.items():
+        if not found.get(key):
+            misses.setdefault(key, index)
+
+    # Links and embeds in all the rich text about to be rendered are looked
+    # up together, not once per child.
+    missed = {}
+    to_render = [*misses.values(), *uncached]
+    if to_render:
+        with prefetch_entities(stream_value.raw_data[index]["value"] for index in to_render):
+            for key, index in misses.items():
+                missed[key] = render_child(stream_value[index])
+            for index in uncached:
+                rendered[index] = render_child(stream_value[index])
+
+    for index, key in keys.items():
+        rendered[index] = found.get(key) or missed[key]
+
+    if cache is not None and missed:
+        cache.set_many(missed)
+
+    return mark_safe("".join(rendered))
@@ -0,0 +1,94 @@
+"""
+Ahead-of-time generation of the renditions ResponsiveImageBlock renders.
+
+Generating a rendition opens, resizes and re-encodes the original, which
+takes from tens of milliseconds to over a second per rendition. Left to the
+first page view, a lesson with several new images makes that visitor wait for
+all of them. ``pregenerate_renditions()`` creates what's missing for a set of
+images instead, in a process pool when ``processes`` is above 1: the work is
+CPU-bound and the GIL would serialize it in threads.
+
+home/signals.py enqueues ``pregenerate_renditions_task`` when a lesson is
+published and when an image is saved, with the process count from
+``settings.PORPOISE_RENDITION_PROCESSES``. The ``backfill_renditions``
+management command covers lessons published before.
+"""
+import logging
+
+from django.conf import settings
+from django_tasks import task
+from wagtail.images import get_image_model
+from wagtail.images.blocks import ImageChooserBlock
+from wagtail.images.models import SourceImageIOError
+
+from porpoise_blocks.media_blocks import RENDITION_SPECS, rendition_filters
+from porpoise_blocks.worker_pool import fork_pool
+
+
+logger = logging.getLogger(__name__)
+
+
+def stream_image_ids(stream_value):
+    """Ids of the images chosen by the top-level image blocks of a stream, from the raw data."""
+    image_ids = set()
+    for item in stream_value.raw_data:
+        block = stream_value.stream_block.child_blocks.get(item["type"])
+        if isinstance(block, ImageChooserBlock) and item["value"]:
+            image_ids.add(item["value"])
+    return image_ids
+
+
+def missing_renditions(image):
+    """The filters ``image`` has no rendition for yet; needs its renditions prefetched."""
+    filters = rendition_filters(image)
+    existing = image.find_existing_renditions(*filters)
+    return [filter for filter in filters if filter not in existing]
+
+
+def pending_images(image_ids):
+    """Ids of the raster images among ``image_ids`` that miss a rendition (two queries)."""
+    images = get_image_model().objects.filter(pk__in=image_ids).prefetch_renditions(*RENDITION_SPECS)
+    return [image.pk for image in images if not image.is_svg() and missing_renditions(image)]
+
+
+def generate_image_renditions(image_id):
+    """
+    Create the missing renditions of one image. Returns ``(image_id, count)``,
+    with ``count`` None if the image is gone or its file can't be read.
+    Runs in pool workers, so it takes and returns plain values.
+    """
+    Image = get_image_model()
+    try:
+        image = Image.objects.prefetch_renditions(*RENDITION_SPECS).get(pk=image_id)
+        missing = missing_renditions(image)
+        if missing:
+            image.create_renditions(*missing)
+    except Image.DoesNotExist:
+        return image_id, None
+    except (SourceImageIOError, OSError):
+        logger.warning("Could not generate renditions for image %s.", image_id, exc_info=True)
+        return image_id, None
+    return image_id, len(missing)
+
+
+def pregenerate_renditions(image_ids, processes=1):
+    """
+    Create every missing rendition of the images in ``image_ids``. Returns
+    ``(images, renditions, failed)``: the images that needed work, the
+    renditions created and the images that failed.
+    """
+    pending = pending_images(image_ids)
+    if processes > 1 and len(pending) > 1:
+        with fork_pool(min(processes, len(pending))) as pool:
+            results = list(pool.map(generate_image_renditions, pending))
+    else:
+        results = list(map(generate_image_renditions, pending))
+
+    created = sum(count for _, count in results if count is not None)
+    failed = sum(1 for _, count in results if count is None)
+    return len(pending), created, failed
+
+
+@task()
+def pregenerate_renditions_task(image_ids):
+    pregenerate_renditions(image_ids, processes=getattr(settings, "PORPOISE_RENDITION_PROCESSES", 1))
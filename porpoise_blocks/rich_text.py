@@ -0,0 +1,162 @@
+"""
+Batched lookups for the entities (internal links, documents, media embeds)
+referenced from rich text.
+
+Wagtail expands each rich text value on its own, with one query per entity
+type for every value that has any. A lesson with a link in each of 60
+paragraphs makes 60 page queries. ``prefetch_entities()`` takes the raw values
+about to be rendered (``render_stream`` passes every child it renders),
+collects every reference in them and fetches each type once. The handlers
+registered by porpoise_blocks/wagtail_hooks.py answer from that prefetch
+while it is active, and query as usual outside it or for anything it missed.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.template.loader import render_to_string
+from django.utils.timezone import now
+from wagtail.documents.rich_text import DocumentLinkHandler as BaseDocumentLinkHandler
+from wagtail.embeds import format as embed_format
+from wagtail.embeds.embeds import get_embed_hash
+from wagtail.embeds.models import Embed
+from wagtail.embeds.rich_text import MediaEmbedHandler as BaseMediaEmbedHandler
+from wagtail.rich_text import features
+from wagtail.rich_text.pages import PageLinkHandler as BasePageLinkHandler
+from wagtail.rich_text.rewriters import FIND_A_TAG, FIND_EMBED_TAG, extract_attrs
+
+
+# handler class -> {prefetch key: instance or None}
+prefetched_entities = ContextVar("porpoise_prefetched_entities", default=None)
+
+
+class PrefetchedEntityMixin:
+    """
+    For a rich text EntityHandler: ``get_many()`` answers from the active
+    ``prefetch_entities()`` and only fetches what it doesn't hold.
+    """
+
+    @classmethod
+    def prefetch_key(cls, attrs):
+        return str(attrs.get("id"))
+
+    @classmethod
+    def fetch_many(cls, attrs_list):
+        return super().get_many(attrs_list)
+
+    @classmethod
+    def get_many(cls, attrs_list):
+        prefetched = prefetched_entities.get()
+        found = prefetched.get(cls) if prefetched is not None else None
+        if found is None:
+            return cls.fetch_many(attrs_list)
+
+        missing = {}
+        for attrs in attrs_list:
+            key = cls.prefetch_key(attrs)
+            if key not in found:
+                missing.setdefault(key, attrs)
+        if missing:
+            found.update(zip(missing, cls.fetch_many(list(missing.values()))))
+        return [found[cls.prefetch_key(attrs)] for attrs in attrs_list]
+
+
+class PageLinkHandler(PrefetchedEntityMixin, BasePageLinkHandler):
+    pass
+
+
+class DocumentLinkHandler(PrefetchedEntityMixin, BaseDocumentLinkHandler):
+    pass
+
+
+class MediaEmbedHandler(PrefetchedEntityMixin, BaseMediaEmbedHandler):
+    """
+    Wagtail's handler looks up each embed on its own. This one looks up
+    stored embeds in bulk. Embeds not stored yet (or expired) go through the
+    stock path, which asks the provider and stores the result.
+    """
+
+    @classmethod
+    def prefetch_key(cls, attrs):
+        return attrs.get("url")
+
+    @classmethod
+    def fetch_many(cls, attrs_list):
+        hashes = {get_embed_hash(attrs["url"]) for attrs in attrs_list}
+        embeds = {
+            embed.hash: embed
+            for embed in Embed.objects.exclude(cache_until__lte=now()).filter(hash__in=hashes)
+        }
+        return [embeds.get(get_embed_hash(attrs["url"])) for attrs in attrs_list]
+
+    @classmethod
+    def expand_db_attributes(cls, attrs):
+        return cls.expand_db_attributes_many([attrs])[0]
+
+    @classmethod
+    def expand_db_attributes_many(cls, attrs_list):
+        html = []
+        for attrs, embed in zip(attrs_list, cls.get_many(attrs_list)):
+            if embed is None:
+                html.append(embed_format.embed_to_frontend_html(attrs["url"]))
+            else:
+                html.append(render_to_string("wagtailembeds/embed_frontend.html", {"embed": embed}))
+        return html
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+
+def collect_references(raw_values):
+    """
+    ``{handler: {key: attrs}}`` for every link and embed in the strings found
+    anywhere in ``raw_values`` (StreamField JSON values), for the registered
+    handlers that take a prefetch.
+    """
+    handlers = {
+        "a": features.get_link_types(),
+        "embed": features.get_embed_types(),
+    }
+    references = defaultdict(dict)
+    for text in _strings(list(raw_values)):
+        if "linktype" not in text and "embedtype" not in text:
+            continue
+        for tag, pattern, type_attribute in (
+            ("a", FIND_A_TAG, "linktype"),
+            ("embed", FIND_EMBED_TAG, "embedtype"),
+        ):
+            for match in pattern.finditer(text):
+                attrs = extract_attrs(match.group(1))
+                handler = handlers[tag].get(attrs.get(type_attribute))
+                if handler is not None and issubclass(handler, PrefetchedEntityMixin):
+                    references[handler].setdefault(handler.prefetch_key(attrs), attrs)
+    return references
+
+
+@contextmanager
+def prefetch_entities(raw_values):
+    """
+    Within the block, rich text expanded through the prefetching handlers
+    uses the entities referenced from ``raw_values``, fetched in one query
+    per type.
+    """
+    outer = prefetched_entities.get() or {}
+    prefetched = {handler: dict(found) for handler, found in outer.items()}
+    for handler, attrs_by_key in collect_references(raw_values).items():
+        found = prefetched.setdefault(handler, {})
+        missing = {key: attrs for key, attrs in attrs_by_key.items() if key not in found}
+        if missing:
+            found.update(zip(missing, handler.fetch_many(list(missing.values()))))
+    token = prefetched_entities.set(prefetched)
+    try:
+        yield
+    finally:
+        prefetched_entities.reset(token)
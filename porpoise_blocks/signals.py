@@ -0,0 +1,8 @@
+from django.dispatch import Signal
+
+
+# Sent by porpoise_blocks.latex.prerender_latex once the typeset LaTeX of a
+# revision is stored, with the revision's page class as sender and
+# ``revision``. Anything built from the live body before then, at publish,
+# can be rebuilt.
+latex_prerendered = Signal()
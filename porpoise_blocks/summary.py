@@ -0,0 +1,49 @@
+"""
+Derived summaries of a porpoise block stream: table of contents, excerpt and
+reading time, computed in one pass over the stored JSON (no child is
+converted to a Python value or rendered).
+
+Callers store the result at publish time (see home/lesson_index.py) so that
+listings and cards never decode the body.
+"""
+import math
+
+from django.utils.text import Truncator
+
+from porpoise_blocks.indexing import block_text
+
+
+WORDS_PER_MINUTE = 200
+# Code and formulas are read more slowly than prose.
+SLOW_BLOCK_TYPES = {"code", "latex"}
+SLOW_READING_FACTOR = 2
+EXCERPT_WORDS = 40
+
+
+def summarize_stream(stream_value, excerpt_words=EXCERPT_WORDS):
+    """
+    Return {"toc": [{"text", "id"}], "excerpt": str, "word_count": int,
+    "reading_time": int (minutes, rounded up)}.
+    """
+    toc = []
+    excerpt = ""
+    words = 0
+    weighted_words = 0
+    for item in stream_value.raw_data:
+        block_type = item["type"]
+        text = block_text(block_type, item["value"])
+        count = len(text.split())
+        words += count
+        weighted_words += count * (SLOW_READING_FACTOR if block_type in SLOW_BLOCK_TYPES else 1)
+
+        if block_type == "heading" and text:
+            toc.append({"text": text, "id": item.get("id")})
+        elif block_type == "paragraph" and text and not excerpt:
+            excerpt = Truncator(text).words(excerpt_words)
+
+    return {
+        "toc": toc,
+        "excerpt": excerpt,
+        "word_count": words,
+        "reading_time": math.ceil(weighted_words / WORDS_PER_MINUTE),
+    }
@@ -0,0 +1,25 @@
+from django import template
+from django.utils.html import format_html
+
+from porpoise_blocks.highlighting import highlight_css
+
+from porpoise_blocks.render_cache import render_stream as _render_stream
+
+register = template.Library()
+
+
+@register.simple_tag
+def render_stream(stream_value, prerendered=None):
+    """
+    Render a StreamField value through the block render cache.
+
+    Usage: {% render_stream page.body %}
+           {% render_stream page.body prerendered=page.prerendered_blocks %}
+    """
+    return _render_stream(stream_value, prerendered=prerendered)
+
+
+@register.simple_tag
+def code_highlight_css():
+    """Inline <style> for server-side highlighted CodeBlocks."""
+    return format_html("<style>{}</style>", highlight_css())
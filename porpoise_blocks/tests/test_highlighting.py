@@ -0,0 +1,68 @@
+import pytest
+from unittest.mock import patch
+
+from wagtail.blocks import StreamBlock
+
+from porpoise_blocks import highlighting
+from porpoise_blocks.common import ESSENTIAL_BLOCKS
+from porpoise_blocks.highlighting import code_hash, highlight_code, highlight_stream
+from porpoise_blocks.models import HighlightedCode
+from porpoise_blocks.text_blocks import CodeBlock
+
+
+def test_highlight_code_emits_token_spans():
+    html = highlight_code("python", "default", "x = 1")
+    assert '<span class="n">x</span>' in html
+    assert "line-numbers-rows" not in html
+
+
+def test_highlight_code_lined_style_adds_gutter():
+    html = highlight_code("bash", "lined", "echo a\necho b\n")
+    assert html.endswith(
+        '<span aria-hidden="true" class="line-numbers-rows"><span></span><span></span></span>'
+    )
+
+
+def test_highlight_code_escapes_plain_text():
+    assert "&lt;b&gt;" in highlight_code("text", "default", "<b>")
+
+
+@pytest.mark.django_db
+def test_code_block_render_highlights_without_storing():
+    block = CodeBlock()
+    value = block.to_python({"language": "python", "code": "print('hi')", "style": "lined"})
+
+    html = block.render(value)
+
+    assert '<pre class="highlight lang-python line-numbers">' in html
+    assert '<span class="nb">print</span>' in html
+    assert "language-python" not in html
+    assert not HighlightedCode.objects.exists()
+
+
+@pytest.mark.django_db
+def test_code_block_render_uses_stored_html():
+    HighlightedCode.objects.create(
+        language="python", style="lined", code_hash=code_hash("print('hi')"), html="<b>stored</b>"
+    )
+    block = CodeBlock()
+    value = block.to_python({"language": "python", "code": "print('hi')", "style": "lined"})
+
+    with patch.object(highlighting, "highlight_code") as highlight:
+        html = block.render(value)
+
+    assert "<b>stored</b>" in html
+    highlight.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_highlight_stream_only_highlights_new_snippets():
+    stream = StreamBlock(ESSENTIAL_BLOCKS).to_python([
+        {"type": "code", "value": {"language": "json", "code": "{}", "style": "box"}},
+        {"type": "heading", "value": "Not code"},
+    ])
+    assert highlight_stream(stream) == 1
+
+    with patch.object(highlighting, "highlight_code") as highlight:
+        assert highlight_stream(stream) == 0
+    highlight.assert_not_called()
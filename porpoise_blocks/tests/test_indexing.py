@@ -0,0 +1,50 @@
+from django.test import override_settings
+from wagtail.blocks import StreamBlock
+
+from porpoise_blocks.common import ESSENTIAL_BLOCKS
+from porpoise_blocks.indexing import block_text, stream_text
+
+
+def stream(*items):
+    return StreamBlock(ESSENTIAL_BLOCKS).to_python(
+        [{"type": block_type, "value": value} for block_type, value in items]
+    )
+
+
+def test_block_text_strips_markup_and_joins_parts():
+    assert block_text("paragraph", "<p>Light <b>bends</b>.</p>") == "Light bends."
+    assert block_text(
+        "callout", {"title": "Careful", "body": "<p>Hot <i>glass</i></p>", "style": "warning"}
+    ) == "Careful Hot glass"
+    assert block_text(
+        "quote", {"quote": "<p>Eppur si muove</p>", "attribution": "Galileo", "style": "default"}
+    ) == "Eppur si muove Galileo"
+    assert block_text(
+        "code", {"heading": "", "language": "python", "code": "print(n)", "caption": "refract.py"}
+    ) == "refract.py print(n)"
+    assert block_text("image", 7) == ""
+
+
+def test_stream_text_groups_blocks_by_tier():
+    value = stream(
+        ("heading", "Snell's law"),
+        ("paragraph", "<p>Light bends.</p>"),
+        ("code", {"language": "python", "code": "n1 * sin(a)", "caption": ""}),
+        ("latex", "$$n_1 \\sin a$$"),
+    )
+
+    assert stream_text(value) == {
+        "high": "Snell's law",
+        "normal": "Light bends.",
+        "low": "n1 * sin(a)\n$$n_1 \\sin a$$",
+    }
+
+
+@override_settings(PORPOISE_SEARCH_WEIGHTS={"code": "high", "latex": None})
+def test_weights_setting_moves_and_drops_block_types():
+    value = stream(
+        ("code", {"language": "python", "code": "refract()", "caption": ""}),
+        ("latex", "$$x$$"),
+    )
+
+    assert stream_text(value) == {"high": "refract()", "normal": "", "low": ""}
@@ -0,0 +1,154 @@
+import io
+import json
+import pytest
+from unittest.mock import Mock, patch
+
+from django.core.management import call_command
+from django.test import override_settings
+from wagtail.models import Page
+
+from home.models import HomePage, LessonPage
+from porpoise_blocks.latex import (
+    KatexCommandRenderer,
+    LocalLatexRenderer,
+    render_latex_sources,
+    split_math,
+)
+from porpoise_blocks.models import LatexRendering
+from porpoise_blocks.render_cache import render_stream, value_digest
+
+
+LOCAL_RENDERER = {"BACKEND": "porpoise_blocks.latex.LocalLatexRenderer"}
+
+
+def test_split_math_finds_display_and_inline_spans():
+    parts = split_math(r"Energy: $$E=mc^2$$ where \(c\) is light speed.")
+    assert parts == [
+        ("text", "Energy: "),
+        ("display", "E=mc^2"),
+        ("text", " where "),
+        ("inline", "c"),
+        ("text", " is light speed."),
+    ]
+
+
+def test_local_renderer_escapes_tex():
+    html = LocalLatexRenderer().render(r"$$a < b$$")
+    assert html == '<div class="math math-display">a &lt; b</div>'
+
+
+def test_katex_renderer_typesets_a_batch_in_one_process():
+    renderer = KatexCommandRenderer(command=["node"])
+    sources = [r"$$a$$ and \(b\)", r"\(b\)"]
+    typeset = '["<a>", "<b>"]'
+
+    with patch("porpoise_blocks.latex.shutil.which", return_value="/usr/bin/node"), patch(
+        "porpoise_blocks.latex.subprocess.run", return_value=Mock(stdout=typeset)
+    ) as run:
+        html = renderer.render_many(sources)
+
+    run.assert_called_once()
+    assert json.loads(run.call_args.kwargs["input"]) == [["a", True], ["b", False]]
+    assert html == {sources[0]: "<a><p>and</p><b>", sources[1]: "<b>"}
+
+
+def test_missing_katex_leaves_math_to_the_browser(caplog):
+    config = {
+        "BACKEND": "porpoise_blocks.latex.KatexCommandRenderer",
+        "OPTIONS": {"command": ["no-such-node"]},
+    }
+    with override_settings(PORPOISE_LATEX_RENDERER=config):
+        assert render_latex_sources([r"$$a$$"]) == {r"$$a$$": None}
+    assert not [record for record in caplog.records if record.levelname == "WARNING"]
+
+
+def publish_lesson(body, capture_on_commit):
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Test Home", slug="test-home")
+    root.add_child(instance=homepage)
+    lesson = LessonPage(title="Maths", slug="maths", domain="math")
+    lesson.body = body
+    homepage.add_child(instance=lesson)
+    # Typesetting is a task, enqueued on commit.
+    with capture_on_commit(execute=True):
+        lesson.save_revision().publish()
+    lesson.refresh_from_db()
+    return lesson
+
+
+@pytest.mark.django_db
+@override_settings(PORPOISE_LATEX_RENDERER=LOCAL_RENDERER)
+def test_publish_stores_rendering_for_live_revision(django_capture_on_commit_callbacks):
+    lesson = publish_lesson(
+        [("latex", r"$$E=mc^2$$"), ("heading", "Intro")], django_capture_on_commit_callbacks
+    )
+
+    rendering = LatexRendering.objects.get()
+    assert rendering.revision_id == lesson.live_revision_id
+    assert rendering.source_hash == value_digest(r"$$E=mc^2$$")
+    assert "latex-prerendered" in rendering.html
+    assert "math-display" in rendering.html
+
+    page = LessonPage.objects.get(pk=lesson.pk)
+    assert page.prerendered_blocks == {(rendering.block_id, rendering.source_hash): rendering.html}
+
+
+@pytest.mark.django_db
+@override_settings(PORPOISE_LATEX_RENDERER=LOCAL_RENDERER, PORPOISE_BLOCK_CACHE=None)
+def test_rendering_only_replaces_its_own_block(django_capture_on_commit_callbacks):
+    lesson = publish_lesson(
+        [("latex", r"\(x^2\)"), ("heading", r"\(x^2\)")], django_capture_on_commit_callbacks
+    )
+
+    page = LessonPage.objects.get(pk=lesson.pk)
+    html = render_stream(page.body, prerendered=page.prerendered_blocks)
+
+    assert html.count("latex-prerendered") == 1
+    assert "math-inline" in html
+    # The heading is left as its own text.
+    assert html.endswith(r"\(x^2\)")
+
+
+@pytest.mark.django_db
+@override_settings(PORPOISE_LATEX_RENDERER=LOCAL_RENDERER)
+def test_republish_only_renders_changed_sources(django_capture_on_commit_callbacks):
+    lesson = publish_lesson(
+        [("latex", r"$$a$$"), ("latex", r"$$b$$")], django_capture_on_commit_callbacks
+    )
+
+    lesson.body = [("latex", r"$$a$$"), ("latex", r"$$c$$")]
+    with patch.object(
+        LocalLatexRenderer, "render_math", autospec=True, return_value="<b>c</b>"
+    ) as render_math, django_capture_on_commit_callbacks(execute=True):
+        lesson.save_revision().publish()
+    lesson.refresh_from_db()
+
+    assert [call.args[1] for call in render_math.call_args_list] == ["c"]
+    assert LatexRendering.objects.filter(revision=lesson.live_revision).count() == 2
+
+
+@pytest.mark.django_db
+@override_settings(PORPOISE_LATEX_RENDERER=LOCAL_RENDERER)
+def test_prerender_latex_command_backfills_missing_rows(django_capture_on_commit_callbacks):
+    lesson = publish_lesson([("latex", r"\(x^2\)")], django_capture_on_commit_callbacks)
+    LatexRendering.objects.all().delete()
+
+    call_command("prerender_latex", processes=1, stdout=io.StringIO())
+
+    rendering = LatexRendering.objects.get()
+    assert rendering.revision_id == lesson.live_revision_id
+    assert "math-inline" in rendering.html
+
+
+@pytest.mark.django_db
+@override_settings(PORPOISE_LATEX_RENDERER=LOCAL_RENDERER)
+def test_prerender_latex_command_renders_in_worker_processes(django_capture_on_commit_callbacks):
+    lesson = publish_lesson(
+        [("latex", r"\(x^2\)"), ("latex", r"$$y$$"), ("latex", r"\(z\)")],
+        django_capture_on_commit_callbacks,
+    )
+    LatexRendering.objects.all().delete()
+
+    call_command("prerender_latex", processes=2, stdout=io.StringIO())
+
+    assert LatexRendering.objects.filter(revision=lesson.live_revision).count() == 3
@@ -0,0 +1,99 @@
+import pytest
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.test import override_settings
+from wagtail.blocks import ListBlock, StreamBlock, StructBlock
+
+from porpoise_blocks import render_cache
+from porpoise_blocks.common import ESSENTIAL_BLOCKS
+from porpoise_blocks.media_blocks import ResponsiveImageBlock
+from porpoise_blocks.render_cache import block_cache_key, render_stream
+
+
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "blocks": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "test-porpoise-blocks",
+    },
+}
+
+
+def make_stream(raw):
+    return StreamBlock(ESSENTIAL_BLOCKS).to_python(raw)
+
+
+def sample_raw():
+    return [
+        {"type": "heading", "value": "Kinematics", "id": "a"},
+        {"type": "paragraph", "value": "<p>Velocity is a vector.</p>", "id": "b"},
+        {"type": "latex", "value": "$$v = dx/dt$$", "id": "c"},
+    ]
+
+
+@pytest.fixture(autouse=True)
+def block_cache():
+    with override_settings(CACHES=TEST_CACHES, PORPOISE_BLOCK_CACHE="blocks"):
+        caches["blocks"].clear()
+        yield caches["blocks"]
+
+
+def test_block_cache_key_ignores_dict_ordering():
+    a = block_cache_key("quote", {"quote": "<p>Hi</p>", "style": "default"})
+    b = block_cache_key("quote", {"style": "default", "quote": "<p>Hi</p>"})
+    assert a == b
+    assert a != block_cache_key("callout", {"quote": "<p>Hi</p>", "style": "default"})
+
+
+def test_render_stream_matches_uncached_output():
+    html = render_stream(make_stream(sample_raw()))
+    expected = "".join(str(child) for child in make_stream(sample_raw()))
+    assert html == expected
+    assert "Velocity is a vector." in html
+
+
+def test_render_stream_skips_cached_blocks():
+    render_stream(make_stream(sample_raw()))
+
+    with patch.object(render_cache, "render_child") as render_child:
+        render_stream(make_stream(sample_raw()))
+    render_child.assert_not_called()
+
+
+def test_render_stream_only_renders_edited_block():
+    render_stream(make_stream(sample_raw()))
+
+    edited = sample_raw()
+    edited[1]["value"] = "<p>Speed is a scalar.</p>"
+    with patch.object(render_cache, "render_child", return_value="x") as render_child:
+        render_stream(make_stream(edited))
+    assert render_child.call_count == 1
+
+
+@override_settings(PORPOISE_BLOCK_CACHE=None)
+def test_render_stream_without_cache(block_cache):
+    html = render_stream(make_stream(sample_raw()))
+    assert "Kinematics" in html
+    assert block_cache.get(block_cache_key("heading", "Kinematics")) is None
+
+
+@pytest.mark.django_db
+def test_blocks_referring_to_other_objects_are_not_cached(block_cache):
+    raw = sample_raw() + [
+        {"type": "paragraph", "value": '<p>See <a linktype="page" id="1">root</a>.</p>', "id": "d"},
+    ]
+    render_stream(make_stream(raw))
+
+    assert block_cache.get(block_cache_key("paragraph", raw[3]["value"])) is None
+    with patch.object(render_cache, "render_child", return_value="x") as render_child:
+        render_stream(make_stream(raw))
+    assert render_child.call_count == 1
+
+
+def test_chooser_blocks_are_never_cacheable():
+    assert not render_cache.is_cacheable(ResponsiveImageBlock(), 1)
+    assert not render_cache.is_cacheable(
+        StructBlock([("images", ListBlock(ResponsiveImageBlock()))]), {"images": [1]}
+    )
+    assert render_cache.is_cacheable(StreamBlock(ESSENTIAL_BLOCKS).child_blocks["heading"], "Hi")
@@ -0,0 +1,142 @@
+import io
+
+import PIL.Image
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from wagtail.images import get_image_model
+from wagtail.models import Page
+
+from home.models import HomePage, LessonPage
+from porpoise_blocks.media_blocks import rendition_specs
+from porpoise_blocks.render_cache import render_stream
+from porpoise_blocks.renditions import pending_images, pregenerate_renditions
+
+
+pytestmark = pytest.mark.django_db
+
+Image = get_image_model()
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path):
+    with override_settings(MEDIA_ROOT=str(tmp_path), PORPOISE_BLOCK_CACHE=None):
+        yield tmp_path
+
+
+def make_image(title, width=800, height=600):
+    buffer = io.BytesIO()
+    PIL.Image.new("RGB", (width, height), "teal").save(buffer, "PNG")
+    return Image.objects.create(title=title, file=ImageFile(buffer, name=f"{title}.png"))
+
+
+def rendition_count(image):
+    return image.renditions.count()
+
+
+def publish_lesson(body):
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Images Home", slug="images-home")
+    root.add_child(instance=homepage)
+    lesson = LessonPage(title="Pictures", slug="pictures", domain="art")
+    lesson.body = body
+    homepage.add_child(instance=lesson)
+    lesson.save_revision().publish()
+    return LessonPage.objects.get(pk=lesson.pk)
+
+
+def test_specs_stop_at_the_image_width():
+    assert rendition_specs(Image(width=800, height=600)) == [
+        "width-320|format-webp",
+        "width-640|format-webp",
+        "width-1024|format-webp",
+        "width-320|format-jpeg",
+        "width-640|format-jpeg",
+        "width-1024|format-jpeg",
+    ]
+    assert rendition_specs(Image(width=200, height=100)) == [
+        "width-320|format-webp",
+        "width-320|format-jpeg",
+    ]
+
+
+def test_publish_generates_renditions(django_capture_on_commit_callbacks):
+    images = [make_image(f"photo-{number}") for number in range(3)]
+    assert all(rendition_count(image) == 0 for image in images)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        publish_lesson([("image", image) for image in images])
+
+    for image in images:
+        assert rendition_count(image) == 6
+    assert pending_images([image.pk for image in images]) == []
+
+
+def test_upload_generates_renditions(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        image = make_image("upload", width=500)
+
+    assert sorted(image.renditions.values_list("filter_spec", flat=True)) == sorted(
+        rendition_specs(image)
+    )
+
+
+def test_body_images_render_with_two_queries():
+    images = [make_image(f"photo-{number}") for number in range(5)]
+    pregenerate_renditions([image.pk for image in images])
+    lesson = publish_lesson(
+        [("heading", "Pictures")] + [("image", image) for image in images]
+    )
+
+    page = LessonPage.objects.get(pk=lesson.pk)
+    with CaptureQueriesContext(connection) as queries:
+        html = render_stream(page.body)
+
+    # The images, then all their renditions.
+    assert len(queries) == 2
+    assert html.count("<picture>") == 5
+    assert html.count('type="image/webp"') == 5
+    assert ".width-640.format-webp.webp 640w" in html
+    assert 'sizes="(min-width: 1024px) 1024px, 100vw"' in html
+
+
+def test_backfill_generates_only_missing_renditions():
+    images = [make_image(f"photo-{number}") for number in range(2)]
+    publish_lesson([("image", image) for image in images])
+    # As for lessons published before renditions were generated ahead.
+    Image.get_rendition_model().objects.all().delete()
+    pregenerate_renditions([images[0].pk])
+
+    out = io.StringIO()
+    call_command("backfill_renditions", processes=1, stdout=out)
+    assert "Generated 6 renditions for 1 images (0 failed)" in out.getvalue()
+    assert rendition_count(images[1]) == 6
+
+    out = io.StringIO()
+    call_command("backfill_renditions", processes=1, stdout=out)
+    assert "Generated 0 renditions for 0 images" in out.getvalue()
+
+
+def test_missing_file_is_reported_as_failed():
+    image = make_image("gone")
+    image.file.storage.delete(image.file.name)
+
+    assert pregenerate_renditions([image.pk]) == (1, 0, 1)
+
+
+def test_api_representation_lists_renditions():
+    from porpoise_blocks.api import serialize_stream
+
+    image = make_image("api", width=500)
+    lesson = publish_lesson([("image", image)])
+
+    (block,) = serialize_stream(LessonPage.objects.get(pk=lesson.pk).body)
+    assert block["type"] == "image"
+    assert block["value"]["id"] == image.pk
+    assert [(rendition["width"], rendition["format"]) for rendition in block["value"]["renditions"]] == [
+        (320, "webp"), (500, "webp"), (320, "jpeg"), (500, "jpeg"),
+    ]
+    assert block["html"].startswith("<picture>")
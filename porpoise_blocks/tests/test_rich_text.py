@@ -0,0 +1,125 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from wagtail.blocks import StreamBlock
+from wagtail.embeds.embeds import get_embed_hash
+from wagtail.embeds.models import Embed
+from wagtail.models import Page, Site
+from wagtail.rich_text import features
+
+from home.models import HomePage
+from porpoise_blocks import rich_text
+from porpoise_blocks.common import ESSENTIAL_BLOCKS
+from porpoise_blocks.render_cache import render_stream
+
+
+pytestmark = [
+    pytest.mark.django_db,
+    # Render every block, so each test sees the lookups.
+    pytest.mark.usefixtures("no_block_cache"),
+]
+
+
+@pytest.fixture
+def no_block_cache():
+    with override_settings(PORPOISE_BLOCK_CACHE=None):
+        yield
+
+
+@pytest.fixture
+def pages():
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Links Home", slug="links-home")
+    root.add_child(instance=homepage)
+    Site.objects.update(root_page=homepage)
+    Site.clear_site_root_paths_cache()
+    targets = []
+    for number in range(12):
+        target = HomePage(title=f"Target {number}", slug=f"target-{number}")
+        homepage.add_child(instance=target)
+        targets.append(target)
+    yield targets
+    # Page URLs come from root paths cached outside the test transaction.
+    Site.clear_site_root_paths_cache()
+
+
+def linked_body(targets):
+    raw = []
+    for number, target in enumerate(targets):
+        link = f'<a linktype="page" id="{target.id}">target {number}</a>'
+        if number % 3 == 0:
+            raw.append({"type": "paragraph", "value": f"<p>See {link}.</p>"})
+        elif number % 3 == 1:
+            raw.append({"type": "callout", "value": {
+                "title": "Note", "body": f"<p>{link}</p>", "style": "info",
+            }})
+        else:
+            raw.append({"type": "quote", "value": {
+                "quote": f"<p>{link}</p>", "attribution": "", "style": "default",
+            }})
+    return StreamBlock(ESSENTIAL_BLOCKS).to_python(raw)
+
+
+def render_queries(stream):
+    with CaptureQueriesContext(connection) as queries:
+        html = render_stream(stream)
+    return html, len(queries)
+
+
+def test_prefetching_handlers_are_registered():
+    assert features.get_link_types()["page"] is rich_text.PageLinkHandler
+    assert features.get_link_types()["document"] is rich_text.DocumentLinkHandler
+    assert features.get_embed_types()["media"] is rich_text.MediaEmbedHandler
+
+
+def test_rendered_links_match_one_by_one_rendering(pages):
+    stream = linked_body(pages)
+
+    html = render_stream(stream)
+
+    assert html == "".join(str(child) for child in linked_body(pages))
+    for target in pages:
+        assert f'<a href="{target.url}">' in html
+
+
+def test_query_count_does_not_grow_with_links(pages):
+    # Site root paths are cached after the first page URL.
+    render_stream(linked_body(pages[:1]))
+    _, few = render_queries(linked_body(pages[:2]))
+    html, many = render_queries(linked_body(pages))
+
+    assert many == few
+    assert html.count('<a href="/target-') == 12
+
+
+def test_missing_pages_render_empty_links(pages):
+    stream = StreamBlock(ESSENTIAL_BLOCKS).to_python([
+        {"type": "paragraph", "value": '<p><a linktype="page" id="999999">gone</a></p>'},
+    ])
+
+    assert "<a>gone</a>" in render_stream(stream)
+
+
+def test_stored_embeds_are_fetched_in_bulk():
+    urls = [f"https://example.com/video/{number}" for number in range(3)]
+    for url in urls:
+        Embed.objects.create(
+            url=url, hash=get_embed_hash(url), type="video", html=f"<iframe src='{url}'></iframe>"
+        )
+    raw = [
+        {"type": "paragraph", "value": f'<embed embedtype="media" url="{url}"/>'} for url in urls
+    ]
+
+    with CaptureQueriesContext(connection) as queries:
+        html = render_stream(StreamBlock(ESSENTIAL_BLOCKS).to_python(raw))
+
+    assert len(queries) == 1
+    for url in urls:
+        assert f"<iframe src='{url}'></iframe>" in html
+
+
+def test_handlers_query_as_usual_outside_a_prefetch(pages):
+    html = rich_text.PageLinkHandler.expand_db_attributes({"id": str(pages[0].id)})
+
+    assert html == f'<a href="{pages[0].url}">'
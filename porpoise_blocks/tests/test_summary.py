@@ -0,0 +1,40 @@
+from wagtail.blocks import StreamBlock
+
+from porpoise_blocks.common import ESSENTIAL_BLOCKS
+from porpoise_blocks.summary import summarize_stream
+
+
+def stream(*items):
+    return StreamBlock(ESSENTIAL_BLOCKS).to_python(
+        [{"type": block_type, "value": value, "id": f"b{n}"} for n, (block_type, value) in enumerate(items)]
+    )
+
+
+def test_summary_collects_toc_excerpt_and_reading_time():
+    summary = summarize_stream(stream(
+        ("heading", "Introduction"),
+        ("callout", {"title": "Note", "body": "<p>Not the excerpt.</p>", "style": "info"}),
+        ("paragraph", "<p>Light <b>bends</b> at a boundary.</p>"),
+        ("paragraph", "<p>Second paragraph.</p>"),
+        ("heading", "Snell's law"),
+        ("code", {"language": "python", "code": "n1 * sin(a1) == n2 * sin(a2)"}),
+    ))
+
+    assert summary["toc"] == [
+        {"text": "Introduction", "id": "b0"},
+        {"text": "Snell's law", "id": "b4"},
+    ]
+    assert summary["excerpt"] == "Light bends at a boundary."
+    assert summary["word_count"] == 21
+    assert summary["reading_time"] == 1
+
+
+def test_excerpt_is_truncated_and_long_bodies_take_longer():
+    summary = summarize_stream(stream(("paragraph", "<p>" + "word " * 500 + "</p>")), excerpt_words=5)
+
+    assert summary["excerpt"] == "word word word word word…"
+    assert summary["reading_time"] == 3
+
+
+def test_empty_stream():
+    assert summarize_stream(stream()) == {"toc": [], "excerpt": "", "word_count": 0, "reading_time": 0}
@@ -152,6 +152,17 @@ class CodeBlock(blocks.StructBlock):
         label="Style",
         help_text="Visual style of the code block."
     )
+
+    def get_context(self, value, parent_context=None):
+        # Highlighted server-side (see porpoise_blocks/highlighting.py), so
+        # the browser doesn't re-tokenize the snippet on every view.
+        from porpoise_blocks.highlighting import highlighted_code
+
+        context = super().get_context(value, parent_context=parent_context)
+        context["highlighted"] = highlighted_code(
+            value.get("language"), value.get("style"), value.get("code") or ""
+        )
+        return context
     
     class Meta:
         icon = "code"
@@ -0,0 +1,15 @@
+from wagtail import hooks
+
+from porpoise_blocks import rich_text
+
+
+# After Wagtail's own registrations (order 0), which these replace.
+@hooks.register("register_rich_text_features", order=100)
+def register_prefetching_entity_handlers(features):
+    # features.link_types, not get_link_types(): that would scan the hooks again.
+    if "page" in features.link_types:
+        features.register_link_type(rich_text.PageLinkHandler)
+    if "document" in features.link_types:
+        features.register_link_type(rich_text.DocumentLinkHandler)
+    if "media" in features.embed_types:
+        features.register_embed_type(rich_text.MediaEmbedHandler)
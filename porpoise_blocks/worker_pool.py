@@ -0,0 +1,28 @@
+"""
+Process pools for work done in parallel: exports, LaTeX and renditions.
+
+``ProcessPoolExecutor`` forks its workers on the first ``submit``/``map``,
+not when it is created. By then a command has usually queried the database
+again, and every worker would inherit that open connection, sharing one
+socket with the parent. ``fork_pool`` closes the connections and forks all
+the workers right away, so they open their own.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections
+
+
+def _ready():
+    return True
+
+
+def fork_pool(processes):
+    """A started pool of ``processes`` forked workers without database connections."""
+    connections.close_all()
+    pool = ProcessPoolExecutor(
+        max_workers=processes, mp_context=multiprocessing.get_context("fork")
+    )
+    # With "fork", the first task starts every worker at once.
+    pool.submit(_ready).result()
+    return pool
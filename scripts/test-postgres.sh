@@ -0,0 +1,29 @@
+#!/bin/sh
+# Run the test suite against a throwaway local PostgreSQL cluster.
+#
+#     scripts/test-postgres.sh [pytest args...]
+#
+# Needs the PostgreSQL server binaries (initdb, pg_ctl; e.g. the Debian
+# "postgresql" package) and psycopg (requirements-production.txt). The cluster
+# lives in a temporary directory, listens only on a Unix socket there, and is
+# removed on exit. initdb refuses to run as root: in a container, run this as
+# the "wagtail" user.
+set -eu
+
+if ! command -v initdb >/dev/null 2>&1; then
+    for dir in /usr/lib/postgresql/*/bin; do
+        [ -x "$dir/initdb" ] && PATH="$dir:$PATH"
+    done
+fi
+command -v initdb >/dev/null 2>&1 || { echo "initdb not found; install PostgreSQL." >&2; exit 1; }
+
+cluster=$(mktemp -d)
+trap 'pg_ctl -D "$cluster/data" -m immediate stop >/dev/null 2>&1 || true; rm -rf "$cluster"' EXIT INT TERM
+
+initdb -D "$cluster/data" -U postgres --auth=trust >/dev/null
+pg_ctl -D "$cluster/data" -l "$cluster/server.log" -w \
+    -o "-k $cluster -c listen_addresses='' -c fsync=off -c full_page_writes=off" start >/dev/null
+
+cd "$(dirname "$0")/.."
+DATABASE_ENGINE=postgresql PGHOST="$cluster" PGUSER=postgres PGDATABASE=lesson_space \
+    python -m pytest "$@"
@@ -0,0 +1,254 @@
+"""
+Lesson-aware search: full-text matches narrowed by domain and tag, with
+per-domain and per-tag counts, cached in a short-TTL cache.
+
+There are two cache layers, both keyed by the normalized query:
+
+* the ranked ids matching the query (one search backend hit per query);
+* the filtered ids and facet counts for each (query, domain, tag) combination.
+  These are computed from the denormalized lesson index, never the page tree.
+
+The first request for a key takes a short lock (``cache.add``). Concurrent
+requests for the same key wait for its result, so a classroom typing the
+same term does one search between them. With more than one worker, point
+the "search" cache at a shared backend.
+
+The site-wide search caches its ranked page ids the same way
+(``page_search``), which is what search/pagination.py pages through.
+
+The ``a``-prefixed functions are the async versions used by the search
+views. They read and write the cache with its async API and only go to a
+thread (``sync_to_async``) for the search backend and the facet queries.
+A cached search therefore never blocks the event loop or waits behind sync
+views.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from taggit.models import Tag
+from wagtail.models import Page
+
+from home.models import LessonIndexEntry, LessonPage
+
+from .pagination import max_results
+
+
+FACET_LIMIT = 30
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2.0
+LOCK_POLL = 0.05
+
+
+def get_search_cache():
+    return caches[getattr(settings, "LESSON_SEARCH_CACHE", "default")]
+
+
+def normalize_query(query):
+    return " ".join((query or "").split()).lower()
+
+
+def cache_key(kind, **parts):
+    payload = json.dumps(parts, sort_keys=True)
+    return f"lessonsearch:{kind}:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_or_compute(key, compute, timeout=None):
+    """
+    ``cache.get_or_set`` with a lock against stampedes: only one caller
+    computes a missing value; the others poll for it for up to LOCK_WAIT
+    seconds before computing it themselves.
+    """
+    cache = get_search_cache()
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL)
+            value = cache.get(key)
+            if value is not None:
+                return value
+    try:
+        value = compute()
+        cache.set(key, value, timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+async def aget_or_compute(key, compute, timeout=None):
+    """``get_or_compute`` for async callers; ``compute`` is sync, run in a thread."""
+    cache = get_search_cache()
+    value = await cache.aget(key)
+    if value is not None:
+        return value
+
+    lock_key = f"{key}:lock"
+    if not await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL)
+            value = await cache.aget(key)
+            if value is not None:
+                return value
+    try:
+        value = await sync_to_async(compute)()
+        await cache.aset(key, value, timeout)
+    finally:
+        await cache.adelete(lock_key)
+    return value
+
+
+def matching_ids(query):
+    """Ranked ids of live lessons matching ``query`` (at most SEARCH_MAX_RESULTS)."""
+    results = LessonPage.objects.live().only("id").search(query)[:max_results()]
+    return [page.pk for page in results]
+
+
+def matching_page_ids(query):
+    """Ranked ids of all live pages matching ``query``, for the site-wide search."""
+    results = Page.objects.live().only("id").search(query)[:max_results()]
+    return [page.pk for page in results]
+
+
+def search_timeout():
+    return getattr(settings, "LESSON_SEARCH_CACHE_TIMEOUT", 60)
+
+
+def page_search(query):
+    """Cached ranked page ids for ``query`` (see ``matching_page_ids``)."""
+    query = normalize_query(query)
+    if not query:
+        return []
+    return get_or_compute(
+        cache_key("pages", query=query), lambda: matching_page_ids(query), search_timeout()
+    )
+
+
+async def apage_search(query):
+    query = normalize_query(query)
+    if not query:
+        return []
+    return await aget_or_compute(
+        cache_key("pages", query=query), lambda: matching_page_ids(query), search_timeout()
+    )
+
+
+def facet_search(query, domain=None, tag=None):
+    """
+    Return {"ids": [...], "domains": [(domain, count)], "tags": [(id, name, slug, count)],
+    "truncated": bool}.
+
+    ``ids`` keeps the search ranking. Domain counts respect the tag filter and
+    tag counts respect the domain filter, so each facet shows what selecting
+    one of its values would return. Counts cover the ranked ids only, which
+    stop at SEARCH_MAX_RESULTS; ``truncated`` says the query matched that
+    many, so the counts are lower bounds.
+    """
+    query = normalize_query(query)
+    timeout = search_timeout()
+    if not query:
+        return {"ids": [], "domains": [], "tags": [], "truncated": False}
+
+    ids = get_or_compute(
+        cache_key("ids", query=query), lambda: matching_ids(query), timeout
+    )
+    return get_or_compute(
+        cache_key("facets", query=query, domain=domain or "", tag=tag or ""),
+        lambda: compute_facets(ids, domain, tag),
+        timeout,
+    )
+
+
+async def afacet_search(query, domain=None, tag=None):
+    query = normalize_query(query)
+    timeout = search_timeout()
+    if not query:
+        return {"ids": [], "domains": [], "tags": [], "truncated": False}
+
+    ids = await aget_or_compute(
+        cache_key("ids", query=query), lambda: matching_ids(query), timeout
+    )
+    return await aget_or_compute(
+        cache_key("facets", query=query, domain=domain or "", tag=tag or ""),
+        lambda: compute_facets(ids, domain, tag),
+        timeout,
+    )
+
+
+def compute_facets(ids, domain, tag):
+    """The uncached part of ``facet_search``, for the ranked ``ids`` of a query."""
+    rows = LessonIndexEntry.objects.filter(pk__in=ids).values_list(
+        "pk", "domain", "tag_ids"
+    )
+    by_id = {pk: (row_domain, set(tag_ids)) for pk, row_domain, tag_ids in rows}
+    tag_id = None
+    if tag:
+        tag_id = Tag.objects.filter(slug=tag).values_list("pk", flat=True).first()
+        if tag_id is None:
+            return {"ids": [], "domains": [], "tags": [], "truncated": False}
+
+    def keep(pk, check_domain=True, check_tag=True):
+        row_domain, tag_ids = by_id[pk]
+        return (not (check_domain and domain) or row_domain == domain) and (
+            not (check_tag and tag_id) or tag_id in tag_ids
+        )
+
+    indexed = [pk for pk in ids if pk in by_id]
+    domains = Counter(by_id[pk][0] for pk in indexed if keep(pk, check_domain=False))
+    tag_totals = Counter(
+        tid for pk in indexed if keep(pk, check_tag=False) for tid in by_id[pk][1]
+    )
+    top_tags = dict(tag_totals.most_common(FACET_LIMIT))
+    names = {
+        pk: (name, slug)
+        for pk, name, slug in Tag.objects.filter(pk__in=top_tags).values_list(
+            "pk", "name", "slug"
+        )
+    }
+    return {
+        "ids": [pk for pk in indexed if keep(pk)],
+        "domains": sorted(domains.items(), key=lambda item: (-item[1], item[0])),
+        "tags": sorted(
+            (
+                (tid, names[tid][0], names[tid][1], count)
+                for tid, count in top_tags.items()
+                if tid in names
+            ),
+            key=lambda item: (-item[3], item[1]),
+        ),
+        "truncated": len(ids) >= max_results(),
+    }
+
+
+def entries_in_order(ids):
+    """LessonIndexEntry rows for ``ids``, in the order given."""
+    entries = LessonIndexEntry.objects.in_bulk(ids)
+    return [entries[pk] for pk in ids if pk in entries]
+
+
+async def aentries_in_order(ids):
+    entries = await LessonIndexEntry.objects.ain_bulk(ids)
+    return [entries[pk] for pk in ids if pk in entries]
+
+
+def pages_in_order(ids):
+    """Live specific pages for ``ids``, in the order given (without their StreamFields)."""
+    pages = Page.objects.live().filter(pk__in=ids).defer_streamfields().specific()
+    pages = {page.pk: page for page in pages}
+    return [pages[pk] for pk in ids if pk in pages]
+
+
+async def apages_in_order(ids):
+    pages = Page.objects.live().filter(pk__in=ids).defer_streamfields().specific()
+    pages = {page.pk: page async for page in pages}
+    return [pages[pk] for pk in ids if pk in pages]
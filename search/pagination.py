@@ -0,0 +1,123 @@
+"""
+Cursor pagination for search results.
+
+Search backends rank by relevance, and a relevance score can't be used as a
+SQL keyset, so instead the ranked ids for a query are fetched once (capped
+at ``SEARCH_MAX_RESULTS``) and cached in the search cache. A cursor is a
+signed, opaque token naming the last (or first) id of the previous page plus
+a position hint. Moving to the next page means locating that id in the
+cached list and slicing after it. That costs the same on page 500 as on
+page 1, and no COUNT is ever issued. Anchoring on an id rather than an
+offset keeps pages stable when the list is recomputed after the cache
+expires.
+
+Existing ``?page=N`` links keep working: they slice the same cached list, so
+any page within ``SEARCH_MAX_RESULTS`` is reachable, and a number past the
+end clamps to the last page. The Previous/Next links on that page carry
+cursors as usual.
+"""
+from django.conf import settings
+from django.core import signing
+
+
+CURSOR_SALT = "search.cursor"
+
+
+def max_results():
+    return getattr(settings, "SEARCH_MAX_RESULTS", 1000)
+
+
+def encode_cursor(query_key, direction, anchor, position):
+    return signing.dumps(
+        {"q": query_key, "d": direction, "a": anchor, "p": position},
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(cursor, query_key):
+    """Return the cursor payload, or None if it's invalid or for another query."""
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    if payload.get("q") != query_key or payload.get("d") not in ("after", "before"):
+        return None
+    return payload
+
+
+def _locate(ids, anchor, hint):
+    if 0 <= hint < len(ids) and ids[hint] == anchor:
+        return hint
+    try:
+        return ids.index(anchor)
+    except ValueError:
+        return None
+
+
+class CursorPage:
+    """One page of ids, with opaque cursors to its neighbours."""
+
+    def __init__(self, ids, start, end, object_list, query_key):
+        self.object_list = object_list
+        self.start = start
+        self.total = len(ids)
+        # The id list is capped, so a full list means "at least this many".
+        self.total_is_approximate = len(ids) >= max_results()
+
+        self.next_cursor = (
+            encode_cursor(query_key, "after", ids[end - 1], end - 1) if end < len(ids) else None
+        )
+        self.previous_cursor = (
+            encode_cursor(query_key, "before", ids[start], start) if start > 0 else None
+        )
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _page_start(page, per_page, count):
+    try:
+        number = int(page)
+    except (TypeError, ValueError):
+        return 0
+    last = max(count - 1, 0) // per_page
+    return min(max(number, 1) - 1, last) * per_page
+
+
+def paginate_ids(ids, query_key, cursor=None, per_page=10, load=None, page=None):
+    """
+    Return a ``CursorPage`` for the ranked ``ids``.
+
+    ``load`` turns the ids of the page into the objects to display, keeping
+    their order. A valid ``cursor`` wins over a ``page`` number; an invalid
+    or stale cursor falls back to ``page``, and then to the first page.
+    """
+    start = 0
+    state = decode_cursor(cursor, query_key) if cursor else None
+    if state is None and page is not None:
+        start = _page_start(page, per_page, len(ids))
+    if state is not None:
+        # Fall back to the position hint if the anchor has left the results.
+        position = _locate(ids, state["a"], state["p"])
+        if position is None:
+            position = state["p"]
+        if state["d"] == "after":
+            start = position + 1
+        else:
+            start = position - per_page
+        start = min(max(start, 0), max(len(ids) - 1, 0))
+
+    end = min(start + per_page, len(ids))
+    page_ids = ids[start:end]
+    object_list = load(page_ids) if load is not None else page_ids
+    return CursorPage(ids, start, end, object_list, query_key)
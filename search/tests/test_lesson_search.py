@@ -0,0 +1,129 @@
+import pytest
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.test import AsyncClient, Client, RequestFactory, override_settings
+from wagtail.models import Page, Site
+
+from home.models import HomePage, LessonPage
+from search import lessons, views
+
+
+@pytest.fixture
+def lesson_site(django_capture_on_commit_callbacks):
+    caches["search"].clear()
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Search Home", slug="search-home")
+    root.add_child(instance=homepage)
+    homepage.save_revision().publish()
+    Site.objects.update(root_page=homepage)
+
+    # Search indexing runs on commit.
+    with django_capture_on_commit_callbacks(execute=True):
+        for slug, domain, tags in [
+            ("optics-basics", "physics", ["light"]),
+            ("optics-lasers", "physics", ["light", "quantum"]),
+            ("optics-of-the-eye", "biology", ["light", "anatomy"]),
+            ("cells", "biology", ["anatomy"]),
+        ]:
+            lesson = LessonPage(title=slug.replace("-", " ").title(), slug=slug, domain=domain)
+            lesson.body = [("paragraph", "<p>Body</p>")]
+            lesson.tags.add(*tags)
+            homepage.add_child(instance=lesson)
+            lesson.save_revision().publish()
+    yield
+    caches["search"].clear()
+
+
+def test_normalize_query():
+    assert lessons.normalize_query("  Optics   BASICS ") == "optics basics"
+
+
+@pytest.mark.django_db
+def test_facet_search_counts_domains_and_tags(lesson_site):
+    results = lessons.facet_search("optics")
+
+    assert len(results["ids"]) == 3
+    assert results["domains"] == [("physics", 2), ("biology", 1)]
+    assert [(name, count) for _, name, _, count in results["tags"]] == [
+        ("light", 3), ("anatomy", 1), ("quantum", 1),
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("plain_storages")
+def test_facet_counts_are_marked_when_results_are_capped(lesson_site):
+    assert not lessons.facet_search("optics")["truncated"]
+
+    caches["search"].clear()
+    with override_settings(SEARCH_MAX_RESULTS=2):
+        results = lessons.facet_search("optics")
+        response = Client().get("/search/lessons/", {"query": "optics"})
+
+    assert results["truncated"]
+    assert sum(count for _, count in results["domains"]) == 2
+    assert b"(1+)" in response.content
+
+
+@pytest.mark.django_db
+def test_facet_search_filters(lesson_site):
+    results = lessons.facet_search("optics", domain="physics", tag="quantum")
+
+    assert [LessonPage.objects.get(pk=pk).slug for pk in results["ids"]] == ["optics-lasers"]
+    # Each facet ignores its own filter.
+    assert results["domains"] == [("physics", 1)]
+    assert [name for _, name, _, _ in results["tags"]] == ["light", "quantum"]
+
+
+@pytest.mark.django_db
+def test_repeated_query_hits_database_once(lesson_site):
+    lessons.facet_search("Optics")
+    with patch.object(lessons, "matching_ids") as matching_ids:
+        again = lessons.facet_search("  optics ")
+    matching_ids.assert_not_called()
+    assert len(again["ids"]) == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("plain_storages")
+def test_lesson_search_view(lesson_site):
+    response = Client().get("/search/lessons/", {"query": "optics", "domain": "biology"})
+
+    assert response.status_code == 200
+    assert [r.title for r in response.context["search_results"]] == ["Optics Of The Eye"]
+    assert b'href="/optics-of-the-eye/"' in response.content
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("plain_storages")
+def test_lesson_search_view_under_asgi(lesson_site):
+    response = async_to_sync(AsyncClient().get)(
+        "/search/lessons/", {"query": "optics", "domain": "biology"}
+    )
+
+    assert response.status_code == 200
+    assert [r.title for r in response.context["search_results"]] == ["Optics Of The Eye"]
+    assert b'href="/optics-of-the-eye/"' in response.content
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("plain_storages")
+def test_async_lesson_search_view_matches_sync_view(lesson_site):
+    request = RequestFactory().get("/search/lessons/", {"query": "optics", "domain": "biology"})
+    request.user = AnonymousUser()
+    expected = views.lesson_search(request).render()
+
+    response = async_to_sync(views.alesson_search)(request).render()
+
+    assert response.content == expected.content
+    assert b'href="/optics-of-the-eye/"' in response.content
+
+
+@pytest.mark.django_db
+def test_async_searches_match_sync_searches(lesson_site):
+    assert async_to_sync(lessons.apage_search)("optics") == lessons.page_search("optics")
+    assert async_to_sync(lessons.afacet_search)("optics", None, None) == lessons.facet_search(
+        "optics", None, None
+    )
@@ -0,0 +1,111 @@
+import pytest
+from django.core.cache import caches
+from django.test import Client, override_settings
+from wagtail.models import Page, Site
+
+from home.models import HomePage, LessonPage
+from search.pagination import encode_cursor, paginate_ids
+
+
+def walk(ids, query_key="q", per_page=10):
+    pages = [paginate_ids(ids, query_key, per_page=per_page)]
+    while pages[-1].has_next():
+        pages.append(paginate_ids(ids, query_key, cursor=pages[-1].next_cursor, per_page=per_page))
+    return pages
+
+
+def test_cursors_walk_every_id_once():
+    ids = list(range(100, 125))
+    pages = walk(ids)
+
+    assert [list(page) for page in pages] == [ids[:10], ids[10:20], ids[20:]]
+    assert not pages[0].has_previous()
+
+    back = paginate_ids(ids, "q", cursor=pages[2].previous_cursor)
+    assert list(back) == ids[10:20]
+
+
+def test_cursor_anchors_on_id_when_results_shift():
+    ids = list(range(30))
+    second = paginate_ids(ids, "q", cursor=paginate_ids(ids, "q").next_cursor)
+
+    # Two new results ranked ahead of everything: the next page still starts after id 19.
+    shifted = [-2, -1] + ids
+    assert list(paginate_ids(shifted, "q", cursor=second.next_cursor)) == ids[20:30]
+
+
+def test_cursor_for_another_query_is_ignored():
+    ids = list(range(30))
+    cursor = paginate_ids(ids, "optics").next_cursor
+
+    assert list(paginate_ids(ids, "lasers", cursor=cursor)) == ids[:10]
+    assert list(paginate_ids(ids, "optics", cursor="tampered")) == ids[:10]
+
+
+def test_stale_cursor_falls_back_to_position():
+    ids = list(range(30))
+    cursor = encode_cursor("q", "after", 999, 9)
+
+    assert list(paginate_ids(ids, "q", cursor=cursor)) == ids[10:20]
+
+
+def test_page_numbers_slice_the_cached_ids():
+    ids = list(range(25))
+
+    assert list(paginate_ids(ids, "q", page="2")) == ids[10:20]
+    assert list(paginate_ids(ids, "q", page="9")) == ids[20:]
+    assert list(paginate_ids(ids, "q", page="zero")) == ids[:10]
+    assert list(paginate_ids(ids, "q", page="-3")) == ids[:10]
+
+    third = paginate_ids(ids, "q", page=3)
+    assert list(paginate_ids(ids, "q", cursor=third.previous_cursor)) == ids[10:20]
+
+
+def test_cursor_wins_over_page_number():
+    ids = list(range(30))
+    cursor = paginate_ids(ids, "q").next_cursor
+
+    assert list(paginate_ids(ids, "q", cursor=cursor, page=3)) == ids[10:20]
+    assert list(paginate_ids(ids, "q", cursor="tampered", page=3)) == ids[20:30]
+
+
+@override_settings(SEARCH_MAX_RESULTS=20)
+def test_total_is_approximate_when_capped():
+    assert paginate_ids(list(range(20)), "q").total_is_approximate
+    assert not paginate_ids(list(range(19)), "q").total_is_approximate
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("plain_storages")
+def test_search_view_pages_with_cursors(django_capture_on_commit_callbacks):
+    caches["search"].clear()
+    root = Page.objects.get(id=1)
+    homepage = HomePage(title="Cursor Home", slug="cursor-home")
+    root.add_child(instance=homepage)
+    homepage.save_revision().publish()
+    Site.objects.update(root_page=homepage)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        for number in range(12):
+            lesson = LessonPage(title=f"Waves {number}", slug=f"waves-{number}", domain="physics")
+            lesson.body = [("paragraph", "<p>Body</p>")]
+            homepage.add_child(instance=lesson)
+            lesson.save_revision().publish()
+
+    client = Client()
+    first = client.get("/search/", {"query": "waves"})
+    results = first.context["search_results"]
+    assert len(results) == 10
+    assert results.total == 12
+    assert b"12 results" in first.content
+
+    second = client.get("/search/", {"query": "waves", "cursor": results.next_cursor})
+    titles = {page.title for page in results} | {page.title for page in second.context["search_results"]}
+    assert len(titles) == 12
+    assert not second.context["search_results"].has_next()
+
+    by_number = client.get("/search/", {"query": "waves", "page": "2"})
+    assert [page.pk for page in by_number.context["search_results"]] == [
+        page.pk for page in second.context["search_results"]
+    ]
+    caches["search"].clear()
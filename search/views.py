@@ -1,7 +1,10 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from asgiref.sync import sync_to_async
 from django.template.response import TemplateResponse
 
-from wagtail.models import Page
+from home import lesson_index
+
+from . import lessons
+from .pagination import paginate_ids
 
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
@@ -10,37 +13,133 @@ from wagtail.models import Page
 
 # from wagtail.contrib.search_promotions.models import Query
 
+# search and lesson_search are sync, for WSGI. asearch and alesson_search
+# return the same pages through the async helpers in search/lessons.py, so
+# that under ASGI a cached search is answered without waiting for a thread.
+# lesson_space/serving_urls.py picks one pair (settings.ASYNC_VIEWS). Both
+# share the request parsing and context below and differ only in the I/O.
+
+PER_PAGE = 10
+
+
+def _search_params(request):
+    return {
+        "query": request.GET.get("query", None),
+        "cursor": request.GET.get("cursor"),
+        "page": request.GET.get("page"),
+    }
 
-def search(request):
-    search_query = request.GET.get("query", None)
-    page = request.GET.get("page", 1)
 
-    # Search
-    if search_query:
-        search_results = Page.objects.live().search(search_query)
+def _lesson_search_params(request):
+    params = _search_params(request)
+    params["domain"] = request.GET.get("domain") or None
+    params["tag"] = request.GET.get("tag") or None
+    return params
 
-        # To log this query for use with the "Promoted search results" module:
 
-        # query = Query.get(search_query)
-        # query.add_hit()
+def _paginate(ids, query_key, params):
+    # Cursor pagination over the cached id list: no OFFSET and no COUNT.
+    # The page holds ids; the caller loads the objects.
+    return paginate_ids(
+        ids, query_key, cursor=params["cursor"], page=params["page"], per_page=PER_PAGE
+    )
+
+
+def _paginate_lessons(ids, params):
+    # A cursor only applies to the filters it was issued for.
+    query_key = lessons.cache_key(
+        "facets",
+        query=lessons.normalize_query(params["query"]),
+        domain=params["domain"] or "",
+        tag=params["tag"] or "",
+    )
+    return _paginate(ids, query_key, params)
+
 
-    else:
-        search_results = Page.objects.none()
+def _add_urls(entries, request):
+    # Site lookups are cached, but can query on a miss.
+    for entry in entries:
+        entry.url = lesson_index.entry_url(entry, request)
 
-    # Pagination
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
 
+def _search_response(request, params, search_results):
     return TemplateResponse(
         request,
         "search/search.html",
         {
-            "search_query": search_query,
+            "search_query": params["query"],
             "search_results": search_results,
         },
     )
+
+
+def _lesson_search_response(request, params, results, search_results):
+    return TemplateResponse(
+        request,
+        "search/lesson_search.html",
+        {
+            "search_query": params["query"],
+            "search_results": search_results,
+            "domain": params["domain"],
+            "tag": params["tag"],
+            "domain_facets": results["domains"],
+            "tag_facets": results["tags"],
+            "facets_truncated": results["truncated"],
+        },
+    )
+
+
+def search(request):
+    params = _search_params(request)
+
+    # Search: ranked page ids, cached per normalized query (see search/lessons.py)
+    ids = lessons.page_search(params["query"])
+
+    # To log this query for use with the "Promoted search results" module:
+
+    # if params["query"] and not params["cursor"] and not params["page"]:
+    #     query = Query.get(params["query"])
+    #     query.add_hit()
+
+    search_results = _paginate(ids, lessons.normalize_query(params["query"]), params)
+    search_results.object_list = lessons.pages_in_order(search_results.object_list)
+    return _search_response(request, params, search_results)
+
+
+def lesson_search(request):
+    params = _lesson_search_params(request)
+
+    # Cached ranked ids + facet counts (see search/lessons.py)
+    results = lessons.facet_search(params["query"], domain=params["domain"], tag=params["tag"])
+
+    search_results = _paginate_lessons(results["ids"], params)
+    search_results.object_list = lessons.entries_in_order(search_results.object_list)
+    _add_urls(search_results.object_list, request)
+    return _lesson_search_response(request, params, results, search_results)
+
+
+async def asearch(request):
+    params = _search_params(request)
+
+    ids = await lessons.apage_search(params["query"])
+
+    # if params["query"] and not params["cursor"] and not params["page"]:
+    #     query = await sync_to_async(Query.get)(params["query"])
+    #     await sync_to_async(query.add_hit)()
+
+    search_results = _paginate(ids, lessons.normalize_query(params["query"]), params)
+    search_results.object_list = await lessons.apages_in_order(search_results.object_list)
+    return _search_response(request, params, search_results)
+
+
+async def alesson_search(request):
+    params = _lesson_search_params(request)
+
+    results = await lessons.afacet_search(
+        params["query"], domain=params["domain"], tag=params["tag"]
+    )
+
+    search_results = _paginate_lessons(results["ids"], params)
+    search_results.object_list = await lessons.aentries_in_order(search_results.object_list)
+    await sync_to_async(_add_urls)(search_results.object_list, request)
+    return _lesson_search_response(request, params, results, search_results)